@@ -1,5 +1,5 @@
-import random
 import typing
+from functools import partial
 
 from adventure_classes.generic.battle import battle
 from adventure_classes.generic.adventure import Adventure
@@ -21,24 +21,22 @@ if typing.TYPE_CHECKING:
     from helpers.command import Command
 
 
-def eat_mushroom(color: int):
-    def mushroom_effect(adventure: Adventure):
-        bc = BonusChapter(tr(adventure.get_lang(), 'FOREST.EVENT6'))
-        if color == 0:
-            bc.add_modifier(StatModifier(Stat.DEF, -2, StatModifierOperation.ADD, 1))
-        elif color == 1:
-            bc.add_modifier(StatModifier(Stat.SPD, 5, StatModifierOperation.ADD))
-        else:
-            bc.add_persistent(Stat.HP, Stat.HP.get_value(4))
-        adventure.insert_chapter(bc)
-
-    return mushroom_effect
+# A partial rather than a closure, so the choice can be saved
+def eat_mushroom(color: int, adventure: Adventure):
+    bc = BonusChapter(tr(adventure.get_lang(), 'FOREST.EVENT6'))
+    if color == 0:
+        bc.add_modifier(StatModifier(Stat.DEF, -2, StatModifierOperation.ADD, 1))
+    elif color == 1:
+        bc.add_modifier(StatModifier(Stat.SPD, 5, StatModifierOperation.ADD))
+    else:
+        bc.add_persistent(Stat.HP, Stat.HP.get_value(4))
+    adventure.insert_chapter(bc)
 
 
 def aa_deeper(adventure: Adventure):
     battle.qsab(adventure, Location.FOREST, 'C')
     bc = BonusChapter(tr(adventure.get_lang(), 'FOREST.EVENT5'))
-    if random.random() < 0.5:
+    if adventure.rng.random() < 0.5:
         bc.add_modifier(StatModifier(Stat.EVA, 3, StatModifierOperation.ADD))
     else:
         bc.add_modifier(StatModifier(Stat.SPD, 3, StatModifierOperation.ADD))
@@ -46,9 +44,9 @@ def aa_deeper(adventure: Adventure):
     battle.qsab(adventure, Location.FOREST, 'C')
 
     cc = ChoiceChapter(Emoji.MUSHROOM, tr(adventure.get_lang(), 'FOREST.DECISION4_TEXT'))
-    cc.add_choice(Emoji.RED, tr(adventure.get_lang(), 'FOREST.DECISION4_OPTION1'), eat_mushroom(0))
-    cc.add_choice(Emoji.BLUE, tr(adventure.get_lang(), 'FOREST.DECISION4_OPTION2'), eat_mushroom(1))
-    cc.add_choice(Emoji.GREEN, tr(adventure.get_lang(), 'FOREST.DECISION4_OPTION3'), eat_mushroom(2))
+    cc.add_choice(Emoji.RED, tr(adventure.get_lang(), 'FOREST.DECISION4_OPTION1'), partial(eat_mushroom, 0))
+    cc.add_choice(Emoji.BLUE, tr(adventure.get_lang(), 'FOREST.DECISION4_OPTION2'), partial(eat_mushroom, 1))
+    cc.add_choice(Emoji.GREEN, tr(adventure.get_lang(), 'FOREST.DECISION4_OPTION3'), partial(eat_mushroom, 2))
     adventure.add_chapter(cc)
 
     battle.qsab(adventure, Location.FOREST, 'B')
@@ -62,12 +60,12 @@ def aa_deeper(adventure: Adventure):
                            tr(adventure.get_lang(), 'FOREST.BOSS2'),
                            tr(adventure.get_lang(), 'FOREST.BOSS3')])
 
-    item: Equipment = RandomEquipmentBuilder(0).set_location(Location.FOREST).build()
+    item: Equipment = RandomEquipmentBuilder(0).set_location(Location.FOREST).build(adventure.rng)
     adventure.add_chapter(ItemRewardChapter(item))
 
 
 def ab_continue_path(adventure):
-    if random.random() < 0.5:
+    if adventure.rng.random() < 0.5:
         bc = BonusChapter(tr(adventure.get_lang(), 'FOREST.EVENT3'))
         bc.add_modifier(StatModifier(Stat.DEF, 3, StatModifierOperation.ADD))
         adventure.add_chapter(bc)
@@ -77,11 +75,11 @@ def ab_continue_path(adventure):
         adventure.add_chapter(bc)
     battle.qsab(adventure, Location.FOREST, 'A')
     battle.qsab(adventure, Location.FOREST, 'C')
-    if random.random() < 0.5:
-        adventure.add_chapter(MoneyRewardChapter(random.randint(100, 150)))
+    if adventure.rng.random() < 0.5:
+        adventure.add_chapter(MoneyRewardChapter(adventure.rng.randint(100, 150)))
     else:
         item: Equipment = RandomEquipmentBuilder(0).set_location(Location.ANYWHERE) \
-            .choose_rarity([ItemRarity.UNCOMMON, ItemRarity.RARE, ItemRarity.EPIC], [6, 3, 1]).build()
+            .choose_rarity([ItemRarity.UNCOMMON, ItemRarity.RARE, ItemRarity.EPIC], [6, 3, 1]).build(adventure.rng)
         adventure.add_chapter(ItemRewardChapter(item))
 
 
@@ -95,16 +93,16 @@ def a_deep(adventure):
 
 
 def b_reward(adventure):
-    if random.random() < 0:
-        adventure.add_chapter(MoneyRewardChapter(random.randint(50, 100)))
+    if adventure.rng.random() < 0:
+        adventure.add_chapter(MoneyRewardChapter(adventure.rng.randint(50, 100)))
     else:
         item: Equipment = RandomEquipmentBuilder(0).set_location(Location.ANYWHERE) \
-            .choose_rarity([ItemRarity.COMMON, ItemRarity.UNCOMMON], [5, 2]).build()
+            .choose_rarity([ItemRarity.COMMON, ItemRarity.UNCOMMON], [5, 2]).build(adventure.rng)
         adventure.add_chapter(ItemRewardChapter(item))
 
 
 def ba_bear(adventure):
-    if random.random() < 0.4:
+    if adventure.rng.random() < 0.4:
         battle.qsab(adventure, Location.FOREST, 'D', icon=Emoji.BEAR,
                     pre_text=[tr(adventure.get_lang(), 'FOREST.EVENT2')])
     else:
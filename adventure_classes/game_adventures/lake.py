@@ -1,4 +1,3 @@
-import random
 import typing
 
 from adventure_classes.generic.adventure import Adventure
@@ -35,18 +34,18 @@ def aa_deepest(adventure: Adventure):
                 pre_text=[tr(adventure.get_lang(), 'LAKE.BOSS1'),
                           tr(adventure.get_lang(), 'LAKE.BOSS2'),
                           tr(adventure.get_lang(), 'LAKE.BOSS3')])
-    item: Equipment = RandomEquipmentBuilder(0).set_location(Location.LAKE).build()
+    item: Equipment = RandomEquipmentBuilder(0).set_location(Location.LAKE).build(adventure.rng)
     adventure.add_chapter(ItemRewardChapter(item))
 
 
 def ab_around(adventure: Adventure):
     battle.qsab(adventure, Location.LAKE, 'A')
     battle.qsab(adventure, Location.LAKE, 'C')
-    if random.random() < 0.5:
-        adventure.add_chapter(MoneyRewardChapter(random.randint(175, 225)))
+    if adventure.rng.random() < 0.5:
+        adventure.add_chapter(MoneyRewardChapter(adventure.rng.randint(175, 225)))
     else:
         item: Equipment = RandomEquipmentBuilder(0).set_location(Location.ANYWHERE) \
-            .choose_rarity([ItemRarity.RARE, ItemRarity.EPIC], [5, 2]).build()
+            .choose_rarity([ItemRarity.RARE, ItemRarity.EPIC], [5, 2]).build(adventure.rng)
         adventure.add_chapter(ItemRewardChapter(item))
 
 
@@ -54,7 +53,7 @@ def a_deep(adventure: Adventure):
     battle.qsab(adventure, Location.LAKE, 'B')
     battle.qsab(adventure, Location.LAKE, 'B')
     bc: BonusChapter = BonusChapter(tr(adventure.get_lang(), 'LAKE.EVENT1'))
-    if random.random() < 0.5:
+    if adventure.rng.random() < 0.5:
         bc.add_modifier(StatModifier(Stat.EVA, 3, StatModifierOperation.ADD))
     else:
         bc.add_modifier(StatModifier(Stat.CONT, 4, StatModifierOperation.ADD))
@@ -67,18 +66,18 @@ def a_deep(adventure: Adventure):
 
 def b_before_reward(adventure: Adventure):
     battle.qsab(adventure, Location.LAKE, 'A')
-    if random.random() < 0.5:
-        adventure.add_chapter(MoneyRewardChapter(random.randint(75, 125)))
+    if adventure.rng.random() < 0.5:
+        adventure.add_chapter(MoneyRewardChapter(adventure.rng.randint(75, 125)))
     else:
         item: Equipment = RandomEquipmentBuilder(0).set_location(Location.ANYWHERE) \
-            .choose_rarity([ItemRarity.UNCOMMON, ItemRarity.RARE], [5, 2]).build()
+            .choose_rarity([ItemRarity.UNCOMMON, ItemRarity.RARE], [5, 2]).build(adventure.rng)
         adventure.add_chapter(ItemRewardChapter(item))
 
 
 def ba_pick(adventure: Adventure):
-    if random.random() < 0.5:
+    if adventure.rng.random() < 0.5:
         bc: BonusChapter = BonusChapter(tr(adventure.get_lang(), 'LAKE.DECISION2_RESULT1'))
-        if random.random() < 0.5:
+        if adventure.rng.random() < 0.5:
             bc.add_modifier(StatModifier(Stat.STR, 2, StatModifierOperation.ADD))
         else:
             bc.add_modifier(StatModifier(Stat.DEF, 2, StatModifierOperation.ADD))
@@ -0,0 +1,125 @@
+import traceback
+from typing import Optional, Any, Callable
+
+import discord
+from discord import Message
+
+import utils
+from adventure_classes.game_adventures.adventure_provider import AdventureInstance, nothing
+from adventure_classes.game_adventures.tutorial import TutorialClassChapter, TutorialEndChapter
+from adventure_classes.generic.adventure import Adventure
+from adventure_classes.generic.adventure_store import AdventureStore, get_store
+from adventure_classes.generic.battle.battle import BattleChapter
+from adventure_classes.generic.bonus import BonusChapter
+from adventure_classes.generic.chapter import Chapter
+from adventure_classes.generic.choice import ChoiceChapter
+from adventure_classes.generic.reward import ItemRewardChapter, MoneyRewardChapter
+from db.database import PostgreSQL
+from enums.emoji import Emoji
+from helpers import storage
+from helpers.seeded_random import SeededRandom
+from helpers.translate import tr
+from user_data.user import User
+
+# Chapters that can be saved, by class name
+CHAPTER_TYPES: dict[str, Callable[[dict[str, Any]], Chapter]] = {
+    'ChoiceChapter': ChoiceChapter.from_dict,
+    'BonusChapter': BonusChapter.from_dict,
+    'BattleChapter': BattleChapter.from_dict,
+    'ItemRewardChapter': ItemRewardChapter.from_dict,
+    'MoneyRewardChapter': MoneyRewardChapter.from_dict,
+    'TutorialClassChapter': TutorialClassChapter.from_dict,
+    'TutorialEndChapter': TutorialEndChapter.from_dict
+}
+
+
+def chapters_from_dict(data: dict[str, Any]) -> Optional[list[Chapter]]:
+    if data['chapters'] is None:
+        return None
+    return [CHAPTER_TYPES[chapter['type']](chapter) for chapter in data['chapters']]
+
+
+def instance_from_dict(data: dict[str, Any]) -> AdventureInstance:
+    # Only used once started, so no setup call
+    return AdventureInstance(nothing, data['name'], Emoji[data['icon']], data['tokens'])
+
+
+async def _fetch_message(channel_id: int, message_id: int) -> Optional[Message]:
+    try:
+        channel = utils.BOT_CLIENT.get_channel(channel_id)
+        if channel is None:
+            channel = await utils.BOT_CLIENT.fetch_channel(channel_id)
+        return await channel.fetch_message(message_id)
+    except discord.HTTPException:  # Also NotFound and Forbidden
+        return None
+
+
+async def rehydrate(db: PostgreSQL, adventure: Adventure) -> bool:
+    # Brings back an evicted adventure, False if it had to be dropped (giving back the tokens of its users)
+    store: Optional[AdventureStore] = get_store()
+    data: Optional[dict[str, Any]] = None if store is None else await store.load(adventure.get_message_id())
+    message: Optional[Message] = None
+    chapters: Optional[list[Chapter]] = None
+    if data is not None:
+        chapters = chapters_from_dict(data)
+        message = await _fetch_message(data['channel'], data['message'])
+    if (chapters is None) or (message is None):
+        await adventure.forget()
+        async with db.checkout():
+            await _refund(db, adventure.get_users(), adventure.get_instance().tokens, adventure.get_lang(),
+                          adventure.get_instance().name, message)
+        return False
+    await adventure.resume(message, chapters, data['finish_time'])
+    return True
+
+
+async def _refund(db: PostgreSQL, users: list[User], tokens: int, lang: str, location: str,
+                  message: Optional[Message]) -> None:
+    for user in users:
+        user.add_tokens(tokens)
+        await user.save()
+    await db.aio.commit()
+    if message is not None:
+        try:
+            await message.edit(content=tr(lang, 'ADVENTURE.INTERRUPTED', location=tr(lang, location)))
+            await message.clear_reactions()
+        except discord.HTTPException:
+            pass
+
+
+async def _resume(db: PostgreSQL, store: AdventureStore, message_id: int, data: dict[str, Any]) -> bool:
+    if data['finish_time'] < utils.now():
+        await store.delete(message_id)  # Expired while offline, nothing to give back
+        return False
+    user_ids: list[int] = [user_id for user_id, _ in data['users']]
+    users: dict[int, User] = await db.aio.run(storage.get_users, db, user_ids, False)
+    message: Optional[Message] = await _fetch_message(data['channel'], message_id)
+    chapters: Optional[list[Chapter]] = chapters_from_dict(data)
+    if (chapters is None) or (message is None) or (len(users) != len(user_ids)) or \
+            any(user.get_adventure() is not None for user in users.values()):
+        await _refund(db, list(users.values()), data['instance']['tokens'], data['lang'], data['instance']['name'],
+                      message)
+        await store.delete(message_id)
+        return False
+    adventure: Adventure = Adventure(data['lang'], instance_from_dict(data['instance']), data['saved_data'])
+    adventure.end_override_text = data['end_text']
+    adventure.rng = SeededRandom(data.get('seed'))  # Snapshots older than seeds get a new one
+    adventure.restore_users([(users[user_id], earned_money) for user_id, earned_money in data['users']])
+    await adventure.resume(message, chapters, data['finish_time'])
+    return True
+
+
+async def resume_all(db: PostgreSQL) -> int:
+    # Adventures left by the previous process, the ones that can't go on give their tokens back
+    store: Optional[AdventureStore] = get_store()
+    if store is None:
+        return 0
+    resumed: int = 0
+    for message_id, data in (await store.load_all()).items():
+        try:
+            if await _resume(db, store, message_id, data):
+                resumed += 1
+        except Exception:  # noqa
+            traceback.print_exc()
+            await store.delete(message_id)
+    return resumed
@@ -1,5 +1,5 @@
 import typing
-from collections import Callable
+from typing import Optional, Any, Callable
 
 from adventure_classes.generic.adventure import Adventure
 from adventure_classes.generic.battle import battle
@@ -40,6 +40,13 @@ class TutorialClassChapter(ChoiceChapter):
                             self.choose_class(uc))
         await super().init()
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {}  # Choices are added on init
+
+    @staticmethod
+    def from_dict(_: dict[str, Any]) -> 'TutorialClassChapter':
+        return TutorialClassChapter()
+
 
 class TutorialEndChapter(Chapter):
     def __init__(self):
@@ -55,9 +62,17 @@ class TutorialEndChapter(Chapter):
         user.set_tutorial_stage(-1)
         await self.end()
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {}
+
+    @staticmethod
+    def from_dict(_: dict[str, Any]) -> 'TutorialEndChapter':
+        return TutorialEndChapter()
+
 
 async def setup(cmd: 'Command', adventure: Adventure):
     adventure.add_chapter(TutorialClassChapter())
     battle.qsab(adventure, Location.TUTORIAL, pre_text=[tr(cmd.lang, "TUTORIAL.SEAGULL")])
     adventure.add_chapter(TutorialEndChapter())
-    adventure.add_chapter(ItemRewardChapter(RandomEquipmentBuilder(0).set_rarity(ItemRarity.COMMON).build()))
+    adventure.add_chapter(ItemRewardChapter(RandomEquipmentBuilder(0).set_rarity(ItemRarity.COMMON)
+                                            .build(adventure.rng)))
@@ -1,7 +1,11 @@
 import asyncio
+import json
+import os
+import traceback
 import typing
 from asyncio import Event
-from typing import Optional
+from contextlib import AsyncExitStack
+from typing import Optional, Any
 
 from discord import Message
 
@@ -10,8 +14,12 @@ from helpers.translate import tr
 from item_data.item_classes import Equipment
 from user_data.user import User
 from helpers import messages
+from helpers.keyed_lock import USER_LOCKS
 from helpers.messages import MessagePlus
+from helpers.scheduler import SCHEDULER, Timer
 from enums.emoji import Emoji
+from adventure_classes.generic.adventure_store import AdventureStore, get_store
+from helpers.seeded_random import SeededRandom, ROOT
 
 if typing.TYPE_CHECKING:
     from adventure_classes.generic.chapter import Chapter
@@ -20,9 +28,9 @@ if typing.TYPE_CHECKING:
 
 
 class UserAdventureData:
-    def __init__(self, user: User):
+    def __init__(self, user: User, earned_money: int = 0):
         self._user: User = user
-        self._earned_money: int = 0
+        self._earned_money: int = earned_money
         self._enemies_defeated: int = 0
         self._items_found: list[Equipment] = []
         self._user.on_money_changed += self._on_money_changed
@@ -30,6 +38,9 @@ class UserAdventureData:
     def _on_money_changed(self, money: int):
         self._earned_money += money
 
+    def get_earned_money(self) -> int:
+        return self._earned_money
+
     def unregister_all(self):
         self._user.on_money_changed -= self._on_money_changed
 
@@ -40,7 +51,17 @@ class UserAdventureData:
         return f"{has_plus}{utils.print_money(lang, self._earned_money)}"
 
 
+# Evicted adventures by message id, brought back by the next reaction
+_DORMANT: dict[int, 'Adventure'] = {}
+
+
+def get_dormant(message_id: int) -> Optional['Adventure']:
+    return _DORMANT.get(message_id)
+
+
 class Adventure:
+    IDLE_EVICT_SECONDS: float = float(os.environ.get('ADVENTURE_IDLE_EVICT', 120))
+
     def __init__(self, lang: str, instance: 'AdventureInstance', saved_data=None):
         if saved_data is None:
             saved_data = {}
@@ -57,6 +78,11 @@ class Adventure:
         self._finished: bool = False
         self.start_override_text: Optional[str] = None
         self.end_override_text: Optional[str] = None
+        self._task: Optional[asyncio.Future] = None
+        self._idle_timer: Optional[Timer] = None  # Evicts, or expires once evicted
+        self._message_id: int = 0
+        self._finish_time: int = 0
+        self.rng: SeededRandom = ROOT.spawn()  # Paths, enemies, rewards and the streams of its battles
 
     def get_message(self) -> MessagePlus:
         return self._message
@@ -64,6 +90,12 @@ class Adventure:
     def get_lang(self) -> str:
         return self._lang
 
+    def get_instance(self) -> 'AdventureInstance':
+        return self._instance
+
+    def get_message_id(self) -> int:
+        return self._message_id
+
     def get_user_names(self) -> str:
         return ', '.join([user.get_name() for user in self._users])
 
@@ -104,20 +136,148 @@ class Adventure:
                                         name=tr(self._lang, self._instance.name)) + "\n" + self.print_progress(None))
         self._message = messages.register_message_reactions(message, {user.id for user in self._users})
 
-        await asyncio.sleep(2)
-
-        while self._chapters:
-            chapter: Chapter = self._chapters.pop(0)
-            chapter.setup(self, self.print_progress(chapter))
-            await chapter.init()
-            await self._event.wait()
-            if self.lost:
-                await self.finish(lost=True)
-                return
-
-            self._event.clear()
+        # Chapters run in the background so the command (and its connection) is released right away
+        self._task = asyncio.ensure_future(self._play())
+
+    async def _play(self, delay: float = 2, started: bool = False):
+        # started: the first chapter was already started by resume
+        try:
+            if delay > 0:
+                await SCHEDULER.sleep(delay)
+
+            while started or self._chapters:
+                if not started:
+                    await self._start_chapter(self._chapters.pop(0))
+                started = False
+                await self._event.wait()
+                if self.lost:
+                    await self.finish(lost=True)
+                    return
+
+                self._event.clear()
+
+            await self.finish(lost=False)
+        except Exception:  # noqa
+            traceback.print_exc()
+
+    async def _start_chapter(self, chapter: 'Chapter') -> None:
+        chapter.setup(self, self.print_progress(chapter))
+        await self.save_snapshot(chapter)
+        await chapter.init()
+        if chapter.can_evict() and (not self._event.is_set()) and (get_store() is not None):
+            self._idle_timer = SCHEDULER.call_later(Adventure.IDLE_EVICT_SECONDS, self._on_idle)
+
+    def to_dict(self, chapter: 'Chapter') -> dict[str, Any]:
+        # The adventure from the start of the given chapter, chapters is None if it can't be resumed
+        chapters: Optional[list[dict[str, Any]]] = []
+        for remaining in [chapter] + self._chapters:
+            data: Optional[dict[str, Any]] = remaining.to_dict()
+            if data is None:
+                chapters = None
+                break
+            data['type'] = type(remaining).__name__
+            chapters.append(data)
+        saved_data: dict = {}
+        if chapters is not None:
+            try:
+                json.dumps(self.saved_data)
+                saved_data = self.saved_data
+            except (TypeError, ValueError):
+                chapters = None
+        return {
+            'instance': {'name': self._instance.name, 'icon': self._instance.icon.name,
+                         'tokens': self._instance.tokens},
+            'lang': self._lang,
+            'seed': self.rng.initial_seed,
+            'users': [[user.id, data.get_earned_money()] for user, data in self._users.items()],
+            'channel': self._message.message.channel.id,
+            'message': self._message.message.id,
+            'finish_time': self._message.get_finish_time(),
+            'saved_data': saved_data,
+            'end_text': self.end_override_text,
+            'chapters': chapters
+        }
+
+    async def save_snapshot(self, chapter: 'Chapter') -> None:
+        store: Optional[AdventureStore] = get_store()
+        if store is None:
+            return
+        try:
+            await store.save(self._message.message.id, self.to_dict(chapter))
+        except Exception:  # noqa
+            traceback.print_exc()  # Only resuming is lost
+
+    async def delete_snapshot(self) -> None:
+        store: Optional[AdventureStore] = get_store()
+        if store is None:
+            return
+        try:
+            await store.delete(self._message.message.id if self._message is not None else self._message_id)
+        except Exception:  # noqa
+            traceback.print_exc()
+
+    def _on_idle(self) -> None:
+        asyncio.ensure_future(self.evict())
+
+    async def evict(self) -> None:
+        # Leaves memory while waiting for a reaction, keeping only what user.get_adventure() needs
+        if (self._idle_timer is None) or self._finished or (self._message is None):
+            return  # Not waiting for a reaction
+        await self._message.flush()
+        if (self._idle_timer is None) or self._finished or (self._message is None):
+            return  # Moved on while flushing
+        self._idle_timer.cancel()
+        self._task.cancel()
+        self._task = None
+        self._message_id = self._message.message.id
+        self._finish_time = self._message.get_finish_time()
+        messages.unregister(self._message)
+        self._message = None
+        self._chapters = []
+        _DORMANT[self._message_id] = self
+        self._idle_timer = SCHEDULER.call_later(max(self._finish_time - utils.now(), 0) + 1, self._on_expired)
+
+    def _on_expired(self) -> None:
+        self._idle_timer = None
+        if _DORMANT.pop(self._message_id, None) is not None:
+            asyncio.ensure_future(self.delete_snapshot())
+
+    async def forget(self) -> None:
+        # A dormant adventure that can't come back, its users are free again
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        _DORMANT.pop(self._message_id, None)
+        self._finish_time = 0
+        await self.delete_snapshot()
+
+    def is_dormant(self) -> bool:
+        return self._message_id in _DORMANT
+
+    def restore_users(self, users: list[tuple[User, int]]) -> None:
+        # Users of a resumed adventure, with the money they had earned
+        self._started_on = utils.now()
+        self._users = {user: UserAdventureData(user, earned_money) for user, earned_money in users}
+        for user in self._users:
+            user.start_adventure(self)
 
-        await self.finish(lost=False)
+    async def resume(self, message: Message, chapters: list['Chapter'], finish_time: int) -> None:
+        # Plays again from the start of the first chapter, after a restart or an eviction
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        _DORMANT.pop(message.id, None)
+        self._chapters = chapters
+        self._event.clear()
+        self._message = messages.register_message_reactions(message, {user.id for user in self._users},
+                                                            finish_time - MessagePlus.FINISH_SECONDS)
+        chapter: Chapter = self._chapters[0]
+        if chapter.can_evict():
+            # Hooked right away, so the reaction that woke it up finds its chapter
+            await self._start_chapter(self._chapters.pop(0))
+            self._task = asyncio.ensure_future(self._play(0, started=True))
+        else:
+            self._task = asyncio.ensure_future(self._play(0))
 
     async def finish(self, lost: bool) -> None:
         # Ensure not finished
@@ -141,14 +301,37 @@ class Adventure:
                                             name=self.get_user_names(), location=tr(self._lang, self._instance.name))
                                          + f"\n({end_log})")
 
+        await self._message.flush()
+        await self.delete_snapshot()
+
         # Cleanup
-        for user in self._users:
-            user.end_adventure()
+        if self._users:
+            await self._end_users()
         messages.unregister(self._message)
 
+    async def _end_users(self) -> None:
+        # Runs outside of commands: takes the users' locks (in order, so two adventures never deadlock) and a
+        # connection of its own, then saves the progress made
+        db = self.get_users()[0].get_db()
+        while True:
+            async with AsyncExitStack() as stack:
+                try:
+                    for user in sorted(self._users, key=lambda x: x.id):
+                        await stack.enter_async_context(USER_LOCKS.hold(user.id))
+                except asyncio.TimeoutError:
+                    continue  # Their adventure must end, so wait for as long as needed
+                async with db.checkout():
+                    for user in self._users:
+                        user.end_adventure()
+                        await user.save()
+                    await db.aio.commit()
+                return
+
     def has_finished(self) -> bool:
         if utils.now() - self._started_on < 10:
             return False
+        if self._message is None:  # Evicted
+            return utils.now() > self._finish_time
         return self._message.has_finished()
 
     def get_user(self) -> User:
@@ -189,7 +372,7 @@ class Adventure:
         await self._message.remove_reactions(reaction)
 
     async def append_message(self, msg: str):
-        await self._message.edit(self._message.message.content + '\n' + msg)
+        await self._message.edit(self._message.get_content() + '\n' + msg)
 
     async def edit_message(self, msg: str):
         await self._message.edit(msg)
@@ -199,6 +382,9 @@ class Adventure:
         self._event.set()
 
     async def end_chapter(self, lost: bool = False, skip: bool = False):
+        if self._idle_timer is not None:  # Waiting for the OK is not idle, a reward could be given twice
+            self._idle_timer.cancel()
+            self._idle_timer = None
         self.lost = lost
         await self._message.clear_reactions()
         if skip:
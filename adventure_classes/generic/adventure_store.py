@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Callable
+
+from db.database import PostgreSQL
+
+
+class AdventureStore(ABC):
+    # Adventure snapshots by message id, so they outlive the process
+    @abstractmethod
+    async def save(self, message_id: int, data: dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def load(self, message_id: int) -> Optional[dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def delete(self, message_id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def load_all(self) -> dict[int, dict[str, Any]]:
+        pass
+
+
+class FileAdventureStore(AdventureStore):
+    # One JSON file per adventure, for local runs (a dyno restart wipes its disk)
+    def __init__(self, directory: str):
+        self._directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+        # A single thread, so a save and a later delete of the same snapshot never swap
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(1, thread_name_prefix='adventure_store')
+
+    def _get_path(self, message_id: int) -> str:
+        return os.path.join(self._directory, f"{message_id}.json")
+
+    def _save(self, message_id: int, data: dict[str, Any]) -> None:
+        path: str = self._get_path(message_id)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(data, file, separators=(',', ':'))
+        os.replace(path + '.tmp', path)  # Never leaves half a snapshot
+
+    def _load(self, message_id: int) -> Optional[dict[str, Any]]:
+        try:
+            with open(self._get_path(message_id), encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def _delete(self, message_id: int) -> None:
+        try:
+            os.remove(self._get_path(message_id))
+        except FileNotFoundError:
+            pass
+
+    def _load_all(self) -> dict[int, dict[str, Any]]:
+        snapshots: dict[int, dict[str, Any]] = {}
+        for file_name in os.listdir(self._directory):
+            if file_name.endswith('.json'):
+                data: Optional[dict[str, Any]] = self._load(int(file_name[:-len('.json')]))
+                if data is not None:
+                    snapshots[int(file_name[:-len('.json')])] = data
+        return snapshots
+
+    async def _run(self, func: Callable, *args):
+        # File access off the event loop, as DatabaseAdventureStore does through db.aio
+        return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+    async def save(self, message_id: int, data: dict[str, Any]) -> None:
+        await self._run(self._save, message_id, data)
+
+    async def load(self, message_id: int) -> Optional[dict[str, Any]]:
+        return await self._run(self._load, message_id)
+
+    async def delete(self, message_id: int) -> None:
+        await self._run(self._delete, message_id)
+
+    async def load_all(self) -> dict[int, dict[str, Any]]:
+        return await self._run(self._load_all)
+
+
+class DatabaseAdventureStore(AdventureStore):
+    TABLE: str = 'adventures'
+
+    def __init__(self, db: PostgreSQL):
+        self._db: PostgreSQL = db
+
+    # Every access runs in a transaction of its own: snapshots are written from background tasks, which must not
+    # commit nor leave open a transaction on the shared default session. Raw statements need a forced commit
+
+    def _create_table(self) -> None:
+        with self._db.transaction():
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {DatabaseAdventureStore.TABLE} "
+                             f"(message_id BIGINT PRIMARY KEY, data TEXT NOT NULL)")
+            self._db.commit(True)
+
+    async def create_table(self) -> None:
+        await self._db.aio.run(self._create_table)
+
+    def _save(self, message_id: int, data: str) -> None:
+        with self._db.transaction():
+            self._db.execute(f"INSERT INTO {DatabaseAdventureStore.TABLE} (message_id, data) VALUES (%s, %s) "
+                             f"ON CONFLICT (message_id) DO UPDATE SET data = EXCLUDED.data", [message_id, data])
+            self._db.commit(True)
+
+    def _load(self, message_id: int) -> Optional[dict[str, Any]]:
+        with self._db.transaction():
+            return self._db.get_row_data(DatabaseAdventureStore.TABLE, {'message_id': message_id})
+
+    def _load_all(self) -> list[dict[str, Any]]:
+        with self._db.transaction():
+            self._db.execute(f"SELECT message_id, data FROM {DatabaseAdventureStore.TABLE}")
+            return self._db.get_cursor().fetchall()
+
+    def _delete(self, message_id: int) -> None:
+        with self._db.transaction():
+            self._db.delete_row(DatabaseAdventureStore.TABLE, {'message_id': message_id})
+
+    async def save(self, message_id: int, data: dict[str, Any]) -> None:
+        await self._db.aio.run(self._save, message_id, json.dumps(data, separators=(',', ':')))
+
+    async def load(self, message_id: int) -> Optional[dict[str, Any]]:
+        row: Optional[dict[str, Any]] = await self._db.aio.run(self._load, message_id)
+        return None if row is None else json.loads(row['data'])
+
+    async def delete(self, message_id: int) -> None:
+        await self._db.aio.run(self._delete, message_id)
+
+    async def load_all(self) -> dict[int, dict[str, Any]]:
+        rows: list[dict[str, Any]] = await self._db.aio.run(self._load_all)
+        return {row['message_id']: json.loads(row['data']) for row in rows}
+
+
+_STORE: Optional[AdventureStore] = None
+
+
+def set_store(store: Optional[AdventureStore]) -> None:
+    global _STORE
+    _STORE = store
+
+
+def get_store() -> Optional[AdventureStore]:
+    return _STORE
@@ -1,31 +1,32 @@
-import asyncio
 import typing
 
-from typing import Optional
+from typing import Optional, Any
 
 import utils
 from adventure_classes.generic.adventure import Adventure
-from adventure_classes.generic.battle.battle_action_data import BattleActionData
+from adventure_classes.generic.battle.battle_engine import BattleEngine
 from adventure_classes.generic.battle.battle_entity import BattleEntity
+from adventure_classes.generic.battle import battle_replay
 from adventure_classes.generic.battle.battle_group import BattleGroup, BattleGroupUserDelayed
 from adventure_classes.generic.chapter import Chapter
 from enemy_data import enemy_utils
 from enemy_data.bot_entity_builder import BotEntityBuilder
 from entities.ai.base_ai import BotAI
 from entities.bot_entity import BotEntity
+from entities.entity import Entity
 from enums.battle_emoji import BattleEmoji
 from enums.emoji import Emoji
 from enums.location import Location
+from helpers.scheduler import SCHEDULER
 from helpers.timer import WaitUntil
 from helpers.translate import tr
-from item_data.abilities import AbilityInstance
 
 if typing.TYPE_CHECKING:
     from user_data.user import User
 
 
 class BattleChapter(Chapter):
-    INCREASE_EVERY: typing.Final[int] = 8
+    INCREASE_EVERY: typing.Final[int] = BattleEngine.INCREASE_EVERY
     SINGLE_PLAYER_DELAY: int = 300
     MULTI_PLAYER_DELAY: int = 20
 
@@ -34,24 +35,40 @@ class BattleChapter(Chapter):
         super().__init__(icon)
         if pre_text is None:
             pre_text = []
+        self._engine: BattleEngine = BattleEngine(group_a, group_b)
         self._group_a: BattleGroup = group_a
         self._group_b: BattleGroup = group_b
         self._multiple_users: bool = (self._group_a.has_multiple_users() or self._group_b.has_multiple_users())
-        self._turn_a: bool = True
-        self._battle_log: list[str] = []
-        self._round: int = 0
-        self._round_offbeat: bool = False
-        self._available_targets: list[BattleEntity] = []
-        self._chosen_targets: dict[BattleEntity, BattleEntity] = {}
         self._pass_turn: Optional[WaitUntil] = None
-        self._acted: set[User] = set()
         self._pre_text: list[str] = pre_text
         self._late_clear: bool = False
         self._max_targets: int = 1
-        self._speed_balance: float = 0
-        self._dont_add_speed: bool = False
         self._is_boss: bool = is_boss
 
+    def get_engine(self) -> BattleEngine:
+        return self._engine
+
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        # Only adventure battles against bots, they start over when restored
+        if (type(self._group_a) is not BattleGroupUserDelayed) or self._group_b.has_users() or \
+                (self._engine.round > 0):
+            return None
+        enemies: list[dict[str, Any]] = []
+        for battle_entity in self._group_b.get_battle_entities():
+            entity: Entity = battle_entity.get_entity()
+            if not isinstance(entity, BotEntity):
+                return None
+            data: Optional[dict[str, Any]] = entity.to_dict()
+            if data is None:
+                return None
+            enemies.append(data)
+        return {'icon': self.icon.name, 'pre_text': self._pre_text, 'is_boss': self._is_boss, 'enemies': enemies}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'BattleChapter':
+        return BattleChapter(BattleGroupUserDelayed(), BattleGroup([BotEntity.from_dict(x) for x in data['enemies']]),
+                             icon=Emoji[data['icon']], pre_text=data['pre_text'], is_boss=data['is_boss'])
+
     def _recalculation_will_involve_first_time(self) -> bool:
         old_max_targets: int = self._max_targets
         if old_max_targets > 1:
@@ -81,38 +98,27 @@ class BattleChapter(Chapter):
             for num in range(old_max_targets, self._max_targets):
                 await self.get_adventure().add_reaction(Emoji.get_number(num + 1), self.choose_target)
 
-    def _get_mulitplier(self) -> int:
-        return (self._round // self.INCREASE_EVERY) + 1
-
     def _print_round(self) -> str:
-        mult: int = self._get_mulitplier()
+        mult: int = self._engine.get_multiplier()
         ret_txt: str
-        if self._round == 0:
+        if self._engine.round == 0:
             ret_txt = tr(self.get_lang(), 'BATTLE.LOADING', EMOJI_BATTLE=Emoji.BATTLE)
         elif mult == 1:
-            ret_txt = tr(self.get_lang(), 'BATTLE.ROUND', EMOJI_BATTLE=Emoji.BATTLE, round=self._round)
+            ret_txt = tr(self.get_lang(), 'BATTLE.ROUND', EMOJI_BATTLE=Emoji.BATTLE, round=self._engine.round)
         else:
-            ret_txt = tr(self.get_lang(), 'BATTLE.ROUND_DMG', EMOJI_BATTLE=Emoji.BATTLE, round=self._round,
+            ret_txt = tr(self.get_lang(), 'BATTLE.ROUND_DMG', EMOJI_BATTLE=Emoji.BATTLE, round=self._engine.round,
                          multiplier=mult)
         if self._multiple_users:
             ret_txt += f" {Emoji.CLOCK} {utils.print_time(self.get_lang(), BattleChapter.MULTI_PLAYER_DELAY)}"
         return ret_txt
 
-    def _get_current_team(self) -> BattleGroup:
-        return self._group_a if self._turn_a else self._group_b
-
-    def _get_opposing_team(self) -> BattleGroup:
-        return self._group_b if self._turn_a else self._group_a
-
-    def _is_finished(self) -> bool:
-        return self._group_b.get_alive_count() == 0 or self._group_a.get_alive_count() == 0
-
     async def update(self, final: bool = False):
-        current_team: BattleGroup = self._get_current_team()
-        other_team: BattleGroup = self._get_opposing_team()
+        engine: BattleEngine = self._engine
+        current_team: BattleGroup = engine.get_current_team()
+        other_team: BattleGroup = engine.get_opposing_team()
         self.clear_log()
         self.start_log()
-        if self._round < 2:
+        if engine.round < 2:
             if self._pre_text:
                 self.add_log('\n'.join([f"_{x}_" for x in self._pre_text]))
             if self._is_boss:
@@ -123,18 +129,18 @@ class BattleChapter(Chapter):
         for battle_entity in current_team.get_battle_entities():
             self.add_log(battle_entity.print())
 
-        if self._get_current_team().get_alive_user_count() > 0:
-            if len(self._available_targets) == 1:
+        if current_team.get_alive_user_count() > 0:
+            if len(engine.available_targets) == 1:
                 for battle_entity in other_team.get_battle_entities():
                     self.add_log(f"{battle_entity.print()}")
             else:
                 td: dict[BattleEntity, list[str]] = {}
-                for be1, be2 in self._chosen_targets.items():
+                for be1, be2 in engine.chosen_targets.items():
                     if be2 is not None:
                         td[be2] = td.get(be2, []) + [be1.get_name()]
                 for battle_entity in other_team.get_battle_entities():
-                    if battle_entity in self._available_targets:
-                        index: int = self._available_targets.index(battle_entity)
+                    if battle_entity in engine.available_targets:
+                        index: int = engine.available_targets.index(battle_entity)
                         sl: list[str] = td.get(battle_entity, [])
                         if sl and (not battle_entity.is_dead()):
                             self.add_log(f"{index + 1} | {battle_entity.print()} <- {', '.join(sl)}")
@@ -146,10 +152,10 @@ class BattleChapter(Chapter):
             for battle_entity in other_team.get_battle_entities():
                 self.add_log(f"{battle_entity.print()}")
 
-        self.add_log('\n'.join(self._battle_log))
+        self.add_log('\n'.join(engine.battle_log))
 
         if not final:
-            if self._speed_balance == 0:
+            if engine.speed_balance == 0:
                 if self._group_a.get_speed() > self._group_b.get_speed():
                     self.add_log(tr(self.get_lang(), 'BATTLE.SPEED_BONUS', EMOJI_SPD=Emoji.SPD,
                                     name=self._group_a.get_name(), value='0%'))
@@ -159,80 +165,40 @@ class BattleChapter(Chapter):
                 else:
                     self.add_log(tr(self.get_lang(), 'BATTLE.NO_SPEED_BONUS', EMOJI_SPD=Emoji.SPD))
             else:
-                if self._speed_balance > 0:
+                if engine.speed_balance > 0:
                     self.add_log(tr(self.get_lang(), 'BATTLE.SPEED_BONUS', EMOJI_SPD=Emoji.SPD,
-                                    name=self._group_a.get_name(), value=f"{self._speed_balance:.0%}"))
+                                    name=self._group_a.get_name(), value=f"{engine.speed_balance:.0%}"))
                 else:
                     self.add_log(tr(self.get_lang(), 'BATTLE.SPEED_BONUS', EMOJI_SPD=Emoji.SPD,
-                                    name=self._group_b.get_name(), value=f"{-self._speed_balance:.0%}"))
+                                    name=self._group_b.get_name(), value=f"{-engine.speed_balance:.0%}"))
 
         await self.send_log()
 
     async def execute_turn(self) -> None:
-        current_team: BattleGroup = self._get_current_team()
-
-        # Turn happenings
-        for battle_entity in current_team.get_battle_entities():
-            battle_entity.regen_ap()
-            # Step turn modifiers
-            battle_entity.step_turn_modifiers()
-            # Step abilities
-            instances: list[AbilityInstance] = []
-            for ability_instance in battle_entity.get_ability_instances():
-                ability_instance.duration_remaining -= 1
-                if ability_instance.duration_remaining > 0:
-                    turn: str = ability_instance.ability_holder.turn(self.get_lang(), battle_entity)
-                    if turn:
-                        self._battle_log.append(f"> {ability_instance.get_icon()} {turn}")
-                    instances.append(ability_instance)
-                else:
-                    end_ability: str = ability_instance.ability_holder.end(self.get_lang(), battle_entity)
-                    if end_ability:
-                        self._battle_log.append(end_ability)
-                battle_entity.set_ability_instances(instances)
-
-        if self._is_finished():
+        engine: BattleEngine = self._engine
+        if not engine.start_turn():
             return
 
-        other_team: BattleGroup = self._get_opposing_team()
-
-        self._available_targets: list[BattleEntity] = [battle_entity
-                                                       for battle_entity in other_team.get_battle_entities()
-                                                       if not battle_entity.is_dead()]
-
-        self._acted.clear()
-        self._chosen_targets.clear()
-
-        if current_team.get_alive_user_count() == 0:
+        if not engine.is_user_turn():
             return await self.execute_turn_bot()
 
         # User turn
-        for battle_entity in current_team.get_battle_entities():
-            target: BattleEntity = battle_entity.get_last_target()
-            if (target is not None) and (target in self._available_targets):
-                self._chosen_targets[battle_entity] = target
-            else:
-                battle_entity.set_last_target(None)
-
+        engine.restore_targets()
         if self._recalculation_will_involve_first_time():
-            self._chosen_targets.clear()
+            engine.clear_targets()
         await self.update()
         await self._recalculate_max_targets()
         self._late_clear = True
+        engine.auto_target()
 
-        if len(self._available_targets) == 1:
-            for battle_entity in current_team.get_battle_entities():
-                self._chosen_targets[battle_entity] = self._available_targets[0]
-                battle_entity.set_last_target(self._available_targets[0])
-
-        if current_team.has_multiple_users():
+        if engine.get_current_team().has_multiple_users():
             self._pass_turn = WaitUntil(BattleChapter.MULTI_PLAYER_DELAY)
         else:
             self._pass_turn = WaitUntil(BattleChapter.SINGLE_PLAYER_DELAY)
 
         await self._pass_turn.wait()
         if self._late_clear:
-            self._battle_log.clear()
+            engine.battle_log.clear()
             self._late_clear = False
         return await self.execute_turn_bot()
 
@@ -240,15 +206,10 @@ class BattleChapter(Chapter):
         if (self._pass_turn is None) or (not self._pass_turn.is_running()):
             return
 
-        current_team: BattleGroup = self._get_current_team()
-        battle_entity: Optional[BattleEntity] = current_team.find_user(user)
+        battle_entity: Optional[BattleEntity] = self._engine.get_current_team().find_user(user)
         if battle_entity is not None:
-            if (battle_entity not in self._acted) and (not battle_entity.is_dead()):
-                num: int = emoji.get_number_value() - 1
-                if num < len(self._available_targets):
-                    self._chosen_targets[battle_entity] = self._available_targets[num]
-                    battle_entity.set_last_target(self._available_targets[num])
-                    await self.update()
+            if self._engine.choose_target(battle_entity, emoji.get_number_value() - 1):
+                await self.update()
 
         await self.get_adventure().remove_reaction(user, emoji)
 
@@ -256,67 +217,43 @@ class BattleChapter(Chapter):
         if (self._pass_turn is None) or (not self._pass_turn.is_running()):
             return
 
-        current_team: BattleGroup = self._get_current_team()
-        battle_entity: Optional[BattleEntity] = current_team.find_user(user)
-        if battle_entity is not None:
-            if (battle_entity not in self._acted) and (not battle_entity.is_dead()):
-                target_battle_entity = self._chosen_targets.get(battle_entity)
-                if (target_battle_entity is not None) and (target_battle_entity.is_dead()):
+        engine: BattleEngine = self._engine
+        battle_entity: Optional[BattleEntity] = engine.get_current_team().find_user(user)
+        if (battle_entity is not None) and engine.can_act(battle_entity):
+            target_battle_entity = engine.chosen_targets.get(battle_entity)
+            if (target_battle_entity is not None) and (target_battle_entity.is_dead()):
+                return
+            msg: Optional[str] = engine.perform_user_action(battle_entity, BattleEmoji(emoji))
+            if msg is not None:
+                if self._late_clear:
+                    del engine.battle_log[:-1]  # The previous turn is cleared once something happens in this one
+                    self._late_clear = False
+                if engine.is_turn_done():
+                    # Finished
+                    self._pass_turn.cancel()
                     return
-                msg: Optional[str] = battle_entity.try_perform_action(
-                    BattleEmoji(emoji),
-                    BattleActionData(self.get_lang(), self._get_mulitplier(), target_battle_entity))
-                if msg is not None:
-                    self._acted.add(user)
-                    if self._late_clear:
-                        self._battle_log.clear()
-                        self._late_clear = False
-                    self._battle_log.append(msg)
-                    if self._is_finished() or len(self._acted) == current_team.get_alive_user_count():
-                        # Finished
-                        self._pass_turn.cancel()
-                        return
-                    await self.append(msg)
+                await self.append(msg)
 
         await self.get_adventure().remove_reaction(user, emoji)
 
     async def execute_turn_bot(self) -> None:
         if self._late_clear:
-            self._battle_log.clear()
+            self._engine.battle_log.clear()
             self._late_clear = False
-        if self._is_finished():
-            return
-        current_team: BattleGroup = self._get_current_team()
-        target_dict: dict[BattleEntity, int] = {
-            battle_entity: 0
-            for battle_entity in self._get_opposing_team().get_battle_entities()
-            if not battle_entity.is_dead()
-        }
-        for battle_entity in self._chosen_targets.values():
-            if not battle_entity.is_dead():
-                target_dict[battle_entity] += 1
-        for battle_entity in current_team.get_battle_entities():
-            if battle_entity.is_bot() and (not battle_entity.is_dead()):
-                bad: BattleActionData = BattleActionData(self.get_lang(), self._get_mulitplier(),
-                                                         targeted_entities=target_dict)
-                emoji: BattleEmoji = battle_entity.bot_decide(bad)
-                msg: Optional[str] = battle_entity.try_perform_action(emoji, bad)
-                if msg is not None:
-                    self._battle_log.append(msg)
-            if self._is_finished():
-                return
+        self._engine.execute_turn_bot()
 
     async def init(self) -> None:
-        self._group_a.load(self.get_adventure())
-        self._group_b.load(self.get_adventure())
-        self._turn_a = (self._group_a.get_speed() >= self._group_b.get_speed())
+        engine: BattleEngine = self._engine
+        engine.lang = self.get_lang()
+        engine.rng = self.get_adventure().rng.spawn()
+        engine.load(self.get_adventure())
         # Pretext
         if self._pre_text:
             self.start_log()
             ta: list[str] = [f"_{x}_" for x in self._pre_text]
             for i in range(len(self._pre_text)):
                 await self.send_log('\n'.join([ta[i]]))
-                await asyncio.sleep(2)
+                await SCHEDULER.sleep(2)
         # Add reactions
         await self.update()
         abilities: int = 0
@@ -335,56 +272,32 @@ class BattleChapter(Chapter):
             await self.get_adventure().add_reaction(BattleEmoji.WAIT.value, self.execute_action)
         await self._recalculate_max_targets()
         # Loop
-        self._round = 1
+        engine.round = 1
         while True:
-            if (not self._round_offbeat) and self._battle_log and \
+            if (not engine.round_offbeat) and engine.battle_log and \
                     (self._group_a.get_alive_user_count() + self._group_b.get_alive_user_count() == 0):
                 await self.update()
-                await asyncio.sleep(3)
-                self._battle_log.clear()
+                await SCHEDULER.sleep(3)
+                engine.battle_log.clear()
             await self.execute_turn()
-            if self._is_finished():
+            if engine.is_finished():
                 break
-            speed_diff: float = (self._group_a.get_speed() - self._group_b.get_speed())
-            if self._dont_add_speed:
-                self._dont_add_speed = False
-            else:
-                self._speed_balance += speed_diff * 0.5
-            if self._turn_a and self._speed_balance >= 1:
-                self._speed_balance -= 1
-                self._dont_add_speed = True
-            elif not self._turn_a and self._speed_balance <= -1:
-                self._speed_balance += 1
-                self._dont_add_speed = True
-            else:
-                if self._round_offbeat:
-                    self._round_offbeat = False
-                    self._round += 1
-                else:
-                    self._round_offbeat = True
-                self._turn_a = not self._turn_a
+            engine.end_turn()
         # End
-        if self._group_a.get_alive_count() == 0:
-            winner = self._group_b
-            loser = self._group_a
-        else:
-            winner = self._group_a
-            loser = self._group_b
+        battle_replay.record(engine.get_replay())
+        winner: BattleGroup = engine.get_winner()
+        winner_name: str = engine.get_current_team().get_name()
         if winner.has_users():
-            money_won: int = 0
-            for battle_entity in loser.get_battle_entities():
-                money_won += battle_entity.get_money_value()
-            self._battle_log.append(f"**{Emoji.TROPHY} "
-                                    f"{tr(self.get_lang(), 'BATTLE.WIN', name=self._get_current_team().get_name())}** "
-                                    f"(+{utils.print_money(self.get_lang(), money_won)})")
+            money_won: int = engine.get_money_won()
+            engine.battle_log.append(f"**{Emoji.TROPHY} {tr(self.get_lang(), 'BATTLE.WIN', name=winner_name)}** "
+                                     f"(+{utils.print_money(self.get_lang(), money_won)})")
             distribute: int = round(float(money_won) / len(self.get_adventure().get_users()))
             for user in self.get_adventure().get_users():
                 user.add_money(distribute)
             await self.update(final=True)
             await self.end()
         else:
-            self._battle_log.append(f"**{Emoji.TROPHY} "
-                                    f"{tr(self.get_lang(), 'BATTLE.WIN', name=self._get_current_team().get_name())}**")
+            engine.battle_log.append(f"**{Emoji.TROPHY} {tr(self.get_lang(), 'BATTLE.WIN', name=winner_name)}**")
             await self.update(final=True)
             await self.end(lost=True)
 
@@ -392,7 +305,7 @@ class BattleChapter(Chapter):
 # Get random enemy
 def rnd(adventure: Adventure, location: Location, pool: str = '', bot_ai: Optional[BotAI] = None) -> BotEntity:
     last_id: Optional[int] = adventure.saved_data.get('_battle_last_id')
-    beb: BotEntityBuilder = enemy_utils.get_random_enemy(location, pool, last_id)
+    beb: BotEntityBuilder = enemy_utils.get_random_enemy(location, pool, last_id, adventure.rng)
     adventure.saved_data['_battle_last_id'] = beb.enemy_id
     return beb.instance(bot_ai)
 
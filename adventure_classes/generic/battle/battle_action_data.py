@@ -1,8 +1,10 @@
+import random
 import typing
 from typing import Optional
 
 from autoslot import Slots
 
+from helpers.seeded_random import get_random
 from item_data.abilities import AbilityContainer
 
 if typing.TYPE_CHECKING:
@@ -14,9 +16,11 @@ class BattleActionData(Slots):
                  lang: str,
                  damage_multiplier: int,
                  target_entity: Optional['BattleEntity'] = None,
-                 targeted_entities: Optional[dict['BattleEntity', int]] = None):
+                 targeted_entities: Optional[dict['BattleEntity', int]] = None,
+                 rng: Optional[random.Random] = None):
         self.lang: str = lang
         self.damage_multiplier: int = damage_multiplier
         self.target_entity: Optional['BattleEntity'] = target_entity
         self.targeted_entities: Optional[dict['BattleEntity', int]] = targeted_entities
         self.override_ability: Optional[AbilityContainer] = None
+        self.rng: random.Random = get_random(rng)  # The stream of the battle
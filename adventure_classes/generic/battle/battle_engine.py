@@ -0,0 +1,277 @@
+import typing
+from typing import Optional, Callable, Any
+
+from adventure_classes.generic.battle.battle_action_data import BattleActionData
+from adventure_classes.generic.battle.battle_entity import BattleEntity
+from adventure_classes.generic.battle.battle_group import BattleGroup
+from entities.bot_entity import BotEntity
+from enums.battle_emoji import BattleEmoji
+from helpers.seeded_random import SeededRandom
+from item_data.abilities import AbilityInstance
+
+if typing.TYPE_CHECKING:
+    from adventure_classes.generic.adventure import Adventure
+
+# Picks the action of a user entity, it may choose a target through the engine first
+UserDecision = Callable[['BattleEngine', BattleEntity], BattleEmoji]
+
+
+def attack_first_target(engine: 'BattleEngine', battle_entity: BattleEntity) -> BattleEmoji:
+    if engine.chosen_targets.get(battle_entity) is None:
+        engine.choose_target(battle_entity, 0)
+    return BattleEmoji.ATTACK
+
+
+class BattleEngine:
+    # Combat rules without any messaging nor waiting, BattleChapter drives it from Discord
+    INCREASE_EVERY: typing.Final[int] = 8
+
+    def __init__(self, group_a: BattleGroup, group_b: BattleGroup, lang: str = 'en',
+                 rng: Optional[SeededRandom] = None, record: bool = True):
+        self.group_a: BattleGroup = group_a
+        self.group_b: BattleGroup = group_b
+        self.lang: str = lang
+        # Every roll of the battle, untouched until load so its seed replays it
+        self.rng: SeededRandom = SeededRandom() if rng is None else rng
+        # Replay log: entities as loaded and every step taken since, see battle_replay
+        self.record: bool = record
+        self.entities: Optional[list[list[Any]]] = None
+        self.steps: list[list[Any]] = []
+        self.turn_a: bool = True
+        self.round: int = 0
+        self.round_offbeat: bool = False
+        self.speed_balance: float = 0
+        self._dont_add_speed: bool = False
+        self.battle_log: list[str] = []
+        self.available_targets: list[BattleEntity] = []
+        self.chosen_targets: dict[BattleEntity, BattleEntity] = {}
+        self.acted: set[BattleEntity] = set()
+
+    def load(self, adventure: Optional['Adventure'] = None) -> None:
+        self.group_a.load(adventure)
+        self.group_b.load(adventure)
+        self.turn_a = (self.group_a.get_speed() >= self.group_b.get_speed())
+        if self.record:
+            self.entities = []
+            for group in [self.group_a, self.group_b]:
+                for battle_entity in group.get_battle_entities():
+                    self.entities.append(self._entity_to_list(battle_entity))
+
+    def _entity_to_list(self, battle_entity: BattleEntity) -> list[Any]:
+        # [group index, is user, name, state, bot ai or None]
+        ai: Optional[dict[str, Any]] = None
+        entity = battle_entity.get_entity()
+        if isinstance(entity, BotEntity):
+            ai = entity.get_ai().to_dict()
+        return [0 if battle_entity.get_group() == self.group_a else 1, battle_entity.is_user(),
+                battle_entity.get_name(), entity.get_state(), ai]
+
+    def _log(self, *step: Any) -> None:
+        if self.record:
+            self.steps.append(list(step))
+
+    def _get_ref(self, battle_entity: BattleEntity) -> tuple[int, int]:
+        group: BattleGroup = battle_entity.get_group()
+        return 0 if group == self.group_a else 1, group.get_battle_entities().index(battle_entity)
+
+    def get_replay(self) -> Optional[dict[str, Any]]:
+        # Enough to play the battle again headless, None if a bot can't be saved
+        if (self.entities is None) or any((not entity[1]) and (entity[4] is None) for entity in self.entities):
+            return None
+        return {'seed': self.rng.initial_seed, 'lang': self.lang, 'entities': self.entities, 'steps': self.steps,
+                'result': self.get_result()}
+
+    def get_result(self) -> list[Any]:
+        # Compared by replays: round, turn, speed and the health of everyone
+        return [self.round, self.turn_a, self.speed_balance,
+                [[battle_entity.get_hp() for battle_entity in group.get_battle_entities()]
+                 for group in [self.group_a, self.group_b]]]
+
+    def get_multiplier(self) -> int:
+        return (self.round // BattleEngine.INCREASE_EVERY) + 1
+
+    def get_current_team(self) -> BattleGroup:
+        return self.group_a if self.turn_a else self.group_b
+
+    def get_opposing_team(self) -> BattleGroup:
+        return self.group_b if self.turn_a else self.group_a
+
+    def is_finished(self) -> bool:
+        return self.group_b.get_alive_count() == 0 or self.group_a.get_alive_count() == 0
+
+    def start_turn(self) -> bool:
+        # Regenerates and steps effects of the current team, False if that finished the battle
+        self._log('s')
+        current_team: BattleGroup = self.get_current_team()
+        for battle_entity in current_team.get_battle_entities():
+            battle_entity.regen_ap()
+            battle_entity.step_turn_modifiers()
+            instances: list[AbilityInstance] = []
+            for ability_instance in battle_entity.get_ability_instances():
+                ability_instance.duration_remaining -= 1
+                if ability_instance.duration_remaining > 0:
+                    turn: str = ability_instance.ability_holder.turn(self.lang, battle_entity)
+                    if turn:
+                        self.battle_log.append(f"> {ability_instance.get_icon()} {turn}")
+                    instances.append(ability_instance)
+                else:
+                    end_ability: str = ability_instance.ability_holder.end(self.lang, battle_entity)
+                    if end_ability:
+                        self.battle_log.append(end_ability)
+                battle_entity.set_ability_instances(instances)
+
+        if self.is_finished():
+            return False
+
+        self.available_targets = [battle_entity
+                                  for battle_entity in self.get_opposing_team().get_battle_entities()
+                                  if not battle_entity.is_dead()]
+        self.acted.clear()
+        self.chosen_targets.clear()
+        return True
+
+    def is_user_turn(self) -> bool:
+        return self.get_current_team().get_alive_user_count() > 0
+
+    def restore_targets(self) -> None:
+        # Users keep attacking their last target while it is available
+        self._log('r')
+        for battle_entity in self.get_current_team().get_battle_entities():
+            target: BattleEntity = battle_entity.get_last_target()
+            if (target is not None) and (target in self.available_targets):
+                self.chosen_targets[battle_entity] = target
+            else:
+                battle_entity.set_last_target(None)
+
+    def clear_targets(self) -> None:
+        self._log('c')
+        self.chosen_targets.clear()
+
+    def auto_target(self) -> None:
+        self._log('u')
+        if len(self.available_targets) == 1:
+            for battle_entity in self.get_current_team().get_battle_entities():
+                self.chosen_targets[battle_entity] = self.available_targets[0]
+                battle_entity.set_last_target(self.available_targets[0])
+
+    def can_act(self, battle_entity: BattleEntity) -> bool:
+        return (battle_entity.get_group() == self.get_current_team()) and (battle_entity not in self.acted) \
+            and (not battle_entity.is_dead())
+
+    def choose_target(self, battle_entity: BattleEntity, index: int) -> bool:
+        self._log('t', *self._get_ref(battle_entity), index)
+        if (not self.can_act(battle_entity)) or (index >= len(self.available_targets)):
+            return False
+        self.chosen_targets[battle_entity] = self.available_targets[index]
+        battle_entity.set_last_target(self.available_targets[index])
+        return True
+
+    def perform_user_action(self, battle_entity: BattleEntity, battle_emoji: BattleEmoji) -> Optional[str]:
+        if not self.can_act(battle_entity):
+            return None
+        target_battle_entity: Optional[BattleEntity] = self.chosen_targets.get(battle_entity)
+        if (target_battle_entity is not None) and target_battle_entity.is_dead():
+            return None
+        modifiers: int = len(battle_entity.get_entity().get_modifiers())
+        msg: Optional[str] = battle_entity.try_perform_action(
+            battle_emoji, BattleActionData(self.lang, self.get_multiplier(), target_battle_entity, rng=self.rng))
+        if (battle_emoji == BattleEmoji.POTION) and (msg is not None):
+            # Potions come from the inventory, replays get what they gave instead
+            self._log('p', *self._get_ref(battle_entity),
+                      [modifier.to_dict() for modifier in battle_entity.get_entity().get_modifiers()[modifiers:]])
+        else:
+            self._log('a', *self._get_ref(battle_entity), battle_emoji.name)
+        if msg is not None:
+            self.acted.add(battle_entity)
+            self.battle_log.append(msg)
+        return msg
+
+    def is_turn_done(self) -> bool:
+        return self.is_finished() or len(self.acted) == self.get_current_team().get_alive_user_count()
+
+    def execute_turn_bot(self) -> None:
+        self._log('b')
+        if self.is_finished():
+            return
+        current_team: BattleGroup = self.get_current_team()
+        target_dict: dict[BattleEntity, int] = {
+            battle_entity: 0
+            for battle_entity in self.get_opposing_team().get_battle_entities()
+            if not battle_entity.is_dead()
+        }
+        for battle_entity in self.chosen_targets.values():
+            if not battle_entity.is_dead():
+                target_dict[battle_entity] += 1
+        for battle_entity in current_team.get_battle_entities():
+            if battle_entity.is_bot() and (not battle_entity.is_dead()):
+                bad: BattleActionData = BattleActionData(self.lang, self.get_multiplier(),
+                                                         targeted_entities=target_dict, rng=self.rng)
+                emoji: BattleEmoji = battle_entity.bot_decide(bad)
+                msg: Optional[str] = battle_entity.try_perform_action(emoji, bad)
+                if msg is not None:
+                    self.battle_log.append(msg)
+            if self.is_finished():
+                return
+
+    def end_turn(self) -> None:
+        # The faster team may play twice in a row, otherwise the turn passes
+        self._log('e')
+        speed_diff: float = (self.group_a.get_speed() - self.group_b.get_speed())
+        if self._dont_add_speed:
+            self._dont_add_speed = False
+        else:
+            self.speed_balance += speed_diff * 0.5
+        if self.turn_a and self.speed_balance >= 1:
+            self.speed_balance -= 1
+            self._dont_add_speed = True
+        elif not self.turn_a and self.speed_balance <= -1:
+            self.speed_balance += 1
+            self._dont_add_speed = True
+        else:
+            if self.round_offbeat:
+                self.round_offbeat = False
+                self.round += 1
+            else:
+                self.round_offbeat = True
+            self.turn_a = not self.turn_a
+
+    def get_winner(self) -> Optional[BattleGroup]:
+        if not self.is_finished():
+            return None
+        return self.group_b if self.group_a.get_alive_count() == 0 else self.group_a
+
+    def get_loser(self) -> Optional[BattleGroup]:
+        if not self.is_finished():
+            return None
+        return self.group_a if self.group_a.get_alive_count() == 0 else self.group_b
+
+    def get_money_won(self) -> int:
+        money_won: int = 0
+        for battle_entity in self.get_loser().get_battle_entities():
+            money_won += battle_entity.get_money_value()
+        return money_won
+
+    def execute_turn(self, decide: UserDecision) -> None:
+        if not self.start_turn():
+            return
+        if self.is_user_turn():
+            self.restore_targets()
+            self.auto_target()
+            for battle_entity in self.get_current_team().get_battle_entities():
+                if self.is_turn_done():
+                    break
+                if battle_entity.is_user() and self.can_act(battle_entity):
+                    self.perform_user_action(battle_entity, decide(self, battle_entity))
+        self.execute_turn_bot()
+
+    def run(self, decide: UserDecision = attack_first_target, max_turns: int = 10000) -> Optional[BattleGroup]:
+        # Plays the whole battle right away, the winner is None if it did not end in time
+        self.round = 1
+        turns: int = 0
+        while (not self.is_finished()) and (turns < max_turns):
+            self.execute_turn(decide)
+            if self.is_finished():
+                break
+            self.end_turn()
+            turns += 1
+        return self.get_winner()
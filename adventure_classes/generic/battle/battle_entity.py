@@ -1,4 +1,3 @@
-import random
 import typing
 from typing import Optional
 
@@ -39,12 +38,17 @@ class BattleEntity:
         self._temp_modifiers: list[StatModifier] = []
         self._ability_instances: list[AbilityInstance] = []
         self._last_target: Optional['BattleEntity'] = None
+        # Effective stats and their values by Stat.get_index(), rebuilt when modifiers or equipment change
+        self._stats: Optional[list[int]] = None
+        self._stat_values: list[typing.Any] = []
+        self._stats_version: int = -1
 
     def get_group(self) -> 'BattleGroup':
         return self._group
 
     def add_temp_modifier(self, modifier: StatModifier) -> None:
         self._temp_modifiers.append(modifier)
+        self._stats = None
 
     def step_turn_modifiers(self) -> None:
         modifiers: list[StatModifier] = []
@@ -55,6 +59,8 @@ class BattleEntity:
                 modifier.duration -= 1
                 if modifier.duration > 0:
                     modifiers.append(modifier)
+        if len(modifiers) != len(self._temp_modifiers):
+            self._stats = None
         self._temp_modifiers = modifiers
         self._entity.step_turn_modifiers()
 
@@ -79,6 +85,9 @@ class BattleEntity:
     def get_name(self) -> str:
         return self._entity.get_name()
 
+    def get_entity(self) -> Entity:
+        return self._entity
+
     def _has_stat(self, stat: Stat) -> bool:
         if stat.get_value(self.get_stat(stat)) > 0:
             return True
@@ -99,7 +108,8 @@ class BattleEntity:
         self._entity.set_persistent_value(stat, value)
 
     def get_stat_value(self, stat: Stat) -> typing.Any:
-        return stat.get_value(self.get_stat(stat))
+        self._get_stats()
+        return self._stat_values[stat.get_index()]
 
     def get_hp(self) -> int:
         return self._get_persistent_value(Stat.HP)
@@ -147,12 +157,22 @@ class BattleEntity:
 
         return pow(stat_sum / 2.8, 1.6)
 
+    def _get_stats(self) -> list[int]:
+        if (self._stats is None) or (self._stats_version != self._entity.get_stats_version()):
+            numbers: list[float] = [self._entity.get_stat(stat) for stat in Stat]
+            for modifier in self._temp_modifiers + self._entity.get_modifiers():
+                index: int = modifier.stat.get_index()
+                numbers[index] = modifier.apply(numbers[index])
+            self._stats = [max(0, round(number)) for number in numbers]
+            self._stat_values = [stat.get_value(self._stats[stat.get_index()]) for stat in Stat]
+            self._stats_version = self._entity.get_stats_version()
+        return self._stats
+
+    def get_stat_array(self) -> list[int]:
+        return list(self._get_stats())
+
     def get_stat(self, stat: Stat) -> int:
-        number: float = self._entity.get_stat(stat)
-        for modifier in self._temp_modifiers + self._entity.get_modifiers():
-            if modifier.stat == stat:
-                number = modifier.apply(number)
-        return max(0, round(number))
+        return self._get_stats()[stat.get_index()]
 
     def _print_battle_stat(self, stat: Stat) -> str:
         stuff: list[str] = []
@@ -187,26 +207,27 @@ class BattleEntity:
         target: BattleEntity = data.target_entity
         ar: AttackResult = AttackResult()
         # Evasion
-        if random.random() < target.get_stat_value(Stat.EVA):
+        if data.rng.random() < target.get_stat_value(Stat.EVA):
             ar.eva = True
             return ar
         # Damage
         dealt: float = battle_utils.calculate_damage(self.get_stat_value(Stat.STR), target.get_stat_value(Stat.DEF))
         # Crit
-        if random.random() < self.get_stat_value(Stat.CRIT):
+        if data.rng.random() < self.get_stat_value(Stat.CRIT):
             dealt *= 2
             ar.crit = True
         int_dealt: int = max(round(dealt), 1)
         int_dealt *= data.damage_multiplier
         # Vamp
-        if random.random() < self.get_stat_value(Stat.VAMP):
+        if data.rng.random() < self.get_stat_value(Stat.VAMP):
             ar.vamp = True
             self.heal(min(self.get_stat_value(Stat.HP), int_dealt))
         target.damage(int_dealt)
         if not target.is_dead():
             # Counter
-            if (not ignore_cont) and random.random() < target.get_stat_value(Stat.CONT):
-                ar.counter = target.attack(BattleActionData(data.lang, data.damage_multiplier, self), True).damage
+            if (not ignore_cont) and data.rng.random() < target.get_stat_value(Stat.CONT):
+                ar.counter = target.attack(BattleActionData(data.lang, data.damage_multiplier, self, rng=data.rng),
+                                          True).damage
         ar.damage = int_dealt
 
         return ar
@@ -247,7 +268,7 @@ class BattleEntity:
                     msg.append(f"> {Emoji.CONT} {temp}")
                 return '\n'.join(msg)
         if battle_emoji == BattleEmoji.POTION:
-            if self.is_user():
+            if self._user is not None:
                 potion: Optional[Potion] = self._user.inventory.get_potion()
                 if potion is not None:
                     self._user.inventory.use_potion()
@@ -0,0 +1,104 @@
+# Plays a battle again from BattleEngine.get_replay without Discord nor users: same seed, same steps, same result
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Optional
+
+from adventure_classes.generic.battle.battle_engine import BattleEngine
+from adventure_classes.generic.battle.battle_entity import BattleEntity
+from adventure_classes.generic.battle.battle_group import BattleGroup
+from entities.bot_entity import BotEntity, ai_from_dict
+from entities.entity import Entity
+from entities.user_entity import UserEntity
+from enums.battle_emoji import BattleEmoji
+from helpers.dictref import DictRef
+from helpers.seeded_random import SeededRandom
+from item_data.stat_modifier import StatModifier
+
+# Replays of the last battles, BATTLE_REPLAY_PATH also appends them to a JSON lines file
+RECENT: deque = deque(maxlen=int(os.environ.get('BATTLE_REPLAY_KEEP', 50)))
+# A single thread appends to the file, in order and away from the event loop
+_WRITER: ThreadPoolExecutor = ThreadPoolExecutor(1, thread_name_prefix='battle_replay')
+
+
+def _append(path: str, line: str) -> None:
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(line)
+
+
+def record(replay: Optional[dict[str, Any]]) -> Optional[Future]:
+    if replay is None:
+        return None
+    RECENT.append(replay)
+    path: Optional[str] = os.environ.get('BATTLE_REPLAY_PATH')
+    if path:
+        return _WRITER.submit(_append, path, json.dumps(replay, separators=(',', ':')) + '\n')
+    return None
+
+
+def load_file(path: str) -> list[dict[str, Any]]:
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def _create_entity(data: list[Any]) -> Entity:
+    _, is_user, name, state, ai = data
+    entity: Entity
+    if is_user:
+        entity = UserEntity(DictRef({'name': name}, 'name'))
+    else:
+        entity = BotEntity(name, {}, ai_from_dict(ai))
+    entity.set_state(state)
+    return entity
+
+
+def create_engine(replay: dict[str, Any]) -> BattleEngine:
+    # The engine right after load, groups already hold the loaded entities
+    groups: list[BattleGroup] = [BattleGroup(), BattleGroup()]
+    for data in replay['entities']:
+        groups[data[0]].add_entity(_create_entity(data))
+    engine: BattleEngine = BattleEngine(groups[0], groups[1], replay['lang'], SeededRandom(replay['seed']),
+                                        record=False)
+    engine.turn_a = (groups[0].get_speed() >= groups[1].get_speed())
+    engine.round = 1
+    return engine
+
+
+def _get_battle_entity(engine: BattleEngine, group: int, index: int) -> BattleEntity:
+    return (engine.group_a if group == 0 else engine.group_b).get_battle_entities()[index]
+
+
+def play(replay: dict[str, Any]) -> BattleEngine:
+    engine: BattleEngine = create_engine(replay)
+    for step in replay['steps']:
+        kind: str = step[0]
+        if kind == 's':
+            engine.start_turn()
+        elif kind == 'r':
+            engine.restore_targets()
+        elif kind == 'c':
+            engine.clear_targets()
+        elif kind == 'u':
+            engine.auto_target()
+        elif kind == 't':
+            engine.choose_target(_get_battle_entity(engine, step[1], step[2]), step[3])
+        elif kind == 'a':
+            engine.perform_user_action(_get_battle_entity(engine, step[1], step[2]), BattleEmoji[step[3]])
+        elif kind == 'p':
+            battle_entity: BattleEntity = _get_battle_entity(engine, step[1], step[2])
+            for modifier in step[3]:
+                battle_entity.get_entity().add_modifier(StatModifier.from_dict(modifier))
+            engine.acted.add(battle_entity)
+        elif kind == 'b':
+            engine.execute_turn_bot()
+        elif kind == 'e':
+            engine.end_turn()
+        else:
+            raise ValueError(f"Unknown replay step {step}")
+    return engine
+
+
+def verify(replay: dict[str, Any]) -> bool:
+    # Compared as JSON, like the recorded result
+    return json.loads(json.dumps(play(replay).get_result())) == replay['result']
@@ -1,3 +1,5 @@
+from typing import Optional, Any
+
 from adventure_classes.generic.chapter import Chapter
 from item_data.stat_modifier import StatModifier
 from enums.emoji import Emoji
@@ -19,6 +21,19 @@ class BonusChapter(Chapter):
     def add_persistent(self, stat: Stat, value: int):
         self._persistent_bonus.append((stat, value))
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {'text': self._text, 'bonus': [modifier.to_dict() for modifier in self._bonus],
+                'persistent': [[stat.get_abv(), value] for stat, value in self._persistent_bonus]}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'BonusChapter':
+        chapter: BonusChapter = BonusChapter(data['text'])
+        for modifier in data['bonus']:
+            chapter.add_modifier(StatModifier.from_dict(modifier))
+        for abv, value in data['persistent']:
+            chapter.add_persistent(Stat.get_by_abv(abv), value)
+        return chapter
+
     async def init(self):
         self.add_log(self._text)
         users: list[User] = self.get_adventure().get_users()
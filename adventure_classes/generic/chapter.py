@@ -1,9 +1,9 @@
-import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Any
 
 from adventure_classes.generic.adventure import Adventure
 from enums.emoji import Emoji
+from helpers.scheduler import SCHEDULER
 
 
 class Chapter(ABC):
@@ -34,7 +34,7 @@ class Chapter(ABC):
 
     async def append_and_wait(self, msg: str, time: int) -> None:
         await self.append(msg)
-        await asyncio.sleep(time)
+        await SCHEDULER.sleep(time)
 
     def _get_log(self) -> list[str]:
         return self._log[len(self._log) - 1]
@@ -68,6 +68,14 @@ class Chapter(ABC):
     async def init(self) -> None:
         pass
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        # Enough to play the chapter again from its start, None if it can't be restored
+        return None
+
+    def can_evict(self) -> bool:
+        # The adventure may leave memory while this chapter waits for a reaction
+        return False
+
     async def end(self, lost: bool = False, skip: bool = False) -> None:
         self.clear_log()
         await self._adventure.end_chapter(lost, skip)
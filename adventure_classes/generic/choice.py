@@ -1,7 +1,8 @@
-from typing import Callable
+from typing import Callable, Optional, Any
 
 from adventure_classes.generic.chapter import Chapter
 from enums.emoji import Emoji
+from helpers.func_ref import to_reference, from_reference
 
 
 class ChoiceChapter(Chapter):
@@ -23,6 +24,25 @@ class ChoiceChapter(Chapter):
         for choice in self.choices:
             await self.get_adventure().add_reaction(choice[0], self.choose_path(choice[2]))
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        choices: list[list[Any]] = []
+        for icon, desc, result in self.choices:
+            reference: Optional[list[Any]] = to_reference(result)
+            if reference is None:
+                return None
+            choices.append([icon.name, desc, reference])
+        return {'icon': self.icon.name, 'msg': self.msg, 'skip': self.skip, 'choices': choices}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'ChoiceChapter':
+        chapter: ChoiceChapter = ChoiceChapter(Emoji[data['icon']], data['msg'], data['skip'])
+        for icon, desc, reference in data['choices']:
+            chapter.add_choice(Emoji[icon], desc, from_reference(reference))
+        return chapter
+
+    def can_evict(self) -> bool:
+        return True
+
     def choose_path(self, action: Callable):
         async def end_path():
             action(self.get_adventure())
@@ -1,13 +1,12 @@
-import random
 from abc import abstractmethod
-from typing import Optional
+from typing import Optional, Any
 
 import utils
 from adventure_classes.generic.chapter import Chapter
 from enums.emoji import Emoji
 from guild_data.shop import Shop
 from helpers.translate import tr
-from item_data.item_classes import Item
+from item_data.item_classes import Item, Equipment
 from user_data.inventory import SlotType
 from user_data.user import User
 
@@ -28,12 +27,28 @@ class RewardChapter(Chapter):
     async def reward(self):
         pass
 
+    def can_evict(self) -> bool:
+        return True
+
 
 class ItemRewardChapter(RewardChapter):
     def __init__(self, item: Item):
         super().__init__()
         self.item: Item = item
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        if not isinstance(self.item, Equipment):
+            return None
+        return {'desc_id': self.item.get_desc().id, 'item': self.item.to_dict(), 'text': self._override_str}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'ItemRewardChapter':
+        item: Equipment = Equipment()
+        item.from_dict(data['desc_id'], data['item'])
+        chapter: ItemRewardChapter = ItemRewardChapter(item)
+        chapter._override_str = data['text']
+        return chapter
+
     async def reward(self):
         users: list[User] = [user
                              for user in self.get_adventure().get_users()
@@ -41,7 +56,7 @@ class ItemRewardChapter(RewardChapter):
         if not users:
             users = self.get_adventure().get_users()
 
-        user: User = random.choice(users)
+        user: User = self.get_adventure().rng.choice(users)
 
         slot: Optional[str] = user.inventory.get_empty_slot(SlotType.ITEMS)
         if slot is not None:
@@ -68,8 +83,17 @@ class MoneyRewardChapter(RewardChapter):
         super().__init__()
         self.money = money
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {'money': self.money, 'text': self._override_str}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'MoneyRewardChapter':
+        chapter: MoneyRewardChapter = MoneyRewardChapter(data['money'])
+        chapter._override_str = data['text']
+        return chapter
+
     async def reward(self):
-        user: User = random.choice(self.get_adventure().get_users())
+        user: User = self.get_adventure().rng.choice(self.get_adventure().get_users())
 
         if len(self.get_adventure().get_users()) == 1:
             await self.send_log(tr(self.get_lang(), 'REWARD.MONEY_YOU', money=utils.print_money(self.get_lang(),
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# Offline benchmark of command handlers against MemoryDatabase, run from the repository root:
+#   python -m benchmark.bench --users 2000 --guilds 50 --ops 5000
+#   python -m benchmark.bench --round-trip-ms 1 --concurrency 8 --save baseline.json
+#   python -m benchmark.bench --compare baseline.json  (exits with 1 on a regression)
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Optional, Any, Callable
+
+from adventure_classes.game_adventures import adventure_provider  # noqa, loads helpers.command as main.py does
+from benchmark.population import Population, populate
+from commands import bet, crate, equipment, shop, simple, upgrade
+from db.instrumentation import CommandQueryStats
+from db.memory_database import MemoryDatabase
+from game_data import data_loader
+from helpers import storage
+from helpers.command import CommandHandler, MockSlashContext, get_command_name
+from helpers.metrics import CommandStats
+from helpers.seeded_random import SeededRandom
+
+# Flags each command is registered with in main.py
+_FLAGS: dict[str, bool] = {'ignore_battle': False, 'guild_only': False, 'ignore_all': False, 'guild_lock': False,
+                           'slow': False, 'defer_hidden': False}
+
+
+class Workload:
+    def __init__(self, name: str, func: Callable, get_args: Callable[[random.Random], tuple], **flags: bool):
+        self.name: str = name
+        self.func: Callable = func
+        self.get_args: Callable[[random.Random], tuple] = get_args  # Arguments of one call
+        self.flags: dict[str, bool] = {**_FLAGS, **flags}
+
+
+WORKLOADS: dict[str, Workload] = {x.name: x for x in [
+    Workload('inv', simple.inv, lambda rng: (), ignore_battle=True),
+    Workload('shop_buy', shop.buy, lambda rng: (rng.choice(['1', '2', '3', '4', 'p']),),
+             guild_only=True, guild_lock=True),
+    Workload('equip_best', equipment.equip_best, lambda rng: ()),
+    Workload('upgrade', upgrade.upgrade, lambda rng: (rng.choice(['money', 'bank', 'garden', 'inventory']),)),
+    Workload('crate_place', crate.place, lambda rng: (rng.randint(10, 100),), guild_only=True, guild_lock=True),
+    Workload('crate_take', crate.take, lambda rng: (), guild_only=True, guild_lock=True),
+    Workload('bet', bet.add, lambda rng: (rng.randint(50, 200),), guild_only=True, guild_lock=True),
+]}
+
+
+class CommandReport:
+    def __init__(self):
+        self.latencies: list[float] = []  # Milliseconds
+        self.statements: float = 0
+        self.errors: int = 0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0
+        latencies: list[float] = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            'ops': len(self.latencies),
+            # Throughput of this command alone, from its own latencies (not its share of the mix)
+            'ops_s': len(self.latencies) / max(sum(self.latencies) / 1000, 1e-9),
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'statements': self.statements,
+            'errors': self.errors
+        }
+
+
+async def run_benchmark(db: MemoryDatabase, population: Population, ops: int, workloads: list[Workload],
+                        concurrency: int = 1, seed: Optional[int] = None) -> dict[str, Any]:
+    rng: SeededRandom = SeededRandom(seed)
+    handler: CommandHandler = CommandHandler(db, None, defer_budget=0)  # noqa, no slash commands are registered
+    storage.clear_cache()
+    await storage.preload_guilds(db, population.guild_ids)  # As on_ready does
+    db.instrumentation.reset()
+    reports: dict[str, CommandReport] = {workload.name: CommandReport() for workload in workloads}
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(workload: Workload, user_id: int, args: tuple) -> None:
+        async with semaphore:
+            ctx: MockSlashContext = MockSlashContext(user_id, population.user_guilds[user_id], echo=False)
+            started: float = time.perf_counter()
+            await handler.call(ctx, workload.func, *args, **workload.flags)
+            reports[workload.name].latencies.append((time.perf_counter() - started) * 1000)
+
+    calls: list = []
+    for _ in range(ops):
+        workload: Workload = rng.choice(workloads)
+        calls.append(run_one(workload, rng.choice(population.user_ids), workload.get_args(rng)))
+    started: float = time.perf_counter()
+    await asyncio.gather(*calls)
+    elapsed: float = time.perf_counter() - started
+
+    for workload in workloads:
+        # Handlers shared by several workloads (none for now) would be counted together
+        name: str = get_command_name(workload.func)
+        query_stats: Optional[CommandQueryStats] = db.instrumentation.get_command_stats(name)
+        if query_stats is not None:
+            reports[workload.name].statements = query_stats.statements.get_mean()
+        command_stats: Optional[CommandStats] = handler.metrics.get_command_stats(name)
+        if command_stats is not None:
+            reports[workload.name].errors = command_stats.errors
+    return {
+        'ops': ops,
+        'ops_s': ops / max(elapsed, 1e-9),
+        'commands': {name: report.to_dict() for name, report in reports.items()}
+    }
+
+
+def print_report(report: dict[str, Any]) -> str:
+    lines = [f"{report['ops']} commands at {report['ops_s']:.0f} ops/s"]
+    for name, stats in report['commands'].items():
+        lines.append(f"  {name:<12} n={stats['ops']:<6} {stats['ops_s']:>8.0f} ops/s  p50={stats['p50_ms']:.2f}ms  "
+                     f"p99={stats['p99_ms']:.2f}ms  statements={stats['statements']:.2f}  errors={stats['errors']}")
+    return '\n'.join(lines)
+
+
+# Latency changes below this are noise, whatever the tolerance
+_LATENCY_FLOOR_MS: float = 0.05
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    # Statement counts barely depend on the machine, latency and throughput do, so only big changes count
+    regressions: list[str] = []
+    for name, old in baseline['commands'].items():
+        new: Optional[dict[str, float]] = report['commands'].get(name)
+        if new is None:
+            continue
+        if new['statements'] > old['statements'] * (1 + tolerance) + 0.01:
+            regressions.append(f"{name}: {old['statements']:.2f} -> {new['statements']:.2f} statements")
+        if new['errors'] > old['errors']:
+            regressions.append(f"{name}: {old['errors']} -> {new['errors']} errors")
+        for key in ('p50_ms', 'p99_ms'):
+            if new[key] > old[key] * (1 + tolerance) + _LATENCY_FLOOR_MS:
+                regressions.append(f"{name}: {old[key]:.2f} -> {new[key]:.2f} {key}")
+        if new['ops_s'] < old['ops_s'] * (1 - tolerance):
+            regressions.append(f"{name}: {old['ops_s']:.0f} -> {new['ops_s']:.0f} ops/s")
+    if report['ops_s'] < baseline['ops_s'] * (1 - tolerance):
+        regressions.append(f"throughput: {baseline['ops_s']:.0f} -> {report['ops_s']:.0f} ops/s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark command handlers without Discord nor PostgreSQL")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--guilds', type=int, default=20)
+    parser.add_argument('--items', type=int, default=3, help="Inventory items per user, besides equipment")
+    parser.add_argument('--ops', type=int, default=5000, help="Commands to run")
+    parser.add_argument('--concurrency', type=int, default=1, help="Commands in flight")
+    parser.add_argument('--round-trip-ms', type=float, default=0, help="Simulated latency of every statement")
+    parser.add_argument('--commands', nargs='*', help=f"Any of {list(WORKLOADS)}")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help="Write the report as JSON")
+    parser.add_argument('--compare', help="Fail if worse than this saved report")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    data_loader.load()
+    db: MemoryDatabase = MemoryDatabase(round_trip_ms=args.round_trip_ms)
+    population: Population = populate(db, args.users, args.guilds, items=args.items, seed=args.seed)
+    workloads: list[Workload] = [WORKLOADS[x] for x in (args.commands or WORKLOADS)]
+    report: dict[str, Any] = asyncio.run(run_benchmark(db, population, args.ops, workloads, args.concurrency,
+                                                       args.seed))
+    print(print_report(report))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions: list[str] = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import random
+from typing import Optional
+
+import utils
+from db.database import PostgreSQL
+from enums.item_rarity import ItemRarity
+from enums.item_type import EquipmentType
+from enums.location import Location
+from enums.user_class import UserClass
+from helpers.seeded_random import SeededRandom
+from item_data import item_loader
+from item_data.item_classes import RandomEquipmentBuilder, Item, Potion
+from user_data.inventory import Inventory
+
+FIRST_USER_ID: int = 10 ** 6
+FIRST_GUILD_ID: int = 10 ** 9
+
+
+class Population:
+    def __init__(self, user_ids: list[int], guild_ids: list[int], user_guilds: dict[int, Optional[int]]):
+        self.user_ids: list[int] = user_ids
+        self.guild_ids: list[int] = guild_ids
+        self.user_guilds: dict[int, Optional[int]] = user_guilds  # Guild every user plays in, if any
+
+
+def _get_builder() -> RandomEquipmentBuilder:
+    return RandomEquipmentBuilder(0).set_location(Location.ANYWHERE).choose_rarity(
+        [ItemRarity.COMMON, ItemRarity.UNCOMMON, ItemRarity.RARE], [60, 30, 10])
+
+
+def _build_inventory(rng: random.Random, items: int, equipped: int, potions: int) -> list[tuple[Item, str]]:
+    inventory: list[tuple[Item, str]] = [(_get_builder().build(rng), str(slot)) for slot in range(1, items + 1)]
+    equipment_types: list[EquipmentType] = list(item_loader.get_equipment_dict()[0][Location.ANYWHERE])
+    for equipment_type in rng.sample(equipment_types, min(equipped, len(equipment_types))):
+        inventory.append((_get_builder().set_type(equipment_type).build(rng),
+                          Inventory.EQUIPMENT_TYPE_TO_CHAR[equipment_type]))
+    for slot in range(1, potions + 1):
+        potion: Potion = Potion()
+        potion.build(rng.choice(item_loader.get_potion_list()).id)
+        inventory.append((potion, f"p{slot}"))
+    return inventory
+
+
+def _create_user_items(db: PostgreSQL, user_items: list[tuple[int, Item, str]]) -> None:
+    # One statement, like create_guild_items
+    db.insert_owned_items('user_items', 'user_id', [(user_id, {
+        'data': item.to_dict(),
+        'desc_id': item.get_desc().id
+    }, slot) for user_id, item, slot in user_items])
+
+
+def create_population(db: PostgreSQL, population: Population, items: int = 3, equipped: int = 2, potions: int = 1,
+                      seed: Optional[int] = None) -> None:
+    # Rows of the given players and guilds, with money, upgrades and some equipment
+    rng: SeededRandom = SeededRandom(seed)
+    now: int = utils.now()
+    for index, user_id in enumerate(population.user_ids):
+        db.insert_data('users', {
+            'id': user_id,
+            'last_name': f"User{index}",
+            'money': rng.randint(200, 1000),
+            'bank_time': now,
+            'tokens_time': now,
+            'tutorial': -1,
+            'class': rng.choice(list(UserClass)).get_id()
+        })
+        db.insert_data('user_upgrades', {'user_id': user_id, 'bank': rng.randint(1, 3), 'garden': rng.randint(1, 3)})
+    user_items: list[tuple[int, Item, str]] = []
+    for user_id in population.user_ids:
+        user_items += [(user_id, item, slot) for item, slot in _build_inventory(rng, items, equipped, potions)]
+    for i in range(0, len(user_items), 1000):
+        _create_user_items(db, user_items[i:i + 1000])
+    members: dict[int, list[int]] = {guild_id: [] for guild_id in population.guild_ids}
+    for user_id, guild_id in population.user_guilds.items():
+        if guild_id is not None:
+            members[guild_id].append(user_id)
+    for guild_id in population.guild_ids:
+        db.insert_data('guilds', {'id': guild_id, 'user_ids': members[guild_id]})
+    db.commit()
+
+
+def populate(db: PostgreSQL, users: int, guilds: int, items: int = 3, equipped: int = 2, potions: int = 1,
+             seed: Optional[int] = None) -> Population:
+    # Synthetic players spread over guilds
+    rng: SeededRandom = SeededRandom(seed)
+    user_ids: list[int] = [FIRST_USER_ID + i for i in range(users)]
+    guild_ids: list[int] = [FIRST_GUILD_ID + i for i in range(guilds)]
+    population: Population = Population(user_ids, guild_ids, {user_id: rng.choice(guild_ids) for user_id in user_ids})
+    create_population(db, population, items, equipped, potions, rng.getrandbits(63))
+    return population
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# Replays a trace recorded with TRAFFIC_TRACE_PATH against MemoryDatabase, run from the repository root:
+#   python -m benchmark.replay traffic.jsonl             (at the recorded pace)
+#   python -m benchmark.replay traffic.jsonl --speed 10  (ten times faster, 0 for as fast as possible)
+import argparse
+import asyncio
+import importlib
+import json
+import time
+from typing import Optional, Any, Callable
+
+from adventure_classes.game_adventures import adventure_provider  # noqa, loads helpers.command as main.py does
+from benchmark.bench import CommandReport
+from benchmark.population import Population, create_population
+from db.instrumentation import CommandQueryStats
+from db.memory_database import MemoryDatabase
+from game_data import data_loader
+from helpers import storage, reaction_handler
+from helpers.command import CommandHandler, MockSlashContext, MockAuthor, MockMessage, MOCK_API_CALLS
+from helpers.metrics import CommandStats
+from helpers.traffic import load_trace
+
+# Longest wait of a reaction for the message it refers to, in replay seconds
+_MESSAGE_TIMEOUT: float = 5
+
+
+def get_population(events: list[dict[str, Any]]) -> Population:
+    # Everyone in the trace, in the last guild they used a command from
+    user_guilds: dict[int, Optional[int]] = {}
+    for event in events:
+        user_guilds.setdefault(event['user'], None)
+        if event['type'] != 'command':
+            continue
+        if event['guild'] is not None:
+            user_guilds[event['user']] = event['guild']
+        for value in [*event['args'], *event['options'].values()]:
+            if isinstance(value, dict):
+                user_guilds.setdefault(value['id'], None)  # Mentioned members
+    guild_ids: list[int] = sorted({x for x in user_guilds.values() if x is not None})
+    return Population(list(user_guilds), guild_ids, user_guilds)
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MockAuthor(value['id'], f"User{value['id'] % 10000}")
+    return value
+
+
+def _get_command(name: str) -> Callable:
+    module, func = name.split('.')
+    return getattr(importlib.import_module(f"commands.{module}"), func)
+
+
+class ReplayContext(MockSlashContext):
+    # Links every message sent to the trace id reactions refer to it by
+    def __init__(self, event: dict[str, Any], messages: dict[int, asyncio.Future]):
+        super().__init__(event['user'], event['guild'], echo=False)
+        self._trace_ids: list[int] = event['messages']
+        self._messages: dict[int, asyncio.Future] = messages
+        self._sent: int = 0
+
+    async def send(self, msg: str, hidden: bool = False):  # noqa
+        message: Optional[MockMessage] = await super().send(msg, hidden)
+        if (message is not None) and (self._sent < len(self._trace_ids)):
+            self._messages[self._trace_ids[self._sent]].set_result(message)
+            self._sent += 1
+        return message
+
+    def finish(self) -> None:
+        # Messages the replayed command did not send, their reactions are skipped
+        for trace_id in self._trace_ids[self._sent:]:
+            self._messages[trace_id].set_result(None)
+
+
+class MockReaction:
+    def __init__(self, message: MockMessage, emoji: str):
+        self.message: MockMessage = message
+        self.emoji: str = emoji
+
+
+async def run_replay(db: MemoryDatabase, events: list[dict[str, Any]], population: Population,
+                     speed: float = 1) -> dict[str, Any]:
+    handler: CommandHandler = CommandHandler(db, None)  # noqa, no slash commands are registered
+    storage.clear_cache()
+    await storage.preload_guilds(db, population.guild_ids)  # As on_ready does
+    db.instrumentation.reset()
+    MOCK_API_CALLS.clear()
+    loop = asyncio.get_running_loop()
+    messages: dict[int, asyncio.Future] = {trace_id: loop.create_future()
+                                           for event in events if event['type'] == 'command'
+                                           for trace_id in event['messages']}
+    reports: dict[str, CommandReport] = {}
+    lags: list[float] = []  # Milliseconds behind the scaled trace time
+    skipped: list[int] = [0]
+
+    async def run_command(event: dict[str, Any]) -> None:
+        ctx: ReplayContext = ReplayContext(event, messages)
+        started: float = time.perf_counter()
+        try:
+            await handler.call(ctx, _get_command(event['name']), *[_decode(x) for x in event['args']],
+                               **{k: _decode(v) for k, v in event['options'].items()}, **event['flags'])
+        finally:
+            ctx.finish()
+        reports.setdefault(event['name'], CommandReport()).latencies.append((time.perf_counter() - started) * 1000)
+
+    async def run_reaction(event: dict[str, Any]) -> None:
+        future: Optional[asyncio.Future] = messages.get(event['message'])
+        message: Optional[MockMessage] = None
+        if (future is not None) and (event['emoji'] is not None):
+            try:
+                message = await asyncio.wait_for(asyncio.shield(future), _MESSAGE_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        if message is None:
+            skipped[0] += 1  # Sent before the recording started, or not sent by the replay
+            return
+        member: MockAuthor = MockAuthor(event['user'], f"User{event['user'] % 10000}")
+        started: float = time.perf_counter()
+        await reaction_handler.on_reaction_add(db, MockReaction(message, event['emoji']), member)  # noqa
+        reports.setdefault('reaction', CommandReport()).latencies.append((time.perf_counter() - started) * 1000)
+
+    tasks: list[asyncio.Future] = []
+    first: float = events[0]['t'] if events else 0
+    started: float = time.perf_counter()
+    for event in events:
+        if speed > 0:
+            target: float = (event['t'] - first) / speed
+            delay: float = target - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lags.append(max(0.0, time.perf_counter() - started - target) * 1000)
+        if event['type'] == 'command':
+            tasks.append(asyncio.ensure_future(run_command(event)))
+        else:
+            tasks.append(asyncio.ensure_future(run_reaction(event)))
+    await asyncio.gather(*tasks)
+    elapsed: float = time.perf_counter() - started
+
+    for name, report in reports.items():
+        query_stats: Optional[CommandQueryStats] = db.instrumentation.get_command_stats(name)
+        if query_stats is not None:
+            report.statements = query_stats.statements.get_mean()
+        command_stats: Optional[CommandStats] = handler.metrics.get_command_stats(name)
+        if command_stats is not None:
+            report.errors = command_stats.errors
+    lags.sort()
+    duration: float = events[-1]['t'] - first if events else 0
+    return {
+        'events': len(events),
+        'skipped': skipped[0],
+        'trace_events_s': len(events) / max(duration, 1e-9),
+        'events_s': len(events) / max(elapsed, 1e-9),
+        'lag_p50_ms': lags[len(lags) // 2] if lags else 0,
+        'lag_max_ms': lags[-1] if lags else 0,
+        'api_calls': dict(MOCK_API_CALLS),
+        'commands': {name: report.to_dict() for name, report in sorted(reports.items())}
+    }
+
+
+def print_report(report: dict[str, Any]) -> str:
+    lines = [f"{report['events']} events ({report['skipped']} skipped) at {report['events_s']:.1f}/s, "
+             f"recorded at {report['trace_events_s']:.1f}/s",
+             f"  schedule lag p50={report['lag_p50_ms']:.2f}ms max={report['lag_max_ms']:.2f}ms",
+             f"  discord calls {report['api_calls']}"]
+    for name, stats in report['commands'].items():
+        lines.append(f"  {name:<24} n={stats['ops']:<6} p50={stats['p50_ms']:.2f}ms  p99={stats['p99_ms']:.2f}ms  "
+                     f"statements={stats['statements']:.2f}  errors={stats['errors']}")
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded traffic without Discord nor PostgreSQL")
+    parser.add_argument('path', help="Trace written through TRAFFIC_TRACE_PATH")
+    parser.add_argument('--speed', type=float, default=1, help="Speed-up factor, 0 to replay as fast as possible")
+    parser.add_argument('--items', type=int, default=3, help="Inventory items per user, besides equipment")
+    parser.add_argument('--round-trip-ms', type=float, default=0, help="Simulated latency of every statement")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help="Write the report as JSON")
+    args = parser.parse_args()
+
+    data_loader.load()
+    events: list[dict[str, Any]] = load_trace(args.path)
+    db: MemoryDatabase = MemoryDatabase(round_trip_ms=args.round_trip_ms)
+    population: Population = get_population(events)
+    create_population(db, population, items=args.items, seed=args.seed)
+    report: dict[str, Any] = asyncio.run(run_replay(db, events, population, args.speed))
+    print(print_report(report))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -45,7 +45,7 @@ async def add(cmd: Command, money: int):
         if response:
             await cmd.error(tr(cmd.lang, 'BET.INCREASE', money=utils.print_money(cmd.lang, response)))
         else:
-            await cmd.error(tr(cmd.lang, 'BET.LACK', money=utils.print_money(cmd.lang, response)))
+            await cmd.error(tr(cmd.lang, 'BET.LACK', money=utils.print_money(cmd.lang, money)))
 
 
 async def check(cmd: Command):
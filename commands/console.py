@@ -2,9 +2,15 @@ import asyncio
 import os
 from concurrent.futures.thread import ThreadPoolExecutor
 from functools import partial
+from typing import Optional
 
 from db.database import PostgreSQL
 from helpers import storage
+from helpers.keyed_lock import USER_LOCKS, GUILD_LOCKS
+from helpers.message_editor import EDIT_STATS
+from helpers.reaction_queue import REACTION_STATS
+from helpers.scheduler import SCHEDULER
+from helpers.metrics import CommandMetrics
 
 
 def clear(db: PostgreSQL):
@@ -15,13 +21,35 @@ def clear(db: PostgreSQL):
     print("Data cleared")
 
 
+def print_stats(db: PostgreSQL, metrics: Optional[CommandMetrics]):
+    if metrics is not None:
+        print(metrics.print())
+    if db.instrumentation is not None:
+        print(db.instrumentation.print())
+    print(f"Pool: {db.get_pool_stats()}")
+    print(f"User cache: {storage.USER_CACHE.get_stats()}")
+    print(f"Guild cache: {storage.GUILD_CACHE.get_stats()}")
+    print(USER_LOCKS.print())
+    print(GUILD_LOCKS.print())
+    print(EDIT_STATS.print())
+    print(REACTION_STATS.print())
+    print(SCHEDULER.print())
+
+
+def print_slow(db: PostgreSQL):
+    if db.instrumentation is None:
+        print("Instrumentation is disabled")
+    else:
+        print(db.instrumentation.print_slow())
+
+
 def reload():
     print("Reloading bot...")
     os.system("python main.py")
     exit()
 
 
-async def execute(db: PostgreSQL):
+async def execute(db: PostgreSQL, metrics: Optional[CommandMetrics] = None):
     rie = partial(asyncio.get_event_loop().run_in_executor, ThreadPoolExecutor(1))
     while True:
         print("> ", end='')
@@ -35,6 +63,10 @@ async def execute(db: PostgreSQL):
                 reload()
             elif args[0].startswith('cl'):
                 clear(db)
+            elif args[0].startswith('stat'):
+                print_stats(db, metrics)
+            elif args[0].startswith('slow'):
+                print_slow(db)
             elif len(args[0]) > 0:
                 print("Unknown command")
         except Exception as e:
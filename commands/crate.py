@@ -40,4 +40,4 @@ async def take(cmd: Command):
             await cmd.send(tr(cmd.lang, 'CRATE.TAKE', name=cmd.user.get_name(), money=utils.print_money(cmd.lang, took),
                               EMOJI_BOX=Emoji.BOX))
         else:
-            await cmd.error(tr(cmd.lang, 'CRATE.EMPTY'))
+            await cmd.error(tr(cmd.lang, 'CRATE.EMPTY', EMOJI_BOX=Emoji.BOX))
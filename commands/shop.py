@@ -6,7 +6,7 @@ from user_data.inventory import SlotType
 
 
 async def check(cmd: Command):
-    await cmd.send(cmd.guild.shop.print())
+    await cmd.send(await cmd.db.aio.run(cmd.guild.shop.print))  # May restock
 
 
 def get_slot_type(slot: str):
@@ -21,7 +21,7 @@ def get_slot_type(slot: str):
 
 
 async def buy(cmd: Command, slot: str) -> None:
-    result: ActionResult = cmd.guild.shop.buy(cmd.user, slot)
+    result: ActionResult = await cmd.db.aio.run(cmd.guild.shop.buy, cmd.user, slot)
     if result.success:
         ts: list[str] = [tr(cmd.lang, 'SHOP.PURCHASE', EMOJI_PURCHASE=Emoji.PURCHASE, name=cmd.user.get_name(),
                             item=result.item)]
@@ -30,7 +30,7 @@ async def buy(cmd: Command, slot: str) -> None:
         await cmd.send('\n'.join(ts))
     else:
         if hasattr(result, 'reload_shop'):
-            ts = [tr(cmd.lang, 'SHOP.CHANGE'), cmd.guild.shop.print()]
+            ts = [tr(cmd.lang, 'SHOP.CHANGE'), await cmd.db.aio.run(cmd.guild.shop.print)]
             await cmd.send('\n'.join(ts))
         else:
             await cmd.error(result.tr(cmd.lang))
@@ -26,7 +26,7 @@ async def check(cmd: Command, user: discord.Member):
         await cmd.send("._.")
         return
 
-    user_m = storage.get_user(cmd.db, user.id, False)
+    user_m = await cmd.db.aio.run(storage.get_user, cmd.db, user.id, False)
     if not user_m:
         await cmd.send_hidden(tr(cmd.lang, 'COMMAND.CHECK.NO_INTERACTION'))
         return
@@ -42,7 +42,7 @@ async def duel(cmd: Command, user: discord.Member):
         ])
         return
 
-    user_m = storage.get_user(cmd.db, user.id, False)
+    user_m = await cmd.db.aio.run(storage.get_user, cmd.db, user.id, False)
     user_m.member = user
     if not user_m:
         await cmd.send_hidden(tr(cmd.lang, 'COMMAND.CHECK.NO_INTERACTION'))
@@ -66,7 +66,7 @@ async def transfer(cmd: Command):
 
 
 async def leaderboard(cmd: Command):
-    await cmd.send(cmd.guild.print_leaderboard())
+    await cmd.send(await cmd.db.aio.run(cmd.guild.print_leaderboard))
 
 
 async def stats(cmd: Command):
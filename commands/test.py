@@ -67,7 +67,7 @@ async def gimme_all(cmd: Command, tier: str = '0', location: str = 'Anywhere', r
 
 
 async def relshop(cmd: Command):
-    cmd.guild.reload_shop()
+    await cmd.db.aio.run(cmd.guild.reload_shop)
     await cmd.send_hidden(f"{Emoji.SHOP}")
 
 
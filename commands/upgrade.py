@@ -77,7 +77,7 @@ async def upgrade(cmd: Command, key: str):
         cost = upgrade_link.get_cost()
         if cmd.user.remove_money(cost):
             upgrade_link.level_up()
-            await cmd.send_hidden(tr(cmd.lang, 'UPGRADE.EXECUTE', EMOJI_ICON=upgrade_link.get_icon_str(),
+            await cmd.send_hidden(tr(cmd.lang, 'UPGRADE.EXECUTE', EMOJI_ICON=upgrade_link.get_icon(),
                                      name=upgrade_link.get_name(), level=upgrade_link.get_level()))
         else:
             await cmd.error(tr(cmd.lang, 'UPGRADE.LACK', money=cost))
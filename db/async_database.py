@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+import typing
+from concurrent.futures.thread import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Any, Callable
+
+if typing.TYPE_CHECKING:
+    from db.database import PostgreSQL, Join, SQLDict, SQLColumns, SQLResult
+
+
+class AsyncJoin:
+    def __init__(self, aio: 'AsyncPostgreSQL', join: 'Join'):
+        self._aio = aio
+        self._join = join
+
+    def join(self, table_name: str, field_matches: Optional[list[tuple[str, str]]] = None,
+             value_matches: Optional[list[tuple[str, Any]]] = None) -> 'AsyncJoin':
+        self._join.join(table_name, field_matches, value_matches)
+        return self
+
+    async def execute(self) -> 'SQLResult':
+        return await self._aio.run(self._join.execute)
+
+
+class AsyncPostgreSQL:
+    def __init__(self, db: 'PostgreSQL', max_workers: int):
+        self._db = db
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='db')
+
+    def _call(self, func: Callable, args: tuple, kwargs: dict):
+        # Runs inside the caller's context, so the command's session is used
+        with self._db._session().lock:  # noqa
+            return func(*args, **kwargs)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        # Any blocking database work can be moved off the event loop through here
+        context: contextvars.Context = contextvars.copy_context()
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, partial(context.run, self._call, func, args, kwargs))
+
+    async def get_row_data(self, table_name: str, match_columns: 'SQLDict', columns: 'SQLColumns' = None,
+                           limit: int = 1) -> 'SQLResult':
+        return await self.run(self._db.get_row_data, table_name, match_columns, columns, limit)
+
+    def start_join(self, table_from: str, match_columns: 'SQLDict', columns: 'SQLColumns' = None,
+                   limit: Optional[int] = 1) -> AsyncJoin:
+        return AsyncJoin(self, self._db.start_join(table_from, match_columns, columns, limit))
+
+    async def insert_data(self, table_name: str, column_data: 'SQLDict', returns: bool = False,
+                          return_columns: 'SQLColumns' = None) -> Optional['SQLDict']:
+        return await self.run(self._db.insert_data, table_name, column_data, returns, return_columns)
+
+    async def update_data(self, table_name: str, match_columns: 'SQLDict', column_data: 'SQLDict') -> None:
+        await self.run(self._db.update_data, table_name, match_columns, column_data)
+
+    async def delete_row(self, table_name: str, match_columns: 'SQLDict', limit: int = 1) -> None:
+        await self.run(self._db.delete_row, table_name, match_columns, limit)
+
+    async def execute(self, query: str, params: Optional[list] = None) -> None:
+        await self.run(self._db.execute, query, params)
+
+    async def rollback(self, force: bool = False) -> None:
+        await self.run(self._db.rollback, force)
+
+    async def commit(self, force: bool = False) -> None:
+        await self.run(self._db.commit, force)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -1,10 +1,23 @@
-import json
+import asyncio
+import hashlib
 import os
 import string
-from typing import Optional, Any, Union
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional, Any, Union, Iterable
+
+from autoslot import Slots
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor, Json, execute_batch
+
+from db.async_database import AsyncPostgreSQL
+from db.instrumentation import QueryInstrumentation
+from db.pool import ConnectionPool
+from db.write_behind import WriteBehind
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
 
 SQLColumns = Optional[list[str]]
 SQLDict = dict[str, Any]
@@ -24,42 +37,249 @@ def get_column_names(columns: SQLColumns, as_name: str = ''):
             return '*'
 
 
-def convert_sql_value(value):
-    t = type(value)
-    if t == str:
-        return "'" + value + "'"
-    if t == dict:
-        return "'" + json.dumps(value) + "'"
-    if t == list:
-        return "'{" + ', '.join([str(x) for x in value]) + "}'"
-    return str(value)
+def adapt_value(value):
+    if type(value) == dict:
+        return Json(value)
+    return value
 
 
-def get_where_info(match_columns: dict, as_name: str = ''):
+def get_where_info(match_columns: Iterable[str], as_name: str = ''):
     if as_name:
-        return ' AND '.join(map(lambda x: f"{as_name}.{x[0]}" + " = " + convert_sql_value(x[1]),
-                                match_columns.items()))
+        return ' AND '.join([f"{as_name}.{x} = %s" for x in match_columns])
     else:
-        return ' AND '.join(map(lambda x: x[0] + " = " + convert_sql_value(x[1]),
-                                match_columns.items()))
+        return ' AND '.join([f"{x} = %s" for x in match_columns])
 
 
-class PostgreSQL:
+def _columns_key(columns: SQLColumns) -> Optional[tuple[str, ...]]:
+    return tuple(columns) if columns else None
+
+
+class Statement(Slots):
+    def __init__(self, text: str):
+        self.text: str = text
+        self.name: str = 'st_' + hashlib.sha1(text.encode()).hexdigest()[:16]
+        self.uses: int = 0
+        parts: list[str] = text.split('%s')
+        self.prepare_text: str = f"PREPARE {self.name} AS " + ''.join(
+            [part + (f"${i + 1}" if i < len(parts) - 1 else '') for i, part in enumerate(parts)])
+        params: str = ', '.join(['%s'] * (len(parts) - 1))
+        self.execute_text: str = f"EXECUTE {self.name} ({params})" if params else f"EXECUTE {self.name}"
+
+
+# Statements are built once per table/column shape
+@lru_cache(maxsize=256)
+def _select_statement(table_name: str, columns: Optional[tuple[str, ...]], match_keys: tuple[str, ...],
+                      limit: Optional[int]) -> Statement:
+    text: str = f"SELECT {get_column_names(columns)} FROM {table_name} WHERE {get_where_info(match_keys)}"
+    if (limit is not None) and (limit != 1):
+        text += f" LIMIT {limit}"
+    return Statement(text)
+
+
+@lru_cache(maxsize=256)
+def _insert_statement(table_name: str, keys: tuple[str, ...], returns: bool,
+                      return_columns: Optional[tuple[str, ...]]) -> Statement:
+    text: str = f"INSERT INTO {table_name} ({', '.join(keys)}) VALUES ({', '.join(['%s'] * len(keys))})"
+    if returns:
+        text += f" RETURNING {get_column_names(return_columns)}"
+    return Statement(text)
+
+
+@lru_cache(maxsize=256)
+def _update_statement(table_name: str, set_keys: tuple[str, ...], match_keys: tuple[str, ...]) -> Statement:
+    set_values: str = ', '.join([f"{x} = %s" for x in set_keys])
+    return Statement(f"UPDATE {table_name} SET {set_values} WHERE {get_where_info(match_keys)}")
+
+
+@lru_cache(maxsize=256)
+def _delete_statement(table_name: str, match_keys: tuple[str, ...], limit: Optional[int]) -> Statement:
+    where_info: str = get_where_info(match_keys)
+    if limit is None:
+        return Statement(f"DELETE FROM {table_name} WHERE {where_info}")
+    column_match: str = ', '.join(match_keys)
+    return Statement(f"DELETE FROM {table_name} WHERE ({column_match}) IN "
+                     f"(SELECT {column_match} FROM {table_name} WHERE {where_info} LIMIT {limit})")
+
+
+@lru_cache(maxsize=256)
+def _select_in_statement(table_name: str, columns: Optional[tuple[str, ...]], column: str) -> Statement:
+    return Statement(f"SELECT {get_column_names(columns)} FROM {table_name} WHERE {column} = ANY(%s)")
+
+
+@lru_cache(maxsize=256)
+def _insert_many_statement(table_name: str, keys: tuple[str, ...], amount: int, returns: bool,
+                           return_columns: Optional[tuple[str, ...]]) -> Statement:
+    values: str = ', '.join(['(' + ', '.join(['%s'] * len(keys)) + ')'] * amount)
+    text: str = f"INSERT INTO {table_name} ({', '.join(keys)}) VALUES {values}"
+    if returns:
+        text += f" RETURNING {get_column_names(return_columns)}"
+    return Statement(text)
+
+
+@lru_cache(maxsize=256)
+def _insert_owned_items_statement(link_table: str, owner_column: str, amount: int) -> Statement:
+    # Ids are drawn before both inserts and returned with their owner and slot, as RETURNING keeps no order
+    values: str = ', '.join(['(%s::jsonb, %s::int, %s::bigint, %s::text)'] * amount)
+    return Statement(f"WITH N AS (SELECT nextval(pg_get_serial_sequence('items', 'id')) AS id, V.* "
+                     f"FROM (VALUES {values}) AS V(data, desc_id, owner_id, slot)), "
+                     f"I AS (INSERT INTO items (id, data, desc_id) SELECT id, data, desc_id FROM N) "
+                     f"INSERT INTO {link_table} ({owner_column}, slot, item_id) SELECT owner_id, slot, id FROM N "
+                     f"RETURNING {owner_column} AS owner_id, slot, item_id")
+
+
+@lru_cache(maxsize=256)
+def _delete_in_statement(table_name: str, column: str) -> Statement:
+    return Statement(f"DELETE FROM {table_name} WHERE {column} = ANY(%s)")
+
+
+@lru_cache(maxsize=256)
+def _owned_items_statement(link_table: str, owner_column: str) -> Statement:
+    return Statement(f"SELECT L.{owner_column} AS owner_id, L.slot, L.item_id, T.desc_id, T.data "
+                     f"FROM {link_table} L INNER JOIN items T ON T.id = L.item_id "
+                     f"WHERE L.{owner_column} = ANY(%s)")
+
+
+# Users with their upgrades and items (with item data), for one or many users
+_USER_BUNDLE_STATEMENT: Statement = Statement(
+    "SELECT U.*, row_to_json(P) AS _upgrades, "
+    "COALESCE((SELECT json_agg(json_build_object('slot', I.slot, 'item_id', I.item_id, "
+    "'desc_id', T.desc_id, 'data', T.data)) "
+    "FROM user_items I INNER JOIN items T ON T.id = I.item_id WHERE I.user_id = U.id), '[]') AS _items "
+    "FROM users U LEFT JOIN user_upgrades P ON P.user_id = U.id "
+    "WHERE U.id = ANY(%s)")
+
+
+class PreparedConnection(connection):
     def __init__(self, *args, **kwargs):
-        self._connection = psycopg2.connect(*args, **kwargs, cursor_factory=RealDictCursor)
-        self._cursor: RealDictCursor = self._connection.cursor()
-        self._pending_commit = False
+        super().__init__(*args, **kwargs)
+        # Names of the statements prepared on this connection
+        self.prepared: set[str] = set()
+
+
+class DBSession:
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor: RealDictCursor = connection.cursor()
+        self.pending_commit: bool = False
+        self.released: bool = False
+        self.lock: threading.RLock = threading.RLock()
+
+
+# Session of the command (or reaction) currently being handled, if any
+_CURRENT_SESSION: ContextVar[Optional[DBSession]] = ContextVar('current_session', default=None)
+
+
+class PostgreSQL:
+    def __init__(self, *args, min_connections: int = 2, max_connections: int = 10, pool_timeout: float = 10,
+                 prepare_threshold: int = 3, instrument: bool = True, slow_query_ms: float = 100, **kwargs):
+        self._pool = ConnectionPool(min_connections, max_connections, *args, **kwargs,
+                                    timeout=pool_timeout, cursor_factory=RealDictCursor,
+                                    connection_factory=PreparedConnection)
+        # Shapes are prepared server-side after this many uses (0 disables it)
+        self._prepare_threshold: int = prepare_threshold
+        self._default_session: Optional[DBSession] = None
+        self._default_lock: threading.Lock = threading.Lock()
+        self.aio: AsyncPostgreSQL = AsyncPostgreSQL(self, max_connections)
+        # Receives the latency and row count of every statement
+        self.instrumentation: Optional[QueryInstrumentation] = None
+        if instrument:
+            self.instrumentation = QueryInstrumentation(slow_query_ms)
+        # Set to delay Row saves and flush them in batches
+        self.write_behind: Optional[WriteBehind] = None
+        # Saves rows evicted from the caches in batches, when write-behind is off
+        self.eviction_writer: WriteBehind = WriteBehind(self)
+
+    def _session(self) -> DBSession:
+        session: Optional[DBSession] = _CURRENT_SESSION.get()
+        if (session is None) or session.released:
+            # Background work (bets, adventures, console) shares a long-lived connection
+            with self._default_lock:
+                if (self._default_session is None) or self._default_session.connection.closed:
+                    self._default_session = DBSession(self._pool.acquire())
+                session = self._default_session
+        return session
+
+    @asynccontextmanager
+    async def checkout(self):
+        connection = await asyncio.get_event_loop().run_in_executor(None, self._pool.acquire)
+        session: DBSession = DBSession(connection)
+        token = _CURRENT_SESSION.set(session)
+        try:
+            yield session
+        finally:
+            _CURRENT_SESSION.reset(token)
+            session.released = True
+            if not session.cursor.closed:
+                session.cursor.close()
+            self._pool.release(connection)
+
+    @contextmanager
+    def transaction(self):
+        # Blocking work in its own connection, committed at the end, apart from the command that triggered it
+        connection = self._pool.acquire()
+        session: DBSession = DBSession(connection)
+        token = _CURRENT_SESSION.set(session)
+        try:
+            yield session
+            self.commit()
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            _CURRENT_SESSION.reset(token)
+            session.released = True
+            if not session.cursor.closed:
+                session.cursor.close()
+            self._pool.release(connection)
+
+    def track(self, name: str):
+        # Statements run inside are counted for the given command name
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.track(name)
+
+    def get_pool_stats(self) -> dict[str, float]:
+        return self._pool.get_stats()
+
+    def _run(self, statement: Statement, params: list) -> DBSession:
+        session: DBSession = self._session()
+        params = [adapt_value(x) for x in params]
+        statement.uses += 1
+        started: float = time.perf_counter()
+        if statement.name in session.connection.prepared:
+            session.cursor.execute(statement.execute_text, params)
+        elif self._prepare_threshold and statement.uses >= self._prepare_threshold:
+            session.cursor.execute(statement.prepare_text)
+            session.connection.prepared.add(statement.name)
+            session.cursor.execute(statement.execute_text, params)
+        else:
+            session.cursor.execute(statement.text, params)
+        if self.instrumentation is not None:
+            self.instrumentation.on_statement(statement.text, time.perf_counter() - started, session.cursor.rowcount)
+        return session
 
     def get_row_data(self, table_name: str, match_columns: SQLDict, columns: SQLColumns = None, limit: int = 1) \
             -> SQLResult:
-        column_names = get_column_names(columns)
-        where_info = get_where_info(match_columns)
+        statement: Statement = _select_statement(table_name, _columns_key(columns), tuple(match_columns), limit)
+        session: DBSession = self._run(statement, list(match_columns.values()))
         if limit == 1:
-            self._cursor.execute(f"SELECT {column_names} FROM {table_name} WHERE {where_info}")
-            return self._cursor.fetchone()
+            return session.cursor.fetchone()
         else:
-            self._cursor.execute(f"SELECT {column_names} FROM {table_name} WHERE {where_info} LIMIT {limit}")
-            return self._cursor.fetchall()
+            return session.cursor.fetchall()
+
+    def get_rows_in(self, table_name: str, column: str, values: list, columns: SQLColumns = None) \
+            -> list[SQLDict]:
+        if not values:
+            return []
+        statement: Statement = _select_in_statement(table_name, _columns_key(columns), column)
+        return self._run(statement, [list(values)]).cursor.fetchall()
+
+    def get_owned_items(self, link_table: str, owner_column: str, owner_ids: list[int]) -> list[SQLDict]:
+        # Slots of user_items/guild_items together with the item data
+        if not owner_ids:
+            return []
+        statement: Statement = _owned_items_statement(link_table, owner_column)
+        return self._run(statement, [list(owner_ids)]).cursor.fetchall()
 
     def start_join(self, table_from: str, match_columns: SQLDict, columns: SQLColumns = None, limit: Optional[int] = 1)\
             -> 'Join':
@@ -67,54 +287,105 @@ class PostgreSQL:
 
     def insert_data(self, table_name: str, column_data: SQLDict, returns: bool = False,
                     return_columns: SQLColumns = None) -> Optional[SQLDict]:
-        keys = '(' + ', '.join(column_data.keys()) + ')'
-        values = '(' + ', '.join(map(convert_sql_value, column_data.values())) + ')'
+        statement: Statement = _insert_statement(table_name, tuple(column_data), returns, _columns_key(return_columns))
+        session: DBSession = self._run(statement, list(column_data.values()))
+        session.pending_commit = True
         if returns:
-            column_names = get_column_names(return_columns)
-            self._cursor.execute(f"INSERT INTO {table_name} {keys} VALUES {values} RETURNING {column_names}")
-            self._pending_commit = True
-            return self._cursor.fetchone()
-        else:
-            self._cursor.execute(f"INSERT INTO {table_name} {keys} VALUES {values}")
-            self._pending_commit = True
+            return session.cursor.fetchone()
+
+    def insert_many(self, table_name: str, rows: list[SQLDict], returns: bool = False,
+                    return_columns: SQLColumns = None) -> list[SQLDict]:
+        # Rows must share their columns. Returned rows come in no particular order, see insert_owned_items
+        if not rows:
+            return []
+        keys: tuple[str, ...] = tuple(rows[0])
+        statement: Statement = _insert_many_statement(table_name, keys, len(rows), returns,
+                                                      _columns_key(return_columns))
+        session: DBSession = self._run(statement, [row[key] for row in rows for key in keys])
+        session.pending_commit = True
+        if returns:
+            return session.cursor.fetchall()
+        return []
+
+    def insert_owned_items(self, link_table: str, owner_column: str, items: list[tuple[int, SQLDict, str]]) \
+            -> dict[tuple[int, str], int]:
+        # Item rows (data, desc_id) and their links to (owner, slot) in one statement, returns the new item ids
+        if not items:
+            return {}
+        statement: Statement = _insert_owned_items_statement(link_table, owner_column, len(items))
+        session: DBSession = self._run(statement, [x for owner_id, row, slot in items
+                                                   for x in (row['data'], row['desc_id'], owner_id, slot)])
+        session.pending_commit = True
+        return {(x['owner_id'], x['slot']): x['item_id'] for x in session.cursor.fetchall()}
 
     def update_data(self, table_name: str, match_columns: SQLDict, column_data: SQLDict) -> None:
-        where_info = get_where_info(match_columns)
-        set_values = ', '.join(map(lambda x: x[0] + ' = ' + convert_sql_value(x[1]), column_data.items()))
-        self._cursor.execute(f"UPDATE {table_name} SET {set_values} WHERE {where_info}")
-        self._pending_commit = True
+        statement: Statement = _update_statement(table_name, tuple(column_data), tuple(match_columns))
+        session: DBSession = self._run(statement, list(column_data.values()) + list(match_columns.values()))
+        session.pending_commit = True
+
+    def update_many(self, table_name: str, updates: list[tuple[SQLDict, SQLDict]]) -> None:
+        # (match_columns, column_data) pairs, statements of the same shape are sent together
+        shapes: dict[tuple, list[list]] = {}
+        for match_columns, column_data in updates:
+            shape: tuple = (tuple(column_data), tuple(match_columns))
+            shapes.setdefault(shape, []).append(
+                [adapt_value(x) for x in list(column_data.values()) + list(match_columns.values())])
+        if not shapes:
+            return
+        session: DBSession = self._session()
+        for (set_keys, match_keys), params_list in shapes.items():
+            text: str = _update_statement(table_name, set_keys, match_keys).text
+            started: float = time.perf_counter()
+            execute_batch(session.cursor, text, params_list)
+            if self.instrumentation is not None:
+                self.instrumentation.on_statement(f"{text} (batch)", time.perf_counter() - started, len(params_list))
+        session.pending_commit = True
 
     def delete_row(self, table_name: str, match_columns: SQLDict, limit: int = 1) -> None:
-        where_info = get_where_info(match_columns)
-        if limit is None:
-            self._cursor.execute(f"DELETE FROM {table_name} WHERE {where_info}")
-        else:
-            column_match = ', '.join(match_columns.keys())
-            self._cursor.execute(f"DELETE FROM {table_name} WHERE ({column_match}) IN "
-                                 f"(SELECT {column_match} FROM {table_name} "
-                                 f"WHERE {where_info} LIMIT {limit})")
-        self._pending_commit = True
+        statement: Statement = _delete_statement(table_name, tuple(match_columns), limit)
+        session: DBSession = self._run(statement, list(match_columns.values()))
+        session.pending_commit = True
 
-    def get_cursor(self) -> RealDictCursor:
-        return self._cursor
+    def delete_rows_in(self, table_name: str, column: str, values: list) -> None:
+        if not values:
+            return
+        session: DBSession = self._run(_delete_in_statement(table_name, column), [list(values)])
+        session.pending_commit = True
+
+    def get_user_bundles(self, user_ids: list[int]) -> dict[int, tuple[SQLDict, Optional[SQLDict], list[SQLDict]]]:
+        # Returns (user row, upgrades row, item rows) for every existing user
+        session: DBSession = self._run(_USER_BUNDLE_STATEMENT, [list(user_ids)])
+        bundles = {}
+        for row in session.cursor.fetchall():
+            upgrades: Optional[SQLDict] = row.pop('_upgrades')
+            items: list[SQLDict] = row.pop('_items')
+            bundles[row['id']] = (row, upgrades, items)
+        return bundles
 
-    def reset_cursor(self):
-        if not self._cursor.closed:
-            self._cursor.close()
-        self._cursor = self._connection.cursor()
+    def get_cursor(self) -> RealDictCursor:
+        return self._session().cursor
 
-    def execute(self, query: str) -> None:
-        self._cursor.execute(query)
+    def execute(self, query: str, params: Optional[list] = None) -> None:
+        cursor: RealDictCursor = self.get_cursor()
+        started: float = time.perf_counter()
+        if params is None:
+            cursor.execute(query)
+        else:
+            cursor.execute(query, [adapt_value(x) for x in params])
+        if self.instrumentation is not None:
+            self.instrumentation.on_statement(query, time.perf_counter() - started, cursor.rowcount)
 
     def rollback(self, force: bool = False) -> None:
-        if self._pending_commit or force:
-            self._connection.rollback()
-            self._pending_commit = False
+        session: DBSession = self._session()
+        if session.pending_commit or force:
+            session.connection.rollback()
+            session.pending_commit = False
 
     def commit(self, force: bool = False) -> None:
-        if self._pending_commit or force:
-            self._connection.commit()
-            self._pending_commit = False
+        session: DBSession = self._session()
+        if session.pending_commit or force:
+            session.connection.commit()
+            session.pending_commit = False
 
 
 class JoinOn:
@@ -124,13 +395,41 @@ class JoinOn:
         self.field_matches: Optional[list[tuple[str, str]]] = field_matches
         self.value_matches: Optional[list[tuple[str, Any]]] = value_matches
 
-    def print_matches(self, a: str, b: str) -> str:
-        tp = []
-        if self.field_matches:
-            tp.append(' AND '.join([f"{a}.{x} = {b}.{y}" for (x, y) in self.field_matches]))
-        if self.value_matches:
-            tp.append(' AND '.join([f"{a}.{x} = {convert_sql_value(y)}" for (x, y) in self.value_matches]))
-        return ' AND '.join(tp)
+    def get_shape(self) -> tuple:
+        return (self.table_name, tuple(self.field_matches or ()),
+                tuple([x for (x, _) in self.value_matches or ()]))
+
+    def get_values(self) -> list:
+        return [y for (_, y) in self.value_matches or ()]
+
+
+def print_join_matches(field_matches: tuple[tuple[str, str], ...], value_keys: tuple[str, ...], a: str, b: str) \
+        -> str:
+    tp = []
+    if field_matches:
+        tp.append(' AND '.join([f"{a}.{x} = {b}.{y}" for (x, y) in field_matches]))
+    if value_keys:
+        tp.append(get_where_info(value_keys, a))
+    return ' AND '.join(tp)
+
+
+@lru_cache(maxsize=256)
+def _join_statement(table_from: str, match_keys: tuple[str, ...], columns: Optional[tuple[str, ...]],
+                    limit: Optional[int], join_shapes: tuple) -> Statement:
+    letters: str = string.ascii_uppercase
+    to_execute: list[str] = []
+    i = 0
+    for (table_name, field_matches, value_keys) in join_shapes:
+        i += 1
+        to_execute.append(f"INNER JOIN {table_name} {letters[i]} "
+                          f"ON {print_join_matches(field_matches, value_keys, letters[i], letters[i - 1])}")
+    if match_keys:
+        to_execute.append(f"WHERE {get_where_info(match_keys, letters[0])}")
+    to_execute.insert(0, f"SELECT {get_column_names(columns, letters[i])} "
+                         f"FROM {table_from} {letters[0]}")
+    if (limit is not None) and (limit != 1):
+        to_execute.append(f"LIMIT {limit}")
+    return Statement(' '.join(to_execute))
 
 
 class Join:
@@ -149,30 +448,34 @@ class Join:
         return self
 
     def execute(self) -> SQLResult:
-        letters: str = string.ascii_uppercase
-        to_execute: list[str] = []
-        i = 0
-        for join_on in self._join_on:
-            i += 1
-            to_execute.append(f"INNER JOIN {join_on.table_name} {letters[i]} "
-                              f"ON {join_on.print_matches(letters[i], letters[i - 1])}")
-        if self._match_columns:
-            to_execute.append(f"WHERE {get_where_info(self._match_columns, letters[0])}")
-        to_execute.insert(0, f"SELECT {get_column_names(self._columns, letters[i])} "
-                             f"FROM {self._table_from} {letters[0]}")
+        match_columns: SQLDict = self._match_columns or {}
+        statement: Statement = _join_statement(self._table_from, tuple(match_columns), _columns_key(self._columns),
+                                               self._limit, tuple([x.get_shape() for x in self._join_on]))
+        # Join values come before the WHERE values in the query
+        params: list = [y for x in self._join_on for y in x.get_values()] + list(match_columns.values())
+        session: DBSession = self._db._run(statement, params)  # noqa
         if self._limit == 1:
-            self._db.execute(' '.join(to_execute))
-            return self._db.get_cursor().fetchone()
+            return session.cursor.fetchone()
         else:
-            to_execute.append(f"LIMIT {self._limit}")
-            self._db.execute(' '.join(to_execute))
-            return self._db.get_cursor().fetchall()
+            return session.cursor.fetchall()
+
+
+def _db_settings() -> dict[str, Any]:
+    return {
+        'min_connections': int(os.environ.get('DB_POOL_MIN', 2)),
+        'max_connections': int(os.environ.get('DB_POOL_MAX', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'prepare_threshold': int(os.environ.get('DB_PREPARE_THRESHOLD', 3)),
+        'instrument': os.environ.get('DB_INSTRUMENT', '1').lower() not in ('0', 'false'),
+        'slow_query_ms': float(os.environ.get('DB_SLOW_QUERY_MS', 100)),
+    }
 
 
 def load_test_database():
     with open('C:/Users/Manel/git/tim-bot-py/local/b.txt', 'r') as f:
-        return PostgreSQL(host="localhost", user="postgres", password=f.readline(), database='testing')
+        return PostgreSQL(host="localhost", user="postgres", password=f.readline(), database='testing',
+                          **_db_settings())
 
 
 def load_database():
-    return PostgreSQL(os.environ['DATABASE_URL'], sslmode='require')
+    return PostgreSQL(os.environ['DATABASE_URL'], sslmode='require', **_db_settings())
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from helpers.metrics import Histogram
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements: int = 0
+        self.db_time: float = 0  # Milliseconds
+
+
+class ShapeStats:
+    def __init__(self):
+        self.latency: Histogram = Histogram()
+        self.rows: int = 0
+
+
+class CommandQueryStats:
+    def __init__(self):
+        self.statements: Histogram = Histogram((1, 2, 3, 5, 10, 20, 50, 100, 200))
+        self.db_time: Histogram = Histogram()
+
+
+# Counter of the command (or reaction) being handled, if any
+_CURRENT_COUNTER: ContextVar[Optional[StatementCounter]] = ContextVar('current_counter', default=None)
+
+
+class QueryInstrumentation:
+    SHAPE_PRINT_LENGTH: int = 90
+
+    def __init__(self, slow_ms: float = 100, slow_log_size: int = 50):
+        self.slow_ms: float = slow_ms
+        self._lock: threading.Lock = threading.Lock()
+        self._shapes: dict[str, ShapeStats] = {}
+        self._commands: dict[str, CommandQueryStats] = {}
+        # (wall time, shape, milliseconds, rows), most recent last
+        self.slow_log: deque[tuple[float, str, float, int]] = deque(maxlen=slow_log_size)
+
+    def on_statement(self, shape: str, elapsed: float, rows: int) -> None:
+        ms: float = elapsed * 1000
+        with self._lock:
+            stats: Optional[ShapeStats] = self._shapes.get(shape)
+            if stats is None:
+                stats = ShapeStats()
+                self._shapes[shape] = stats
+            stats.latency.add(ms)
+            stats.rows += max(rows, 0)
+            if ms >= self.slow_ms:
+                self.slow_log.append((time.time(), shape, ms, rows))
+        counter: Optional[StatementCounter] = _CURRENT_COUNTER.get()
+        if counter is not None:
+            counter.statements += 1
+            counter.db_time += ms
+
+    @contextmanager
+    def track(self, name: str):
+        # Counts the statements run by a command, including those sent from database threads
+        counter: StatementCounter = StatementCounter()
+        token = _CURRENT_COUNTER.set(counter)
+        try:
+            yield counter
+        finally:
+            _CURRENT_COUNTER.reset(token)
+            with self._lock:
+                stats: Optional[CommandQueryStats] = self._commands.get(name)
+                if stats is None:
+                    stats = CommandQueryStats()
+                    self._commands[name] = stats
+                stats.statements.add(counter.statements)
+                stats.db_time.add(counter.db_time)
+
+    def get_command_stats(self, name: str) -> Optional[CommandQueryStats]:
+        with self._lock:
+            return self._commands.get(name)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+            self._commands.clear()
+            self.slow_log.clear()
+
+    def print_shapes(self, top: int = 15) -> str:
+        with self._lock:
+            shapes = sorted(self._shapes.items(), key=lambda x: x[1].latency.total, reverse=True)[:top]
+            lines = [f"Statements (top {top} by total time):"]
+            for shape, stats in shapes:
+                lines.append(f"  {stats.latency.total:.0f}ms {stats.latency.print()} rows={stats.rows} | "
+                             f"{shape[:QueryInstrumentation.SHAPE_PRINT_LENGTH]}")
+        return '\n'.join(lines)
+
+    def print_commands(self) -> str:
+        with self._lock:
+            commands = sorted(self._commands.items(), key=lambda x: x[1].db_time.total, reverse=True)
+            lines = ["Statements per command:"]
+            for name, stats in commands:
+                lines.append(f"  {name}: statements {stats.statements.print()} | db ms {stats.db_time.print()}")
+        return '\n'.join(lines)
+
+    def print_slow(self) -> str:
+        with self._lock:
+            lines = [f"Slow statements (>= {self.slow_ms:g}ms):"]
+            for when, shape, ms, rows in self.slow_log:
+                lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(when))} {ms:.0f}ms rows={rows} | "
+                             f"{shape[:QueryInstrumentation.SHAPE_PRINT_LENGTH]}")
+        return '\n'.join(lines)
+
+    def print(self) -> str:
+        return '\n'.join([self.print_shapes(), self.print_commands(), self.print_slow()])
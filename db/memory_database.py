@@ -0,0 +1,391 @@
+import copy
+import json
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional, Any
+
+from autoslot import Slots
+
+from db.async_database import AsyncPostgreSQL
+from db.database import PostgreSQL, SQLDict, SQLColumns, SQLResult, Join, _CURRENT_SESSION, _columns_key, \
+    _select_statement, _insert_statement, _update_statement, _delete_statement, _select_in_statement, \
+    _insert_many_statement, _insert_owned_items_statement, _delete_in_statement, _owned_items_statement, \
+    _USER_BUNDLE_STATEMENT
+from db.instrumentation import QueryInstrumentation
+from db.write_behind import WriteBehind
+
+
+class TableSchema(Slots):
+    def __init__(self, key: tuple[str, ...], defaults: SQLDict, serial: Optional[str] = None,
+                 index: Optional[str] = None):
+        self.key: tuple[str, ...] = key
+        self.defaults: SQLDict = defaults  # Column defaults of an inserted row
+        self.serial: Optional[str] = serial  # Column filled from a sequence when missing
+        self.index: Optional[str] = index  # Non key column most lookups go through
+
+
+# Tables used by the bot, with the defaults of the production schema
+SCHEMA: dict[str, TableSchema] = {
+    'users': TableSchema(('id',), {
+        'last_name': '', 'money': 0, 'bank': 0, 'bank_time': 0, 'tokens': 5, 'tokens_time': 0, 'lang': 'en',
+        'tutorial': 0, 'class': -1
+    }),
+    'user_upgrades': TableSchema(('user_id',), {'bank': 1, 'money': 1, 'garden': 1, 'inventory': 1}),
+    'guilds': TableSchema(('id',), {
+        'lang': 'en', 'table_money': 0, 'table_money_time': 0, 'ongoing_bet': {}, 'user_ids': [], 'shop_time': 0
+    }),
+    'items': TableSchema(('id',), {'desc_id': 0, 'data': {}}, serial='id'),
+    'user_items': TableSchema(('user_id', 'slot'), {}, index='user_id'),
+    'guild_items': TableSchema(('guild_id', 'slot'), {}, index='guild_id'),
+    'adventures': TableSchema(('message_id',), {}),
+}
+
+
+def _store_value(value: Any) -> Any:
+    if type(value) == dict:
+        return json.loads(json.dumps(value))  # Stored as JSON, so keys come back as strings
+    if type(value) == list:
+        return copy.deepcopy(value)
+    return value
+
+
+def _read_value(value: Any) -> Any:
+    if type(value) in (dict, list):
+        return copy.deepcopy(value)
+    return value
+
+
+class MemoryTable:
+    def __init__(self, schema: TableSchema):
+        self.schema: TableSchema = schema
+        self.rows: dict[tuple, SQLDict] = {}
+        self._index: dict[Any, set[tuple]] = {}
+        self._next_id: int = 1
+
+    def get_key(self, row: SQLDict) -> tuple:
+        return tuple(row[x] for x in self.schema.key)
+
+    def next_id(self) -> int:
+        self._next_id += 1
+        return self._next_id - 1
+
+    def set(self, key: tuple, row: SQLDict) -> None:
+        self.pop(key)
+        self.rows[key] = row
+        if self.schema.index is not None:
+            self._index.setdefault(row[self.schema.index], set()).add(key)
+        if (self.schema.serial is not None) and (row[self.schema.serial] >= self._next_id):
+            self._next_id = row[self.schema.serial] + 1
+
+    def pop(self, key: tuple) -> Optional[SQLDict]:
+        row: Optional[SQLDict] = self.rows.pop(key, None)
+        if (row is not None) and (self.schema.index is not None):
+            keys: set[tuple] = self._index[row[self.schema.index]]
+            keys.discard(key)
+            if not keys:
+                del self._index[row[self.schema.index]]
+        return row
+
+    def find(self, match_columns: SQLDict, limit: Optional[int] = None) -> list[tuple]:
+        # Keys of the matching rows, through the primary key or the index when possible
+        if all(x in match_columns for x in self.schema.key):
+            key: tuple = tuple(match_columns[x] for x in self.schema.key)
+            candidates = [key] if key in self.rows else []
+        elif (self.schema.index is not None) and (self.schema.index in match_columns):
+            candidates = list(self._index.get(match_columns[self.schema.index], ()))
+        else:
+            candidates = list(self.rows)
+        found: list[tuple] = []
+        for key in candidates:
+            row: SQLDict = self.rows[key]
+            if all(row.get(column) == value for column, value in match_columns.items()):
+                found.append(key)
+                if (limit is not None) and (len(found) >= limit):
+                    break
+        return found
+
+
+class MemorySession:
+    def __init__(self):
+        # (table, key, previous row) for every change since the last commit
+        self.undo: list[tuple[MemoryTable, tuple, Optional[SQLDict]]] = []
+        self.pending_commit: bool = False
+        self.released: bool = False
+        self.lock: threading.RLock = threading.RLock()
+
+
+class MemoryDatabase(PostgreSQL):
+    # Same interface as PostgreSQL without a server, for tests and benchmarks. Every statement is counted with the
+    # shape PostgreSQL would run, and round_trip_ms models the network. Changes are seen by every session right away,
+    # rollback undoes the ones of its own session
+    def __init__(self, schema: Optional[dict[str, TableSchema]] = None, round_trip_ms: float = 0,
+                 instrument: bool = True, slow_query_ms: float = 100, max_workers: int = 10):  # noqa
+        self._tables: dict[str, MemoryTable] = {name: MemoryTable(table_schema)
+                                                for name, table_schema in (schema or SCHEMA).items()}
+        self._lock: threading.RLock = threading.RLock()
+        self._default_session: MemorySession = MemorySession()
+        self.round_trip: float = round_trip_ms / 1000
+        self.checkouts: int = 0
+        self.aio: AsyncPostgreSQL = AsyncPostgreSQL(self, max_workers)
+        self.instrumentation: Optional[QueryInstrumentation] = None
+        if instrument:
+            self.instrumentation = QueryInstrumentation(slow_query_ms)
+        self.write_behind = None
+        self.eviction_writer = WriteBehind(self)
+
+    def _session(self) -> MemorySession:
+        session: Optional[MemorySession] = _CURRENT_SESSION.get()
+        if (session is None) or session.released:
+            return self._default_session
+        return session
+
+    @asynccontextmanager
+    async def checkout(self):
+        session: MemorySession = MemorySession()
+        token = _CURRENT_SESSION.set(session)
+        self.checkouts += 1
+        try:
+            yield session
+        finally:
+            _CURRENT_SESSION.reset(token)
+            self._rollback(session)  # A released connection drops its open transaction
+            session.released = True
+
+    @contextmanager
+    def transaction(self):
+        session: MemorySession = MemorySession()
+        token = _CURRENT_SESSION.set(session)
+        self.checkouts += 1
+        try:
+            yield session
+            self.commit()
+        finally:
+            _CURRENT_SESSION.reset(token)
+            self._rollback(session)  # Nothing left after a commit
+            session.released = True
+
+    def get_pool_stats(self) -> dict[str, float]:
+        return {'checkouts': self.checkouts}
+
+    def get_table(self, table_name: str) -> MemoryTable:
+        return self._tables[table_name]
+
+    def _on_statement(self, text: str, started: float, rows: int) -> None:
+        if self.round_trip > 0:
+            time.sleep(self.round_trip)
+        if self.instrumentation is not None:
+            self.instrumentation.on_statement(text, time.perf_counter() - started, rows)
+
+    @staticmethod
+    def _read(row: SQLDict, columns: SQLColumns) -> SQLDict:
+        return {column: _read_value(row[column]) for column in (columns or row)}
+
+    def _put(self, table: MemoryTable, row: SQLDict) -> None:
+        session: MemorySession = self._session()
+        key: tuple = table.get_key(row)
+        session.undo.append((table, key, table.rows.get(key)))
+        table.set(key, row)
+        session.pending_commit = True
+
+    def _remove(self, table: MemoryTable, key: tuple) -> None:
+        session: MemorySession = self._session()
+        session.undo.append((table, key, table.pop(key)))
+        session.pending_commit = True
+
+    def _insert(self, table_name: str, column_data: SQLDict) -> SQLDict:
+        table: MemoryTable = self._tables[table_name]
+        row: SQLDict = {column: _store_value(value) for column, value in table.schema.defaults.items()}
+        row.update({column: _store_value(value) for column, value in column_data.items()})
+        if (table.schema.serial is not None) and (row.get(table.schema.serial) is None):
+            row[table.schema.serial] = table.next_id()
+        if table.get_key(row) in table.rows:
+            raise ValueError(f"Duplicate key {table.get_key(row)} in {table_name}")
+        self._put(table, row)
+        return row
+
+    def get_row_data(self, table_name: str, match_columns: SQLDict, columns: SQLColumns = None, limit: int = 1) \
+            -> SQLResult:
+        started: float = time.perf_counter()
+        with self._lock:
+            table: MemoryTable = self._tables[table_name]
+            rows: list[SQLDict] = [self._read(table.rows[key], columns) for key in table.find(match_columns, limit)]
+        self._on_statement(_select_statement(table_name, _columns_key(columns), tuple(match_columns), limit).text,
+                           started, len(rows))
+        if limit == 1:
+            return rows[0] if rows else None
+        return rows
+
+    def get_rows_in(self, table_name: str, column: str, values: list, columns: SQLColumns = None) \
+            -> list[SQLDict]:
+        if not values:
+            return []
+        started: float = time.perf_counter()
+        rows: list[SQLDict] = []
+        with self._lock:
+            table: MemoryTable = self._tables[table_name]
+            for value in set(values):
+                rows += [self._read(table.rows[key], columns) for key in table.find({column: value})]
+        self._on_statement(_select_in_statement(table_name, _columns_key(columns), column).text, started, len(rows))
+        return rows
+
+    def _get_owned_items(self, link_table: str, owner_column: str, owner_id: int) -> list[SQLDict]:
+        table: MemoryTable = self._tables[link_table]
+        items: MemoryTable = self._tables['items']
+        rows: list[SQLDict] = []
+        for key in table.find({owner_column: owner_id}):
+            link: SQLDict = table.rows[key]
+            item: Optional[SQLDict] = items.rows.get((link['item_id'],))
+            if item is not None:
+                rows.append({'owner_id': owner_id, 'slot': link['slot'], 'item_id': link['item_id'],
+                             'desc_id': item['desc_id'], 'data': _read_value(item['data'])})
+        return rows
+
+    def get_owned_items(self, link_table: str, owner_column: str, owner_ids: list[int]) -> list[SQLDict]:
+        if not owner_ids:
+            return []
+        started: float = time.perf_counter()
+        with self._lock:
+            rows: list[SQLDict] = [row for owner_id in set(owner_ids)
+                                   for row in self._get_owned_items(link_table, owner_column, owner_id)]
+        self._on_statement(_owned_items_statement(link_table, owner_column).text, started, len(rows))
+        return rows
+
+    def start_join(self, table_from: str, match_columns: SQLDict, columns: SQLColumns = None, limit: Optional[int] = 1)\
+            -> 'Join':
+        raise NotImplementedError("Joins need PostgreSQL")
+
+    def insert_data(self, table_name: str, column_data: SQLDict, returns: bool = False,
+                    return_columns: SQLColumns = None) -> Optional[SQLDict]:
+        started: float = time.perf_counter()
+        with self._lock:
+            row: SQLDict = self._insert(table_name, column_data)
+            result: SQLDict = self._read(row, return_columns)
+        self._on_statement(_insert_statement(table_name, tuple(column_data), returns,
+                                             _columns_key(return_columns)).text, started, 1)
+        if returns:
+            return result
+
+    def insert_many(self, table_name: str, rows: list[SQLDict], returns: bool = False,
+                    return_columns: SQLColumns = None) -> list[SQLDict]:
+        if not rows:
+            return []
+        started: float = time.perf_counter()
+        with self._lock:
+            results: list[SQLDict] = [self._read(self._insert(table_name, row), return_columns) for row in rows]
+        self._on_statement(_insert_many_statement(table_name, tuple(rows[0]), len(rows), returns,
+                                                  _columns_key(return_columns)).text, started, len(rows))
+        if returns:
+            return results
+        return []
+
+    def insert_owned_items(self, link_table: str, owner_column: str, items: list[tuple[int, SQLDict, str]]) \
+            -> dict[tuple[int, str], int]:
+        if not items:
+            return {}
+        started: float = time.perf_counter()
+        item_ids: dict[tuple[int, str], int] = {}
+        with self._lock:
+            for owner_id, row, slot in items:
+                item_id: int = self._insert('items', row)['id']
+                self._insert(link_table, {owner_column: owner_id, 'slot': slot, 'item_id': item_id})
+                item_ids[(owner_id, slot)] = item_id
+        self._on_statement(_insert_owned_items_statement(link_table, owner_column, len(items)).text, started,
+                           len(items))
+        return item_ids
+
+    def _update(self, table_name: str, match_columns: SQLDict, column_data: SQLDict) -> int:
+        table: MemoryTable = self._tables[table_name]
+        keys: list[tuple] = table.find(match_columns)
+        for key in keys:
+            row: SQLDict = dict(table.rows[key])  # The old row is kept for rollbacks
+            row.update({column: _store_value(value) for column, value in column_data.items()})
+            new_key: tuple = table.get_key(row)
+            if (new_key != key) and (new_key in table.rows):
+                raise ValueError(f"Duplicate key {new_key} in {table_name}")
+            self._remove(table, key)
+            self._put(table, row)
+        return len(keys)
+
+    def update_data(self, table_name: str, match_columns: SQLDict, column_data: SQLDict) -> None:
+        started: float = time.perf_counter()
+        with self._lock:
+            updated: int = self._update(table_name, match_columns, column_data)
+        self._on_statement(_update_statement(table_name, tuple(column_data), tuple(match_columns)).text, started,
+                           updated)
+
+    def update_many(self, table_name: str, updates: list[tuple[SQLDict, SQLDict]]) -> None:
+        shapes: dict[tuple, list[tuple[SQLDict, SQLDict]]] = {}
+        for match_columns, column_data in updates:
+            shapes.setdefault((tuple(column_data), tuple(match_columns)), []).append((match_columns, column_data))
+        for (set_keys, match_keys), shape_updates in shapes.items():
+            started: float = time.perf_counter()
+            with self._lock:
+                for match_columns, column_data in shape_updates:
+                    self._update(table_name, match_columns, column_data)
+            self._on_statement(f"{_update_statement(table_name, set_keys, match_keys).text} (batch)", started,
+                               len(shape_updates))
+
+    def delete_row(self, table_name: str, match_columns: SQLDict, limit: int = 1) -> None:
+        started: float = time.perf_counter()
+        with self._lock:
+            table: MemoryTable = self._tables[table_name]
+            keys: list[tuple] = table.find(match_columns, limit)
+            for key in keys:
+                self._remove(table, key)
+        self._on_statement(_delete_statement(table_name, tuple(match_columns), limit).text, started, len(keys))
+
+    def delete_rows_in(self, table_name: str, column: str, values: list) -> None:
+        if not values:
+            return
+        started: float = time.perf_counter()
+        with self._lock:
+            table: MemoryTable = self._tables[table_name]
+            keys: list[tuple] = [key for value in set(values) for key in table.find({column: value})]
+            for key in keys:
+                self._remove(table, key)
+        self._on_statement(_delete_in_statement(table_name, column).text, started, len(keys))
+
+    def get_user_bundles(self, user_ids: list[int]) -> dict[int, tuple[SQLDict, Optional[SQLDict], list[SQLDict]]]:
+        started: float = time.perf_counter()
+        bundles = {}
+        with self._lock:
+            users: MemoryTable = self._tables['users']
+            upgrades: MemoryTable = self._tables['user_upgrades']
+            for user_id in set(user_ids):
+                user: Optional[SQLDict] = users.rows.get((user_id,))
+                if user is not None:
+                    upgrades_row: Optional[SQLDict] = upgrades.rows.get((user_id,))
+                    items: list[SQLDict] = self._get_owned_items('user_items', 'user_id', user_id)
+                    for item in items:
+                        del item['owner_id']
+                    bundles[user_id] = (self._read(user, None),
+                                        None if upgrades_row is None else self._read(upgrades_row, None), items)
+        self._on_statement(_USER_BUNDLE_STATEMENT.text, started, len(bundles))
+        return bundles
+
+    def get_cursor(self):
+        raise NotImplementedError("Raw SQL needs PostgreSQL")
+
+    def execute(self, query: str, params: Optional[list] = None) -> None:
+        raise NotImplementedError("Raw SQL needs PostgreSQL")
+
+    def _rollback(self, session: MemorySession) -> None:
+        with self._lock:
+            for table, key, row in reversed(session.undo):
+                if row is None:
+                    table.pop(key)
+                else:
+                    table.set(key, row)
+        session.undo.clear()
+        session.pending_commit = False
+
+    def rollback(self, force: bool = False) -> None:
+        session: MemorySession = self._session()
+        if session.pending_commit or force:
+            self._rollback(session)
+
+    def commit(self, force: bool = False) -> None:
+        session: MemorySession = self._session()
+        session.undo.clear()
+        session.pending_commit = False
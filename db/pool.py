@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Optional
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.discarded: int = 0
+        self.wait_total: float = 0
+        self.wait_max: float = 0
+
+    def add_wait(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'discarded': self.discarded,
+            'wait_avg': self.wait_total / self.checkouts if self.checkouts else 0,
+            'wait_max': self.wait_max,
+        }
+
+
+class ConnectionPool:
+    HEALTH_CHECK_INTERVAL: float = 30
+
+    def __init__(self, min_connections: int, max_connections: int, *args, timeout: float = 10, **kwargs):
+        self._pool = ThreadedConnectionPool(min_connections, max_connections, *args, **kwargs)
+        # psycopg2 raises instead of waiting when exhausted, so waiting is done on this semaphore
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._last_used: dict[object, float] = {}
+        self._in_use: int = 0
+        self.max_connections: int = max_connections
+        self.timeout: float = timeout
+        self.stats: PoolStats = PoolStats()
+
+    def _is_healthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if time.monotonic() - self._last_used.get(connection, 0) < ConnectionPool.HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        if timeout is None:
+            timeout = self.timeout
+        started: float = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            self.stats.timeouts += 1
+            raise PoolError(f"No connection available after {timeout}s")
+        self.stats.add_wait(time.perf_counter() - started)
+        try:
+            connection = self._pool.getconn()
+            if not self._is_healthy(connection):
+                self.stats.discarded += 1
+                self._last_used.pop(connection, None)
+                self._pool.putconn(connection, close=True)
+                connection = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        self._in_use += 1
+        return connection
+
+    def release(self, connection) -> None:
+        if connection.closed:
+            self._last_used.pop(connection, None)
+        else:
+            self._last_used[connection] = time.monotonic()
+        self._in_use -= 1
+        try:
+            self._pool.putconn(connection, close=bool(connection.closed))
+        finally:
+            self._slots.release()
+
+    def get_stats(self) -> dict[str, float]:
+        d = self.stats.to_dict()
+        d['in_use'] = self._in_use
+        d['max'] = self.max_connections
+        return d
+
+    def close(self) -> None:
+        self._pool.closeall()
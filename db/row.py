@@ -5,6 +5,7 @@ from typing import Any
 from autoslot import Slots
 
 from db.database import PostgreSQL, SQLDict
+from db.write_behind import WriteBehind
 
 
 class DataChanges(UserDict):
@@ -21,13 +22,23 @@ class DataChanges(UserDict):
         self._changes.clear()
         return pop
 
+    def has_changes(self) -> bool:
+        return len(self._changes) > 0
+
+    def restore_changes(self, keys) -> None:
+        self._changes.update(keys)
+
 
 class Row(Slots):
-    def __init__(self, db: PostgreSQL, table_name: str, pkey_dict: SQLDict, insert_data: SQLDict = None):
+    def __init__(self, db: PostgreSQL, table_name: str, pkey_dict: SQLDict, insert_data: SQLDict = None,
+                 row_data: SQLDict = None):
         self._db = db
         self._table_name = table_name
         self._pkey_dict = pkey_dict
-        if insert_data:
+        if row_data:
+            # Already fetched by the caller
+            self._data = DataChanges(row_data)
+        elif insert_data:
             insert_data.update(pkey_dict)
             self._data = DataChanges(self._db.insert_data(table_name, insert_data, returns=True))
         else:
@@ -36,6 +47,8 @@ class Row(Slots):
                 data = self._db.insert_data(table_name, pkey_dict.copy(), returns=True)
                 data.update(copy.deepcopy(self.load_defaults()))
             self._data = DataChanges(data)
+        # An evicted copy of this row may still have changes waiting for (or in) a flush
+        self.get_eviction_writer().adopt(self)
 
     def __getitem__(self, key: str):
         return self._data[key]
@@ -43,10 +56,43 @@ class Row(Slots):
     def get_db(self) -> PostgreSQL:
         return self._db
 
+    def get_table_name(self) -> str:
+        return self._table_name
+
+    def get_pkey(self) -> SQLDict:
+        return self._pkey_dict
+
+    def get_key(self) -> tuple[str, tuple]:
+        return self._table_name, tuple(self._pkey_dict.values())
+
+    def pop_changed_data(self) -> SQLDict:
+        # Copied, so later changes in memory do not alter a pending write
+        return {str(k): copy.deepcopy(self._data[k]) for k in self._data.pop_changes()}
+
+    def restore_changes(self, changed_data: SQLDict) -> None:
+        self._data.restore_changes(changed_data.keys())
+
+    def set_changed_data(self, changed_data: SQLDict) -> None:
+        for key, value in changed_data.items():
+            self._data[key] = value
+
     def load_defaults(self) -> dict[str, Any]:
         return {}
 
-    def save(self) -> None:
-        change_list = self._data.pop_changes()
-        if change_list:
-            self._db.update_data(self._table_name, self._pkey_dict, {str(k): self._data[k] for k in change_list})
+    def get_eviction_writer(self) -> WriteBehind:
+        # Write-behind when on, else the writer that only takes evicted rows
+        return self._db.write_behind if self._db.write_behind is not None else self._db.eviction_writer
+
+    def save_evicted(self) -> None:
+        # Left to a background flush in its own transaction, reloads adopt the changes until they are written
+        if self._data.has_changes():
+            self.get_eviction_writer().queue(self)
+
+    async def save(self) -> None:
+        if self._db.write_behind is not None:
+            if self._data.has_changes():
+                self._db.write_behind.mark_dirty(self)
+            return
+        changed_data = self.pop_changed_data()
+        if changed_data:
+            await self._db.aio.update_data(self._table_name, self._pkey_dict, changed_data)
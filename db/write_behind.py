@@ -0,0 +1,134 @@
+import asyncio
+import copy
+import os
+import threading
+import traceback
+import typing
+from typing import Optional
+
+if typing.TYPE_CHECKING:
+    from db.database import PostgreSQL, SQLDict
+    from db.row import Row
+
+RowKey = tuple[str, tuple]
+
+
+class WriteBehind:
+    def __init__(self, db: 'PostgreSQL', interval: float = 5, threshold: int = 200):
+        self._db = db
+        self.interval: float = interval
+        self.threshold: int = threshold
+        # Rows with unsaved changes, one entry per database row
+        self._dirty: dict[RowKey, 'Row'] = {}
+        # Rows taken by a flush that has not finished, with the changes being written
+        self._in_flight: dict[RowKey, tuple['Row', 'SQLDict']] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._flushing: bool = False
+        self._task: Optional[asyncio.Task] = None
+        self.flushes: int = 0
+        self.rows_written: int = 0
+        self.errors: int = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def mark_dirty(self, row: 'Row') -> None:
+        with self._lock:
+            self._dirty[row.get_key()] = row
+            pending: int = len(self._dirty)
+        if (pending >= self.threshold) and (not self._flushing) and (self._task is not None):
+            asyncio.ensure_future(self.flush())
+
+    def queue(self, row: 'Row') -> None:
+        # Like mark_dirty, from any thread and without starting a flush (e.g. cache evictions)
+        with self._lock:
+            self._dirty[row.get_key()] = row
+
+    def adopt(self, row: 'Row') -> None:
+        # A reloaded row takes the changes of its evicted copy, both the pending ones and those of a running flush
+        key: RowKey = row.get_key()
+        with self._lock:
+            changed_data: 'SQLDict' = {}
+            if key in self._in_flight:
+                changed_data.update(copy.deepcopy(self._in_flight.pop(key)[1]))  # Not restored if the flush fails
+            old_row: Optional['Row'] = self._dirty.get(key)
+            if (old_row is not None) and (old_row is not row):
+                changed_data.update(old_row.pop_changed_data())
+            if changed_data:
+                row.set_changed_data(changed_data)
+                self._dirty[key] = row
+
+    def get_pending_count(self) -> int:
+        return len(self._dirty)
+
+    def _take(self) -> list[tuple['Row', 'SQLDict']]:
+        with self._lock:
+            updates = [(row, row.pop_changed_data()) for row in self._dirty.values()]
+            self._dirty.clear()
+            updates = [(row, data) for row, data in updates if data]
+            for row, data in updates:
+                self._in_flight[row.get_key()] = (row, data)
+        return updates
+
+    def _finish(self, updates: list[tuple['Row', 'SQLDict']], failed: bool) -> None:
+        # Failed changes go back to their row, unless a reload adopted them meanwhile
+        with self._lock:
+            for row, data in updates:
+                key: RowKey = row.get_key()
+                if self._in_flight.get(key, (None,))[0] is not row:
+                    continue
+                del self._in_flight[key]
+                if failed:
+                    row.restore_changes(data)
+                    self._dirty.setdefault(key, row)
+
+    def _write(self, updates: list[tuple['Row', 'SQLDict']]) -> None:
+        by_table: dict[str, list[tuple['SQLDict', 'SQLDict']]] = {}
+        for row, data in updates:
+            by_table.setdefault(row.get_table_name(), []).append((row.get_pkey(), data))
+        for table_name, table_updates in by_table.items():
+            self._db.update_many(table_name, table_updates)
+        self.flushes += 1
+        self.rows_written += len(updates)
+
+    async def flush(self) -> None:
+        if self._flushing:
+            return
+        self._flushing = True
+        try:
+            updates = self._take()
+            if not updates:
+                return
+            try:
+                async with self._db.checkout():  # Own transaction, apart from any command
+                    await self._db.aio.run(self._write, updates)
+                    await self._db.aio.commit()
+            except Exception:  # noqa
+                self.errors += 1
+                self._finish(updates, True)
+                traceback.print_exc()
+            else:
+                self._finish(updates, False)
+        finally:
+            self._flushing = False
+
+    def flush_sync(self) -> None:
+        # Used on shutdown, once the event loop has stopped
+        updates = self._take()
+        if updates:
+            self._write(updates)
+            self._db.commit()
+            self._finish(updates, False)
+
+
+def load_write_behind(db: 'PostgreSQL') -> Optional[WriteBehind]:
+    if os.environ.get('DB_WRITE_BEHIND', '0').lower() in ('0', 'false', ''):
+        return None
+    return WriteBehind(db, float(os.environ.get('DB_FLUSH_INTERVAL', 5)),
+                       int(os.environ.get('DB_FLUSH_THRESHOLD', 200)))
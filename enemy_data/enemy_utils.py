@@ -4,6 +4,7 @@ import typing
 from typing import Any, Optional
 
 from enums.location import Location
+from helpers.seeded_random import get_random
 from item_data.stat import Stat
 
 if typing.TYPE_CHECKING:
@@ -53,8 +54,13 @@ def get_enemy(enemy_id: int) -> 'BotEntityBuilder':
     return _ENEMY_IDS[enemy_id]
 
 
-def get_random_enemy(location: Location, pool: str = '', last_chosen_id: Optional[int] = None) \
-        -> 'BotEntityBuilder':
+def get_pools() -> dict[Location, dict[str, list['BotEntityBuilder']]]:
+    return _ENEMIES
+
+
+def get_random_enemy(location: Location, pool: str = '', last_chosen_id: Optional[int] = None,
+                     rng: Optional[random.Random] = None) -> 'BotEntityBuilder':
+    rng = get_random(rng)
     possible_enemies: list['BotEntityBuilder'] = _ENEMIES[location][pool]
     if len(possible_enemies) == 0:
         return get_enemy(-1)
@@ -65,7 +71,7 @@ def get_random_enemy(location: Location, pool: str = '', last_chosen_id: Optiona
             if possible_enemies[i].enemy_id != last_chosen_id:
                 return possible_enemies[i]
     for i in range(50):
-        chosen = random.choice(possible_enemies)
+        chosen = rng.choice(possible_enemies)
         if chosen.enemy_id != last_chosen_id:
             return chosen
-    return random.choice(possible_enemies)
+    return rng.choice(possible_enemies)
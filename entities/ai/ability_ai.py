@@ -1,11 +1,11 @@
-import random
 import typing
+from typing import Optional, Any
 
 from autoslot import Slots
 
 from entities.ai.base_ai import BotAI
 from enums.battle_emoji import BattleEmoji
-from item_data.abilities import AbilityContainer
+from item_data.abilities import AbilityContainer, AbilityEnum
 
 if typing.TYPE_CHECKING:
     from adventure_classes.generic.battle.battle import BattleActionData
@@ -32,6 +32,15 @@ class AbilityAI(BotAI):
         if self._ability_decisions:
             self._min_ap = min(x.get_cost() for x in self._ability_decisions)
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {'type': 'ability', 'decisions': [[x.min_hp, x.max_hp, x.ability.ability.name, x.ability.tier, x.uses]
+                                                 for x in self._ability_decisions]}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'AbilityAI':
+        return AbilityAI([AbilityDecision(min_hp, max_hp, AbilityContainer(AbilityEnum[ability], tier), uses)
+                          for min_hp, max_hp, ability, tier, uses in data['decisions']])
+
     def decide(self, battle_entity: 'BattleEntity', data: 'BattleActionData') -> BattleEmoji:
         best: int = -1
         first_most_attacked: 'BattleEntity' = next(iter(data.targeted_entities.keys()))
@@ -49,7 +58,7 @@ class AbilityAI(BotAI):
                         ability_decision.get_cost()) and ability_decision.uses > 0:
                     potential_abilities.append(ability_decision)
             if potential_abilities:
-                ability_decision: AbilityDecision = random.choice(potential_abilities)
+                ability_decision: AbilityDecision = data.rng.choice(potential_abilities)
                 ability_decision.uses -= 1
                 data.override_ability = ability_decision.ability
                 return BattleEmoji.SPELL_1
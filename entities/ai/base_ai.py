@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import typing
+from typing import Optional, Any
 
 from enums.battle_emoji import BattleEmoji
 
@@ -13,6 +14,10 @@ class BotAI(ABC):
     def decide(self, battle_entity: 'BattleEntity', data: 'BattleActionData') -> BattleEmoji:
         pass
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        # None if it can't be restored
+        return None
+
 
 class BaseBotAI(BotAI):
     def decide(self, battle_entity: 'BattleEntity', data: 'BattleActionData') -> BattleEmoji:
@@ -23,3 +28,6 @@ class BaseBotAI(BotAI):
                 first_most_attacked = battle_entity
         data.target_entity = first_most_attacked
         return BattleEmoji.ATTACK
+
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {'type': 'base'}
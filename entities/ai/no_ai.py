@@ -1,4 +1,5 @@
 import typing
+from typing import Optional, Any
 
 from entities.ai.base_ai import BotAI
 from enums.battle_emoji import BattleEmoji
@@ -11,3 +12,6 @@ if typing.TYPE_CHECKING:
 class NoAI(BotAI):
     def decide(self, battle_entity: 'BattleEntity', data: 'BattleActionData') -> BattleEmoji:
         return BattleEmoji.WAIT
+
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        return {'type': 'none'}
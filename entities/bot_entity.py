@@ -1,4 +1,8 @@
-from entities.ai.base_ai import BotAI
+from typing import Optional, Any
+
+from entities.ai.ability_ai import AbilityAI
+from entities.ai.base_ai import BotAI, BaseBotAI
+from entities.ai.no_ai import NoAI
 # from item_data.abilities import AbilityInstance
 from entities.entity import Entity
 from item_data.abilities import AbilityEnum
@@ -16,6 +20,18 @@ class BotEntity(Entity):
                                   for stat in Stat
                                   if stat.is_persistent() and stat in stat_dict}
 
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        ai: Optional[dict[str, Any]] = self._ai.to_dict()
+        if ai is None:
+            return None
+        return {'name': self._name, 'stats': {stat.get_abv(): value for stat, value in self._stat_dict.items()},
+                'ai': ai}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'BotEntity':
+        return BotEntity(data['name'], {Stat.get_by_abv(abv): value for abv, value in data['stats'].items()},
+                         ai_from_dict(data['ai']))
+
     def get_ai(self) -> BotAI:
         return self._ai
 
@@ -28,3 +44,11 @@ class BotEntity(Entity):
             if stat in self._stat_dict:
                 dc.append(stat.print(self._stat_dict.get(stat, 0)))
         return '\n'.join(dc)
+
+
+def ai_from_dict(data: dict[str, Any]) -> BotAI:
+    if data['type'] == 'ability':
+        return AbilityAI.from_dict(data)
+    elif data['type'] == 'none':
+        return NoAI()
+    return BaseBotAI()
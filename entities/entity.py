@@ -1,8 +1,8 @@
 from abc import abstractmethod, ABC
-from typing import Optional
+from typing import Optional, Any
 
 from item_data.stat_modifier import StatModifier
-from item_data.abilities import AbilityContainer
+from item_data.abilities import AbilityContainer, AbilityEnum
 from item_data.stat import Stat
 
 
@@ -14,12 +14,20 @@ class Entity(ABC):
         if modifiers is None:
             modifiers = []
         self._stat_modifiers: list[StatModifier] = modifiers
+        self._stats_version: int = 0  # Changes whenever stats or modifiers do, for effective stat caches
+
+    def _invalidate_stats(self) -> None:
+        self._stats_version += 1
+
+    def get_stats_version(self) -> int:
+        return self._stats_version
 
     def add_modifier(self, modifier: StatModifier) -> None:
         if modifier.persistent:
             self.set_persistent_value(modifier.stat, round(modifier.apply(self.get_persistent_value(modifier.stat))))
         else:
             self._stat_modifiers.append(modifier)
+            self._invalidate_stats()
 
     def get_modifiers(self) -> list[StatModifier]:
         return self._stat_modifiers
@@ -31,6 +39,7 @@ class Entity(ABC):
             self._stat_modifiers[i].duration -= 1
             if self._stat_modifiers[i].duration == 0:
                 del self._stat_modifiers[i]
+                self._invalidate_stats()
 
     def step_battle_modifiers(self):
         for i in range(len(self._stat_modifiers) - 1, -1, -1):
@@ -38,9 +47,11 @@ class Entity(ABC):
                 self._stat_modifiers[i].duration -= 1
                 if self._stat_modifiers[i].duration == 0:
                     del self._stat_modifiers[i]
+                    self._invalidate_stats()
 
     def clear_stat_modifiers(self) -> None:
         self._stat_modifiers.clear()
+        self._invalidate_stats()
 
     def get_stat(self, stat: Stat, default: Optional[int] = 0) -> Optional[int]:
         return self._stat_dict.get(stat, default)
@@ -66,6 +77,22 @@ class Entity(ABC):
     def get_stat_dict(self) -> dict[Stat, int]:
         return self._stat_dict
 
+    def get_state(self) -> dict[str, Any]:
+        # What battles read from the entity right now, see battle_replay
+        return {
+            'stats': {stat.get_abv(): self.get_stat(stat) for stat in Stat if self.get_stat(stat)},
+            'persistent': {stat.get_abv(): value for stat, value in self._persistent_stats.items()},
+            'modifiers': [modifier.to_dict() for modifier in self._stat_modifiers],
+            'abilities': [[ability.ability.name, ability.tier] for ability in self._abilities]
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        self._stat_dict = {Stat.get_by_abv(abv): value for abv, value in state['stats'].items()}
+        self._persistent_stats = {Stat.get_by_abv(abv): value for abv, value in state['persistent'].items()}
+        self._stat_modifiers = [StatModifier.from_dict(modifier) for modifier in state['modifiers']]
+        self._abilities = [AbilityContainer(AbilityEnum[name], tier) for name, tier in state['abilities']]
+        self._invalidate_stats()
+
     def set_persistent_value(self, stat: Stat, new_value: int) -> None:
         max_value = stat.get_value(self.get_stat(stat))
         if new_value > max_value:
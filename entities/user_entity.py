@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Any
 
 from entities.entity import Entity
 from enums.item_type import EquipmentType
@@ -39,6 +39,10 @@ class UserEntity(Entity):
         else:
             return self._stat_dict.get(stat, default) + self._base_dict.get(stat, default)
 
+    def set_state(self, state: dict[str, Any]) -> None:
+        self._base_dict = {}  # Stats of the state already add the class ones
+        super().set_state(state)
+
     def update_equipment(self, item_list: dict[EquipmentType, Equipment]):
         self._stat_dict.clear()
         # self._available_abilities.clear()
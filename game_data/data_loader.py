@@ -2,8 +2,16 @@ from enemy_data import enemy_utils
 from helpers import translate
 from item_data import item_loader
 
+_LOADED: bool = False
+
 
 def load():
+    global _LOADED
     translate.load()
     item_loader.load()
     enemy_utils.load()
+    _LOADED = True
+
+
+def is_loaded() -> bool:
+    return _LOADED
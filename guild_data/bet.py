@@ -1,6 +1,7 @@
 import asyncio
 import math
-import random
+from contextlib import AsyncExitStack
+from typing import Optional
 
 from discord_slash import SlashContext
 
@@ -9,6 +10,9 @@ from db.database import PostgreSQL
 from helpers import storage
 from enums.emoji import Emoji
 from helpers.dictref import DictRef
+from helpers.keyed_lock import USER_LOCKS, GUILD_LOCKS
+from helpers.scheduler import SCHEDULER
+from helpers.seeded_random import SeededRandom, ROOT
 from helpers.translate import tr
 from user_data.user import User
 from utils import TimeSlot, TimeMetric
@@ -34,24 +38,27 @@ class Bet:
         (999999999999, ['robot', 'sunglasses', 'cowboy'])
     ]
 
-    def __init__(self, db: PostgreSQL, bet_ref: DictRef[dict], lang: DictRef[str]):
+    def __init__(self, db: PostgreSQL, bet_ref: DictRef[dict], lang: DictRef[str], guild_id: int):
         self._db = db
+        self._guild_id: int = guild_id
         self._lang: DictRef[str] = lang
         self._bet_ref: DictRef[dict] = bet_ref
         self._info_changed: bool = False
         self._stored_info = None
         self._bot: BetBot
         self._limit: int = 0
+        self.rng: SeededRandom = SeededRandom()  # One stream per bet, its seed is kept with the bets
         if self.is_active():
+            # USER ID AS A KEY IN JSON IS SAVED AS A STRING! CAREFUL
+            users = storage.get_users(self._db, [int(user_id) for user_id in self._bet_ref['bets']])
             for user_id, bet_data in self._bet_ref['bets'].items():
-                # USER ID AS A KEY IN JSON IS SAVED AS A STRING! CAREFUL
-                user = storage.get_user(self._db, int(user_id))
-                user.add_money(bet_data[1])
+                users[int(user_id)].add_money(bet_data[1])
             self._bet_ref.set({})
 
     def _start(self, ctx: SlashContext, limit: int = 1000):
         self._info_changed = True
         finish_time = utils.now() + Bet.DURATION
+        self.rng = ROOT.spawn()
         pool = []
         for x in Bet.BOT_POOL:
             if limit <= x[0]:
@@ -60,7 +67,7 @@ class Bet:
         infinite_check = 100
         i = 0
         while infinite_check > 0:
-            if random.random() < 0.4:
+            if self.rng.random() < 0.4:
                 break
             i += 1
             infinite_check -= 1
@@ -70,25 +77,50 @@ class Bet:
         self._limit = limit
         self._bet_ref.set({
             'bets': {},
-            'finish_time': finish_time
+            'finish_time': finish_time,
+            'seed': self.rng.initial_seed
         })
-        asyncio.create_task(self._start_loop(ctx, finish_time))
+        SCHEDULER.call_later(Bet.DURATION - 120, self._on_reminder, ctx, finish_time)  # X - 2 minutes
 
-    async def _start_loop(self, ctx: SlashContext, finish_time: int):
-        await asyncio.sleep(Bet.DURATION - 120)  # X - 2 minutes
+    def _on_reminder(self, ctx: SlashContext, finish_time: int):
         if self.is_active() and self._bet_ref['finish_time'] == finish_time:
-            await ctx.send(self.print())
-        else:
-            return
-        await asyncio.sleep(120)  # 2 minutes
+            asyncio.ensure_future(ctx.send(self.print()))
+            SCHEDULER.call_later(120, self._on_end, ctx, finish_time)  # 2 minutes
 
+    def _on_end(self, ctx: SlashContext, finish_time: int):
         if self.is_active() and self._bet_ref['finish_time'] == finish_time:
-            await self.end_bet(ctx)
+            asyncio.ensure_future(self._end(ctx, finish_time))
+
+    async def _end(self, ctx: SlashContext, finish_time: int) -> None:
+        # Locks taken as commands take them, users before the guild. Any bettor may win, so all of them are locked
+        msg: Optional[str] = None
+        while msg is None:
+            user_ids: list[int] = sorted(int(user_id) for user_id in self._bet_ref['bets'])
+            async with AsyncExitStack() as stack:
+                try:
+                    for user_id in user_ids:
+                        await stack.enter_async_context(USER_LOCKS.hold(user_id))
+                    await stack.enter_async_context(GUILD_LOCKS.hold(self._guild_id))
+                except asyncio.TimeoutError:
+                    SCHEDULER.call_later(Bet.INFO_DELAY, self._on_end, ctx, finish_time)  # Busy, try again later
+                    return
+                async with self._db.checkout():
+                    guild = await self._db.aio.run(storage.get_guild, self._db, self._guild_id)
+                    if (guild.bet is not self) or (not self.is_active()) or \
+                            (self._bet_ref['finish_time'] != finish_time):
+                        return  # Refunded by a reload of the guild, or another bet
+                    if any(int(user_id) not in user_ids for user_id in self._bet_ref['bets']):
+                        continue  # Someone joined while waiting for the locks
+                    msg = await self.end_bet()
+                    await guild.save()
+                    await self._db.aio.commit()
+        await ctx.send(msg)
 
     def update_bet(self) -> None:
         self._bet_ref.set(self._bet_ref.get())
 
-    async def end_bet(self, ctx: SlashContext) -> None:
+    async def end_bet(self) -> str:
+        # Pays the winner and resets the bet, the caller holds the locks and sends the returned message
         assert self.is_active(), "Cannot stop an inactive bet"
         user_ids = []
         weights = []
@@ -97,7 +129,7 @@ class Bet:
             weights.append(single_bet[1])
         user_ids.append('BOT')
         weights.append(self._bot.get_bet())
-        winner_id = random.choices(user_ids, weights=weights, k=1)[0]
+        winner_id = self.rng.choices(user_ids, weights=weights, k=1)[0]
         result = ['~ ' + tr(self._lang.get(), 'BET.FINISH') + ' ~']
         total_bet = self.get_bet_sum() + self._bot.get_bet()
         money_str = utils.print_money(self._lang.get(), total_bet)
@@ -105,11 +137,12 @@ class Bet:
             result.append(tr(self._lang.get(), 'BET.BOT_WON', name=self._bot.icon, money=money_str))
         else:
             result.append(tr(self._lang.get(), 'BET.WON', name=self._bet_ref['bets'][winner_id][0], money=money_str))
-            user = storage.get_user(self._db, winner_id)
+            user = await self._db.aio.run(storage.get_user, self._db, int(winner_id))
             user.add_money(total_bet)
-        await ctx.send('\n'.join(result))
+            await user.save()
         self._bet_ref.set({})
         self._stored_info = None
+        return '\n'.join(result)
 
     def print(self) -> str:
         s = max(self._bet_ref['finish_time'] - utils.now(), 0)
@@ -210,13 +243,13 @@ class Cowboy(BetBot):
 
     def on_bet(self, increment: int, total: int, first_bet: int, bet: Bet) -> None:
         if total == first_bet:
-            if random.randint(0, 1) == 0:
+            if bet.rng.randint(0, 1) == 0:
                 self.brave += 1
-        increase_to = int(bet.get_bet_sum() * math.sqrt(bet.get_bet_count()) * (0.8 + random.random() / 5))
+        increase_to = int(bet.get_bet_sum() * math.sqrt(bet.get_bet_count()) * (0.8 + bet.rng.random() / 5))
         limit_pct = min((0.75 + 0.1 * self.brave), 2)
         limit = int(self.limit * limit_pct)
         if increment < (total - increment) * 0.5:
-            increase_to = max(increase_to, bet.get_bet_sum() + increment * (0.8 + random.random() / 3))
+            increase_to = max(increase_to, bet.get_bet_sum() + increment * (0.8 + bet.rng.random() / 3))
         self.increase_bet_to(min(increase_to, limit))
 
 
@@ -228,16 +261,16 @@ class Sunglasses(BetBot):
 
     def on_bet(self, increment: int, total: int, first_bet: int, bet: Bet) -> None:
         if total == first_bet:
-            if random.randint(0, 1) == 0:
+            if bet.rng.randint(0, 1) == 0:
                 self.scared += 1
-        increase_to = int((bet.get_bet_sum() * (0.9 + random.random() * 0.2)) / (float(self.scared) / 2 + 1))
+        increase_to = int((bet.get_bet_sum() * (0.9 + bet.rng.random() * 0.2)) / (float(self.scared) / 2 + 1))
         limit_pct = 2
         limit = int(self.limit * limit_pct)
         if increment < bet.get_bet_max() * 0.5:
-            increase_to = max(increase_to, bet.get_bet_sum() + increment * (1.5 + random.random() / 0.5))
+            increase_to = max(increase_to, bet.get_bet_sum() + increment * (1.5 + bet.rng.random() / 0.5))
         elif increment < bet.get_bet_max() * 0.75:
-            if random.randint(0, 1) == 0:
-                increase_to = max(increase_to, bet.get_bet_sum() + increment * (1 + random.random()))
+            if bet.rng.randint(0, 1) == 0:
+                increase_to = max(increase_to, bet.get_bet_sum() + increment * (1 + bet.rng.random()))
         self.increase_bet_to(min(increase_to, limit))
 
 
@@ -251,9 +284,9 @@ class Robot(BetBot):
 
     def on_bet(self, increment: int, total: int, first_bet: int, bet: Bet) -> None:
         if total == first_bet:
-            if random.randint(0, 1) == 0:
+            if bet.rng.randint(0, 1) == 0:
                 self.scared += 1
-        increase_to = int(bet.get_bet_max() * (1.9 + random.random() * 0.2))
+        increase_to = int(bet.get_bet_max() * (1.9 + bet.rng.random() * 0.2))
         if total > first_bet * 5:
             self.limit_pct += 0.5 / (self.happened + 1)
             self.happened += 1
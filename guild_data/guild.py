@@ -1,8 +1,9 @@
+from typing import Optional
+
 import utils
-from db.database import PostgreSQL
+from db.database import PostgreSQL, SQLDict
 from helpers.dictref import DictRef
 from helpers.incremental import Incremental
-from db import database
 from db.row import Row
 from enums.emoji import Emoji
 from guild_data.bet import Bet
@@ -18,16 +19,19 @@ class Guild(Row):
     LEADERBOARD_TOP: int = 5
     SHOP_DURATION: TimeSlot = TimeSlot(TimeMetric.HOUR, 1)
 
-    def __init__(self, db: PostgreSQL, guild_id: int):
-        super().__init__(db, "guilds", dict(id=guild_id))
+    def __init__(self, db: PostgreSQL, guild_id: int, row_data: SQLDict = None,
+                 shop_items: Optional[list[SQLDict]] = None):
+        super().__init__(db, "guilds", dict(id=guild_id), row_data=row_data)
         self.id: int = guild_id
         self._box: Incremental = Incremental(DictRef(self._data, 'table_money'),
                                              DictRef(self._data, 'table_money_time'),
                                              Guild.TABLE_INCREMENT)
         self._lang: DictRef[str] = DictRef(self._data, 'lang')
-        self.bet: Bet = Bet(db, DictRef(self._data, 'ongoing_bet'), self._lang)
+        self.bet: Bet = Bet(db, DictRef(self._data, 'ongoing_bet'), self._lang, guild_id)
         self.registered_user_ids: set[int] = set(self._data['user_ids'])
         self.shop: Shop = Shop(db, self._lang, DictRef(self._data, 'shop_time'), self.id)
+        if shop_items:
+            self.shop.load_items(shop_items)
 
     def get_lang(self) -> str:
         return self._lang.get()
@@ -42,10 +46,10 @@ class Guild(Row):
 
     def print_leaderboard(self) -> str:
         self._db.execute(f"SELECT last_name, money FROM users "
-                         f"INNER JOIN guilds ON guilds.id = {self.id} "
-                         f"AND users.id = ANY({database.convert_sql_value(list(self.registered_user_ids))}) "
+                         f"INNER JOIN guilds ON guilds.id = %s "
+                         f"AND users.id = ANY(%s) "
                          f"ORDER BY money DESC "
-                         f"LIMIT {Guild.LEADERBOARD_TOP}")
+                         f"LIMIT {Guild.LEADERBOARD_TOP}", [self.id, list(self.registered_user_ids)])
         users = self._db.get_cursor().fetchall()
         ld = [f"{Emoji.TROPHY} Top {Guild.LEADERBOARD_TOP} players:"]
         for i in range(len(users)):
@@ -1,4 +1,3 @@
-import random
 import typing
 from typing import Any
 
@@ -9,9 +8,10 @@ from enums.location import Location
 from enums.item_rarity import ItemRarity
 from helpers.action_result import ActionResult
 from helpers.dictref import DictRef
+from helpers.seeded_random import SeededRandom, ROOT
 from item_data import item_utils, item_loader
 from item_data.item_classes import Equipment, RandomEquipmentBuilder, Item, Potion
-from item_data.item_utils import create_guild_item, transfer_guild_to_user, clone_item, create_user_item
+from item_data.item_utils import create_guild_items, transfer_guild_to_user, clone_item, create_user_item
 from user_data.inventory import Inventory, SlotType
 from utils import TimeSlot, TimeMetric
 if typing.TYPE_CHECKING:
@@ -164,47 +164,40 @@ class Shop:
         raise ValueError(f"Unknown shop slot >{slot}<")
 
     def _fetch_shop(self):
-        items_data = self._db.start_join('guilds', dict(id=self._guild_id), columns=['slot', 'item_id'],
-                                         limit=Shop.ITEM_AMOUNT + Shop.POTION_AMOUNT) \
-            .join('guild_items', field_matches=[('guild_id', 'id')]) \
-            .execute()
+        self.load_items(self._db.get_owned_items('guild_items', 'guild_id', [self._guild_id]))
+
+    def load_items(self, items_data: list[dict[str, Any]]) -> None:
         for isd in items_data:
             slot: str = isd['slot'].strip()
-            item_id: int = isd['item_id']
-            item_dict: dict[str, Any] = self._db.get_row_data('items', dict(id=item_id))
-            item: Item = item_utils.get_from_dict(item_id, item_dict['desc_id'], item_dict['data'])
+            item: Item = item_utils.get_from_dict(isd['item_id'], isd['desc_id'], isd['data'])
             self._get_dict_ref(slot).set(item)
 
     def _clear_shop(self) -> None:
-        shop_items: dict[int, Item] = self._shop_items
-        shop_len: int = len([1 for x in shop_items if x is not None])
-        if shop_len > 0:
-            self._db.delete_row("guild_items", dict(guild_id=self._guild_id), shop_len)
-        for item in shop_items.values():
-            if item is not None:
-                self._db.delete_row("items", dict(id=item.get_id()))
+        item_ids: list[int] = [item.get_id() for item in self._shop_items.values() if item is not None]
+        # Links go first, items are referenced by them
+        self._db.delete_rows_in("guild_items", "item_id", item_ids)
+        self._db.delete_rows_in("items", "id", item_ids)
         self._shop_items.clear()
 
     def _restock_shop(self) -> bool:
-        restocked = False
+        # Same items for the same root seed, guild and second
+        rng: SeededRandom = ROOT.derive('shop', self._guild_id, utils.now())
+        to_create: list[tuple[Item, str]] = []
         for i in range(1, Shop.ITEM_AMOUNT + 1):
             if i not in self._shop_items:
-                equipment: Equipment = Shop.ITEM_BUILDER.build()
-                create_guild_item(self._db, self._guild_id, equipment, str(i))
-                if random.random() < 0.2:
-                    if random.random() < 0.5:
+                equipment: Equipment = Shop.ITEM_BUILDER.build(rng)
+                to_create.append((equipment, str(i)))
+                if rng.random() < 0.2:
+                    if rng.random() < 0.5:
                         equipment.price_modifier = 0.8
                     else:
                         equipment.price_modifier = 1.2
                 self._last_valid_checks.add(i)
                 self._shop_items[i] = equipment
-                restocked = True
         if 0 not in self._shop_potions:
             potion: Potion = Potion()
-            potion.build(random.choice(item_loader.get_potion_list()).id)
-            create_guild_item(self._db, self._guild_id, potion, f"p")
+            potion.build(rng.choice(item_loader.get_potion_list()).id)
+            to_create.append((potion, "p"))
             self._shop_potions[0] = potion
-            restocked = True
-        if restocked > 0:
-            return True
-        return False
+        create_guild_items(self._db, self._guild_id, to_create)
+        return len(to_create) > 0
@@ -1,35 +1,170 @@
-from collections import UserDict
-
-import utils
+import threading
+import time
+from collections import UserDict, OrderedDict
+from typing import Optional, Callable, Any
 
 
 class Cache(UserDict):
-    REMOVE_PCT: float = 0.2
+    def __init__(self, d=None, limit: int = 100, ttl: Optional[float] = None,
+                 weigher: Optional[Callable[[Any], int]] = None, max_weight: Optional[int] = None,
+                 on_evict: Optional[Callable[[Any, Any], None]] = None,
+                 is_pinned: Optional[Callable[[Any], bool]] = None):
+        self.limit: int = limit
+        self.ttl: Optional[float] = ttl
+        self.max_weight: Optional[int] = max_weight
+        self._weigher: Optional[Callable[[Any], int]] = weigher
+        self._on_evict: Optional[Callable[[Any, Any], None]] = on_evict
+        self._is_pinned: Optional[Callable[[Any], bool]] = is_pinned
+        self._lock: threading.RLock = threading.RLock()
+        # Keys whose on_evict has not returned yet, see wait_evicted
+        self._evicting: set = set()
+        self._evicted: threading.Condition = threading.Condition(self._lock)
+        self._weight: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        super().__init__()
+        # Key -> (value, last access, weight), least recently used first
+        self.data: OrderedDict = OrderedDict()
+        if d is not None:
+            self.update(d)
+
+    def _is_expired(self, entry: tuple) -> bool:
+        return (self.ttl is not None) and (time.monotonic() - entry[1] > self.ttl)
+
+    def _pop_entry(self, key: object) -> tuple:
+        entry = self.data.pop(key)
+        self._weight -= entry[2]
+        return entry
+
+    def _collect_evictions(self) -> list[tuple[object, object]]:
+        # Least recently used entries go first, pinned ones are kept (and refreshed)
+        evicted: list[tuple[object, object]] = []
+        if len(self.data) > self.limit:
+            self._evict_oldest(len(self.data) - self.limit, evicted, lambda: True)  # Only the overflow
+        if self.max_weight is not None:
+            self._evict_oldest(len(self.data), evicted, lambda: self._weight > self.max_weight)
+        return evicted
+
+    def _evict_oldest(self, amount: int, evicted: list[tuple[object, object]], condition: Callable[[], bool]) -> None:
+        checked: int = 0
+        while amount > 0 and self.data and condition() and checked < len(self.data):
+            key, entry = next(iter(self.data.items()))
+            if self._is_pinned and self._is_pinned(entry[0]):
+                self.data.move_to_end(key)
+                checked += 1
+                continue
+            self._pop_entry(key)
+            self.evictions += 1
+            self._add_evicted(evicted, key, entry[0])
+            amount -= 1
+
+    def _add_evicted(self, evicted: list[tuple[object, object]], key: object, value: object) -> None:
+        evicted.append((key, value))
+        if self._on_evict:
+            self._evicting.add(key)
+
+    def _notify(self, evicted: list[tuple[object, object]]) -> None:
+        # Outside the lock, callbacks may take their time (e.g. saving to the database)
+        if self._on_evict:
+            for key, value in evicted:
+                try:
+                    self._on_evict(key, value)
+                finally:
+                    with self._evicted:
+                        self._evicting.discard(key)
+                        self._evicted.notify_all()
 
-    def __init__(self, d=None, limit: int = 100):
-        super().__init__(d)
-        self.limit = limit
+    def wait_evicted(self, key: object, timeout: Optional[float] = None) -> bool:
+        # Reloads of a key wait for the on_evict of its previous value, so they don't miss what it saves
+        with self._evicted:
+            return self._evicted.wait_for(lambda: key not in self._evicting, timeout)
 
-    def try_clean(self):
-        k_v = list(self.data.items())
-        k_v.sort(key=lambda x: x[1][1])
-        for k in range(int(self.limit * Cache.REMOVE_PCT)):
-            del self.data[k]
+    def _lookup(self, key: object) -> Optional[tuple]:
+        evicted: list[tuple[object, object]] = []
+        with self._lock:
+            entry = self.data.get(key)
+            if entry is not None and self._is_expired(entry):
+                if self._is_pinned and self._is_pinned(entry[0]):
+                    entry = (entry[0], time.monotonic(), entry[2])
+                    self.data[key] = entry
+                else:
+                    self._pop_entry(key)
+                    self.expirations += 1
+                    self._add_evicted(evicted, key, entry[0])
+                    entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.data[key] = (entry[0], time.monotonic(), entry[2])
+                self.data.move_to_end(key)
+        self._notify(evicted)
+        return entry
 
     def clear_all(self):
-        self.data.clear()
+        with self._lock:
+            self.data.clear()
+            self._weight = 0
 
     def __setitem__(self, key: object, value: object):
-        super().__setitem__(key, (value, utils.now()))
-        if len(self.data) > self.limit:
-            self.try_clean()
+        weight: int = self._weigher(value) if self._weigher else 1
+        with self._lock:
+            if key in self.data:
+                self._pop_entry(key)
+            self.data[key] = (value, time.monotonic(), weight)
+            self._weight += weight
+            evicted = self._collect_evictions()
+        self._notify(evicted)
 
     def __getitem__(self, key: object):
-        cached_item = super().__getitem__(key)
-        if cached_item:
-            cached_item = (cached_item[0], utils.now())
-            return cached_item[0]
-        return cached_item
+        entry = self._lookup(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[0]
+
+    def __delitem__(self, key: object):
+        with self._lock:
+            self._pop_entry(key)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self.data.get(key)
+        return (entry is not None) and (not self._is_expired(entry))
 
     def get(self, key: object, default_value=None):
-        return self.data.get(key, (default_value,))[0]
+        entry = self._lookup(key)
+        if entry is None:
+            return default_value
+        return entry[0]
+
+    def peek(self, key: object, default_value=None):
+        # No stats nor recency update
+        entry = self.data.get(key)
+        if (entry is None) or self._is_expired(entry):
+            return default_value
+        return entry[0]
+
+    def values(self) -> list:
+        with self._lock:
+            return [entry[0] for entry in self.data.values()]
+
+    def items(self) -> list[tuple[object, object]]:
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self.data.items()]
+
+    def get_weight(self) -> int:
+        return self._weight
+
+    def get_stats(self) -> dict[str, float]:
+        lookups: int = self.hits + self.misses
+        return {
+            'size': len(self.data),
+            'limit': self.limit,
+            'weight': self._weight,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
@@ -1,13 +1,20 @@
+import asyncio
+import itertools
 import traceback
 import typing
+from collections import Counter
+from contextlib import AsyncExitStack
 from typing import Optional, Callable
 
 from discord_slash import SlashCommand, SlashContext
 
 from commands import tutorial
 from db.database import PostgreSQL
-from helpers import storage
+from helpers import storage, traffic
+from helpers.keyed_lock import USER_LOCKS, GUILD_LOCKS
 from enums.emoji import Emoji
+from helpers.metrics import CommandMetrics, PhaseTimer
+from helpers.responder import Responder
 from helpers.translate import tr
 
 if typing.TYPE_CHECKING:
@@ -15,10 +22,32 @@ if typing.TYPE_CHECKING:
     from guild_data.guild import Guild
 
 
+def get_command_name(func: Callable) -> str:
+    return f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+
+# Options of register_command that are not command arguments
+COMMAND_FLAGS: tuple[str, ...] = ('ignore_battle', 'guild_only', 'ignore_all', 'guild_lock', 'slow', 'defer_hidden')
+
+
+def get_cached_lang(ctx: SlashContext) -> str:
+    # Without loading anything from the database
+    if ctx.guild_id is not None:
+        guild: Optional['Guild'] = storage.GUILD_CACHE.peek(ctx.guild_id)
+        if guild is not None:
+            return guild.get_lang()
+    user: Optional['User'] = storage.USER_CACHE.peek(ctx.author_id)
+    if user is not None:
+        return user.get_lang()
+    return 'en'
+
+
 class CommandHandler:
-    def __init__(self, db: PostgreSQL, slash: SlashCommand):
+    def __init__(self, db: PostgreSQL, slash: SlashCommand, defer_budget: float = Responder.DEFAULT_BUDGET):
         self.db = db
         self.slash = slash
+        self.metrics: CommandMetrics = CommandMetrics()
+        self.defer_budget: float = defer_budget  # Seconds before an unanswered command is deferred
 
     def register_command(self,
                          cmd_calls: Callable,
@@ -30,7 +59,10 @@ class CommandHandler:
                          options: Optional[list[dict]] = None,
                          ignore_battle: bool = False,
                          guild_only: bool = False,
-                         ignore_all: bool = False):
+                         ignore_all: bool = False,
+                         guild_lock: bool = False,
+                         slow: bool = False,
+                         defer_hidden: bool = False):
         if options is None:
             options = []
         if guild_only:
@@ -41,6 +73,9 @@ class CommandHandler:
                 kwargs['ignore_battle'] = ignore_battle or ignore_all
                 kwargs['guild_only'] = guild_only
                 kwargs['ignore_all'] = ignore_all
+                kwargs['guild_lock'] = guild_lock
+                kwargs['slow'] = slow
+                kwargs['defer_hidden'] = defer_hidden
                 await self.call(ctx, cmd_calls, *args, **kwargs)
         else:
             @self.slash.slash(name=name, description=description, options=options, guild_ids=guild_ids)
@@ -48,10 +83,55 @@ class CommandHandler:
                 kwargs['ignore_battle'] = ignore_battle or ignore_all
                 kwargs['guild_only'] = guild_only
                 kwargs['ignore_all'] = ignore_all
+                kwargs['guild_lock'] = guild_lock
+                kwargs['slow'] = slow
+                kwargs['defer_hidden'] = defer_hidden
                 await self.call(ctx, cmd_calls, **kwargs)
 
     async def call(self, ctx: SlashContext, func, *args, **kwargs):
-        cmd = Command(ctx, self.db)  # Create command
+        timer: PhaseTimer = self.metrics.start(get_command_name(func))
+        options: dict = dict(kwargs)  # Before the flags are popped, for the traffic recorder
+        guild_lock: bool = kwargs.pop('guild_lock')
+        responder: Responder = Responder(ctx, self.defer_budget, kwargs.pop('defer_hidden'))
+        try:
+            if kwargs.pop('slow'):
+                await responder.defer()  # Known to take long, acknowledge right away
+            else:
+                responder.start_watchdog()
+            async with AsyncExitStack() as stack:
+                # Locks are taken before the connection, so nobody holds a connection while waiting
+                try:
+                    await stack.enter_async_context(USER_LOCKS.hold(ctx.author_id))
+                    if guild_lock and (ctx.guild_id is not None):
+                        await stack.enter_async_context(GUILD_LOCKS.hold(ctx.guild_id))
+                except asyncio.TimeoutError:
+                    await responder.send(f"{Emoji.ERROR} {tr(get_cached_lang(ctx), 'COMMAND.BUSY')}", hidden=True)
+                    timer.failed = True
+                    return
+                timer.mark('lock')
+                async with self.db.checkout():  # Own connection until the command finishes
+                    timer.mark('checkout')
+                    with self.db.track(timer.name):
+                        await self._call(timer, responder, func, *args, **kwargs)
+        except Exception:
+            timer.failed = True
+            raise
+        finally:
+            responder.stop_watchdog()
+            timer.deferred = responder.deferred
+            if responder.needs_answer():
+                await responder.send(f"{Emoji.ERROR} {tr(get_cached_lang(ctx), 'COMMAND.ERROR')}")
+            self.metrics.finish(timer)
+            recorder: Optional[traffic.TrafficRecorder] = traffic.get_recorder()
+            if recorder is not None:
+                recorder.record_command(timer.started, timer.name, ctx.author_id, ctx.guild_id, args,
+                                        {k: v for k, v in options.items() if k not in COMMAND_FLAGS},
+                                        {k: v for k, v in options.items() if k in COMMAND_FLAGS},
+                                        responder.message_ids)
+
+    async def _call(self, timer: PhaseTimer, responder: Responder, func, *args, **kwargs):
+        ctx: SlashContext = responder.ctx
+        cmd = await self.db.aio.run(Command, responder, self.db)  # Create command (loads user and guild)
 
         # PREVIOUS UPDATES
         if cmd.guild:
@@ -70,6 +150,7 @@ class CommandHandler:
         del kwargs['ignore_battle']
         del kwargs['ignore_all']
         del kwargs['guild_only']
+        timer.mark('load')
 
         tutorial_stage: int = cmd.user.get_tutorial_stage()
         if tutorial_stage != -1 and (cmd.user.get_adventure() is None) and (not ignore_all):
@@ -77,58 +158,123 @@ class CommandHandler:
                 await tutorial.play_tutorial(cmd, tutorial_stage)
             else:
                 await cmd.send_hidden("You must first talk to me in a guild to be able to DM me!")
+            timer.mark('tutorial')
         else:
             try:
                 await func(cmd, *args, **kwargs)  # Execute command
             except Exception as e:  # noqa
-                # Cursor fallback
-                cmd.db.rollback()
-                if cmd.db.get_cursor().closed:
-                    cmd.db.reset_cursor()
+                timer.failed = True
+                # Only this command's transaction is affected
+                await cmd.db.aio.rollback()
                 traceback.print_exc()
+            timer.mark('handler')
 
         # SAVE
-        cmd.user.save()  # Save user data (if any changed)
+        await cmd.user.save()  # Save user data (if any changed)
         if cmd.guild:
-            cmd.guild.save()  # Save server data (if any changed)
-        cmd.db.commit()  # Commit changes (if any)
+            await cmd.guild.save()  # Save server data (if any changed)
+        timer.mark('save')
+        await cmd.db.aio.commit()  # Commit changes (if any)
+        timer.mark('commit')
 
 
 class Command:
-    def __init__(self, ctx: SlashContext, db: PostgreSQL):
-        self.ctx: SlashContext = ctx
+    def __init__(self, responder: Responder, db: PostgreSQL):
+        self.ctx: SlashContext = responder.ctx
+        self.responder: Responder = responder
         self.db = db
-        self.user: User = storage.get_user(db, ctx.author_id)
+        self.user: User = storage.get_user(db, self.ctx.author_id)
         self.guild: Optional[Guild] = None
         self.lang: str = 'en'
-        if ctx.guild_id is not None:
-            self.guild = storage.get_guild(db, ctx.guild_id)
+        if self.ctx.guild_id is not None:
+            self.guild = storage.get_guild(db, self.ctx.guild_id)
             self.lang = self.guild.get_lang()
         else:
             self.lang = self.user.get_lang()
 
     async def send(self, msg: str):
-        return await self.ctx.send(msg)
+        return await self.responder.send(msg)
 
     async def send_hidden(self, msg: str):
         if self.guild:
-            await self.ctx.send(msg, hidden=True)
+            await self.responder.send(msg, hidden=True)
         else:
             await self.send(msg)
 
     async def error(self, msg: str, hidden: bool = True):
-        await self.ctx.send(f"{Emoji.ERROR} {msg}", hidden=hidden)
+        await self.responder.send(f"{Emoji.ERROR} {msg}", hidden=hidden)
+
+
+# Discord calls made through mock messages and contexts, by method
+MOCK_API_CALLS: Counter = Counter()
+_MOCK_MESSAGE_IDS = itertools.count(1)
+
+
+class MockChannel:
+    def __init__(self, channel_id: int):
+        self.id: int = channel_id
+
+
+class MockMessage:
+    def __init__(self, content: str, channel_id: int = 0):
+        self.id: int = next(_MOCK_MESSAGE_IDS)
+        self.content: str = content
+        self.channel: MockChannel = MockChannel(channel_id)
+
+    async def edit(self, content: str):
+        MOCK_API_CALLS['edit'] += 1
+        self.content = content
+
+    async def add_reaction(self, emoji: str):
+        MOCK_API_CALLS['add_reaction'] += 1
+
+    async def remove_reaction(self, emoji: str, member):
+        MOCK_API_CALLS['remove_reaction'] += 1
+
+    async def clear_reaction(self, emoji: str):
+        MOCK_API_CALLS['clear_reaction'] += 1
+
+    async def clear_reactions(self):
+        MOCK_API_CALLS['clear_reactions'] += 1
+
+
+class MockAuthor:
+    def __init__(self, user_id: int, name: str):
+        self.id: int = user_id
+        self.display_name: str = name
+        self.mention: str = f"<@{user_id}>"
 
 
 class MockSlashContext(SlashContext):
-    def __init__(self):  # noqa
-        pass
+    # Enough of an interaction to go through CommandHandler.call without Discord
+    def __init__(self, author_id: int = 0, guild_id: Optional[int] = None, name: str = 'Mock',  # noqa
+                 echo: bool = True):
+        self.author_id: int = author_id
+        self.guild_id: Optional[int] = guild_id
+        self.author: MockAuthor = MockAuthor(author_id, name)
+        self.responded: bool = False
+        self.deferred: bool = False
+        self.echo: bool = echo
+        self.sent: list[tuple[str, bool]] = []
+        self.messages: list[MockMessage] = []  # The visible ones in sent
+
+    async def defer(self, hidden: bool = False):  # noqa
+        MOCK_API_CALLS['defer'] += 1
+        self.deferred = True
 
     async def send(self, msg: str, hidden: bool = False):  # noqa
-        if hidden:
-            print("(hidden) >", msg)
-        else:
-            print(msg)
+        MOCK_API_CALLS['send'] += 1
+        self.deferred = False
+        self.responded = True
+        self.sent.append((msg, hidden))
+        if self.echo:
+            if hidden:
+                print("(hidden) >", msg)
+            else:
+                print(msg)
+        if not hidden:  # Hidden messages can't be edited nor reacted to
+            self.messages.append(MockMessage(msg, 0 if self.guild_id is None else self.guild_id))
+            return self.messages[-1]
 
 
 class MockCommand(Command):
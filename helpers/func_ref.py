@@ -0,0 +1,28 @@
+import functools
+import importlib
+from typing import Callable, Optional, Any
+
+_JSON_TYPES = (str, int, float, bool, type(None))
+
+
+def to_reference(func: Callable) -> Optional[list[Any]]:
+    # [module, name, args] of a module level function, or of a partial of one with plain arguments
+    args: tuple = ()
+    if isinstance(func, functools.partial):
+        if func.keywords or not all(isinstance(arg, _JSON_TYPES) for arg in func.args):
+            return None
+        args = func.args
+        func = func.func
+    module: Optional[str] = getattr(func, '__module__', None)
+    name: Optional[str] = getattr(func, '__qualname__', None)
+    if (module is None) or (name is None) or ('<' in name):  # Lambdas and closures can't be found again
+        return None
+    return [module, name, list(args)]
+
+
+def from_reference(reference: list[Any]) -> Callable:
+    module, name, args = reference
+    func: Any = importlib.import_module(module)
+    for part in name.split('.'):
+        func = getattr(func, part)
+    return functools.partial(func, *args) if args else func
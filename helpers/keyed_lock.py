@@ -0,0 +1,78 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Hashable
+
+from helpers.metrics import Histogram
+
+
+class _KeyEntry:
+    def __init__(self):
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.users: int = 0  # Holders and waiters, the entry is dropped at 0
+
+
+class KeyedLock:
+    def __init__(self, name: str, timeout: float = 10):
+        self.name: str = name
+        self.timeout: float = timeout
+        self._entries: dict[Hashable, _KeyEntry] = {}
+        self.acquired: int = 0
+        self.contended: int = 0
+        self.timeouts: int = 0
+        self.wait: Histogram = Histogram()
+
+    def is_locked(self, key: Hashable) -> bool:
+        entry: Optional[_KeyEntry] = self._entries.get(key)
+        return (entry is not None) and entry.lock.locked()
+
+    def _release_entry(self, key: Hashable, entry: _KeyEntry) -> None:
+        entry.users -= 1
+        if entry.users == 0:
+            del self._entries[key]
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable, timeout: Optional[float] = None):
+        # Raises asyncio.TimeoutError if the key is not free in time
+        entry: Optional[_KeyEntry] = self._entries.get(key)
+        if entry is None:
+            entry = _KeyEntry()
+            self._entries[key] = entry
+        entry.users += 1
+        started: float = time.perf_counter()
+        if entry.users > 1:  # Someone else holds or waits for it
+            self.contended += 1
+        try:
+            await asyncio.wait_for(entry.lock.acquire(), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._release_entry(key, entry)
+            raise
+        except BaseException:
+            self._release_entry(key, entry)
+            raise
+        self.acquired += 1
+        self.wait.add((time.perf_counter() - started) * 1000)
+        try:
+            yield
+        finally:
+            entry.lock.release()
+            self._release_entry(key, entry)
+
+    def get_stats(self) -> dict[str, float]:
+        return {
+            'held': len([1 for x in self._entries.values() if x.lock.locked()]),
+            'acquired': self.acquired,
+            'contended': self.contended,
+            'timeouts': self.timeouts,
+            'wait_p95': self.wait.percentile(95),
+            'wait_max': self.wait.max,
+        }
+
+    def print(self) -> str:
+        return f"{self.name} lock: {self.get_stats()}"
+
+
+# Commands and reactions of one user run one at a time, the same for guild state (shop, bet, crate)
+USER_LOCKS: KeyedLock = KeyedLock('user')
+GUILD_LOCKS: KeyedLock = KeyedLock('guild')
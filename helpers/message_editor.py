@@ -0,0 +1,105 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+from typing import Optional, Hashable
+
+import discord
+from discord import Message
+
+
+class EditRateLimiter:
+    # Discord allows about 5 message edits every 5 seconds per channel
+    def __init__(self, amount: int = 5, per: float = 5):
+        self.amount: int = amount
+        self.per: float = per
+        self._edits: dict[Hashable, deque[float]] = {}  # Recent edit times per channel
+        self.waits: int = 0
+
+    def _remove_stale(self, now: float) -> None:
+        for key in [key for key, times in self._edits.items() if now - times[-1] > self.per]:
+            del self._edits[key]
+
+    async def wait(self, key: Hashable) -> None:
+        while True:
+            now: float = time.monotonic()
+            times: Optional[deque[float]] = self._edits.get(key)
+            if times is None:
+                if len(self._edits) > 256:
+                    self._remove_stale(now)
+                times = deque(maxlen=self.amount)
+                self._edits[key] = times
+            if (len(times) < self.amount) or (now - times[0] >= self.per):
+                times.append(now)
+                return
+            self.waits += 1
+            await asyncio.sleep(self.per - (now - times[0]))
+
+
+class EditStats:
+    def __init__(self):
+        self.requested: int = 0
+        self.sent: int = 0
+        self.dropped: int = 0  # Intermediate contents replaced before being sent
+        self.failed: int = 0
+        self.pending: int = 0  # Messages waiting to be edited
+
+    def print(self) -> str:
+        return (f"Message edits: requested={self.requested} sent={self.sent} dropped={self.dropped} "
+                f"failed={self.failed} pending={self.pending} rate_limit_waits={EDIT_RATE_LIMITER.waits}")
+
+
+EDIT_RATE_LIMITER: EditRateLimiter = EditRateLimiter()
+EDIT_STATS: EditStats = EditStats()
+
+
+class MessageEditor:
+    # Edits arriving within this window are merged into one
+    WINDOW: float = 0.25
+
+    def __init__(self, message: Message, window: float = WINDOW):
+        self.message: Message = message
+        self.window: float = window
+        self.content: str = message.content  # Latest content, sent or not
+        self._pending: bool = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_channel_key(self) -> Hashable:
+        channel = getattr(self.message, 'channel', None)
+        return getattr(channel, 'id', None)
+
+    def edit(self, content: str) -> None:
+        # Only the latest content is sent, replaced contents are counted as dropped
+        EDIT_STATS.requested += 1
+        if self._pending:
+            EDIT_STATS.dropped += 1
+        else:
+            self._pending = True
+            EDIT_STATS.pending += 1
+        self.content = content
+        if (self._task is None) or self._task.done():
+            self._task = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        await asyncio.sleep(self.window)
+        while self._pending:
+            await EDIT_RATE_LIMITER.wait(self._get_channel_key())
+            self._pending = False
+            EDIT_STATS.pending -= 1
+            try:
+                await self.message.edit(content=self.content)
+                EDIT_STATS.sent += 1
+            except discord.NotFound:
+                EDIT_STATS.failed += 1
+                if self._pending:
+                    self._pending = False
+                    EDIT_STATS.pending -= 1
+                return  # Message deleted, nothing else to edit
+            except discord.HTTPException:
+                EDIT_STATS.failed += 1
+                traceback.print_exc()
+
+    async def flush(self) -> None:
+        # Waits until the latest content has been sent
+        if self._task is not None:
+            await self._task
@@ -1,30 +1,64 @@
+import heapq
 import inspect
 import typing
-from typing import Callable, Optional
+from typing import Callable, Optional, Union
 
 import discord
+from autoslot import Slots
 from discord import Message, Reaction
 
 import utils
 from enums.emoji import Emoji
+from helpers.message_editor import MessageEditor
+from helpers.reaction_queue import ReactionQueue
 
 if typing.TYPE_CHECKING:
     from user_data.user import User
     from adventure_classes.generic.adventure import Adventure
 
 
+def normalize_emoji(emoji: Union[str, Emoji, discord.PartialEmoji, discord.Emoji]) -> Optional[str]:
+    # Reactions may come back without the variation selector the emoji was sent with
+    if isinstance(emoji, Emoji):
+        emoji = emoji.value
+    if not isinstance(emoji, str):
+        return None  # Custom emojis are never hooked
+    return emoji.lstrip('\\').replace('\ufe0f', '')
+
+
+class ReactionHook(Slots):
+    def __init__(self, reaction: Emoji, hook: Callable):
+        self.reaction: Emoji = reaction
+        self.hook: Callable = hook
+        # Hooks take (user, reaction), or only the first few of them
+        self.arg_count: int = min(len(inspect.signature(hook).parameters), 2)
+
+    async def call(self, user: 'User') -> None:
+        await self.hook(*(user, self.reaction)[:self.arg_count])
+
+
 class MessagePlus:
     FINISH_SECONDS: int = utils.TimeSlot(utils.TimeMetric.MINUTE, 14).seconds()
 
-    def __init__(self, message: Message, react_to: Optional[set[int]]):
+    def __init__(self, message: Message, react_to: Optional[set[int]], first_interaction: Optional[int] = None):
         self.message: Message = message
+        self._editor: MessageEditor = MessageEditor(message)
+        self._reactions: ReactionQueue = ReactionQueue(message)
         self.react_to: Optional[set[int]] = react_to
-        self._reaction_hooks: dict[Emoji, Callable] = {}
-        self._first_interaction: int = utils.now()
+        self._reaction_hooks: dict[str, ReactionHook] = {}  # By normalized emoji
+        self._first_interaction: int = utils.now() if first_interaction is None else first_interaction
         self._finished: bool = False
 
     async def edit(self, msg: str):
-        await self.message.edit(content=msg)
+        # Coalesced with other edits of this message, see MessageEditor
+        self._editor.edit(msg)
+
+    def get_content(self) -> str:
+        return self._editor.content
+
+    async def flush(self) -> None:
+        await self._editor.flush()
+        await self._reactions.flush()
 
     def register(self, user_id: int):
         self.react_to.add(user_id)
@@ -38,57 +72,73 @@ class MessagePlus:
             if adventure is not None:
                 if adventure._message != self:  # noqa
                     return
-            for reaction, hook in self._reaction_hooks.items():
-                if reaction.compare(input_reaction.emoji):
-                    li = [user, reaction]
-                    user.update(member.display_name, member)
-                    await hook(*[li[i] for i in range(len(inspect.getfullargspec(hook).args) - 1)])
-                    await input_reaction.remove(member)
-                    user.save()  # Save user data (if any changed)
-                    return
-
+            reaction_hook: Optional[ReactionHook] = self._reaction_hooks.get(normalize_emoji(input_reaction.emoji))
+            if reaction_hook is not None:
+                self._reactions.on_user_reaction(input_reaction.emoji, member)
+                user.update(member.display_name, member)
+                await reaction_hook.call(user)
+                self._reactions.remove(input_reaction.emoji, member)
+                await user.save()  # Save user data (if any changed)
+
+    # Reaction calls are queued (see ReactionQueue), hooks are registered right away
     async def add_reaction(self, reaction: Emoji, hook: Callable) -> None:
-        self._reaction_hooks[reaction] = hook
-        await self.message.add_reaction(reaction.first())
+        self._reaction_hooks[normalize_emoji(reaction)] = ReactionHook(reaction, hook)
+        self._reactions.add(reaction.first())
 
     async def remove_reaction(self, user: 'User', reaction: Emoji):
-        await self.message.remove_reaction(reaction.first(), user.member)
+        self._reactions.remove(reaction.first(), user.member)
 
     async def remove_reactions(self, reaction: Emoji) -> None:
-        del self._reaction_hooks[reaction]
-        await self.message.clear_reaction(reaction)
+        del self._reaction_hooks[normalize_emoji(reaction)]
+        self._reactions.clear_one(reaction.first())
 
     async def clear_reactions(self):
         self._reaction_hooks.clear()
-        await self.message.clear_reactions()
+        self._reactions.clear_all()
+
+    def get_finish_time(self) -> int:
+        return self._first_interaction + MessagePlus.FINISH_SECONDS
 
     def has_finished(self) -> bool:
-        if utils.now() - self._first_interaction > MessagePlus.FINISH_SECONDS:
+        if utils.now() > self.get_finish_time():
             self._finished = True
         return self._finished
 
 
 _MESSAGE_ID_TO_MESSAGE_PLUS: dict[int, MessagePlus] = {}
+# (finish time, message id), entries of unregistered messages are skipped when popped
+_EXPIRY_HEAP: list[tuple[int, int]] = []
+
 
+def _remove_finished() -> None:
+    now: int = utils.now()
+    while _EXPIRY_HEAP and _EXPIRY_HEAP[0][0] < now:
+        finish_time, message_id = heapq.heappop(_EXPIRY_HEAP)
+        mp: Optional[MessagePlus] = _MESSAGE_ID_TO_MESSAGE_PLUS.get(message_id)
+        if (mp is not None) and mp.has_finished():
+            del _MESSAGE_ID_TO_MESSAGE_PLUS[message_id]
 
-def register_message_reactions(message: Message, react_to: Optional[set[int]]) -> MessagePlus:
-    mp: MessagePlus = MessagePlus(message, react_to)
+
+def register_message_reactions(message: Message, react_to: Optional[set[int]],
+                               first_interaction: Optional[int] = None) -> MessagePlus:
+    # first_interaction keeps the expiry of a message tracked again after a restart
+    _remove_finished()
+    mp: MessagePlus = MessagePlus(message, react_to, first_interaction)
     _MESSAGE_ID_TO_MESSAGE_PLUS[mp.message.id] = mp
-    if len(_MESSAGE_ID_TO_MESSAGE_PLUS) > 100:
-        to_remove: list[int] = []
-        for k, mp in _MESSAGE_ID_TO_MESSAGE_PLUS.items():
-            if mp.has_finished():
-                to_remove.append(k)
-        for k in to_remove:
-            del _MESSAGE_ID_TO_MESSAGE_PLUS[k]
+    heapq.heappush(_EXPIRY_HEAP, (mp.get_finish_time(), mp.message.id))
     return mp
 
 
+def is_tracked(message_id: int) -> bool:
+    return message_id in _MESSAGE_ID_TO_MESSAGE_PLUS
+
+
 def unregister(mp: MessagePlus):
     del _MESSAGE_ID_TO_MESSAGE_PLUS[mp.message.id]
 
 
 async def on_reaction_add(user, member: discord.Member, message_id: int, reaction: Reaction) -> None:
+    _remove_finished()
     mp: Optional[MessagePlus] = _MESSAGE_ID_TO_MESSAGE_PLUS.get(message_id)
     if mp is not None:
         await mp.on_reaction(user, member, reaction)
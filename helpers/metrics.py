@@ -0,0 +1,162 @@
+import asyncio
+import bisect
+import time
+from typing import Optional
+
+
+class Histogram:
+    # Bucket upper bounds, in milliseconds by default
+    BOUNDS: tuple[float, ...] = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+    def __init__(self, bounds: Optional[tuple[float, ...]] = None):
+        self._bounds: tuple[float, ...] = bounds or Histogram.BOUNDS
+        self._buckets: list[int] = [0] * (len(self._bounds) + 1)  # Last bucket for anything above
+        self.count: int = 0
+        self.total: float = 0
+        self.min: float = 0
+        self.max: float = 0
+
+    def add(self, value: float) -> None:
+        self._buckets[bisect.bisect_left(self._bounds, value)] += 1
+        if self.count == 0:
+            self.min = value
+            self.max = value
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def add_buckets(self, buckets: list[int], total: float, minimum: float, maximum: float) -> None:
+        # Many values at once, already counted per bucket
+        count: int = sum(buckets)
+        if count == 0:
+            return
+        for i, amount in enumerate(buckets):
+            self._buckets[i] += amount
+        self.min = minimum if self.count == 0 else min(self.min, minimum)
+        self.max = maximum if self.count == 0 else max(self.max, maximum)
+        self.count += count
+        self.total += total
+
+    def get_bounds(self) -> tuple[float, ...]:
+        return self._bounds
+
+    def merge(self, other: 'Histogram') -> None:
+        assert self._bounds == other._bounds, "Cannot merge histograms with different buckets"
+        if other.count == 0:
+            return
+        for i, amount in enumerate(other._buckets):
+            self._buckets[i] += amount
+        self.min = other.min if self.count == 0 else min(self.min, other.min)
+        self.max = other.max if self.count == 0 else max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def get_mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, pct: float) -> float:
+        # Upper bound of the bucket holding the percentile, capped by the highest value seen
+        if self.count == 0:
+            return 0
+        target: float = self.count * pct / 100
+        seen: int = 0
+        for i, amount in enumerate(self._buckets):
+            seen += amount
+            if seen >= target:
+                if i < len(self._bounds):
+                    return min(self._bounds[i], self.max)
+                return self.max
+        return self.max
+
+    def print(self) -> str:
+        return (f"n={self.count} avg={self.get_mean():.1f} p50={self.percentile(50):g} "
+                f"p95={self.percentile(95):g} p99={self.percentile(99):g} max={self.max:.1f}")
+
+
+class PhaseTimer:
+    def __init__(self, name: str):
+        self.name: str = name
+        self.started: float = time.perf_counter()
+        self._last: float = self.started
+        self.phases: dict[str, float] = {}  # Milliseconds
+        self.failed: bool = False
+        self.deferred: bool = False
+
+    def mark(self, phase: str) -> None:
+        # Time since the previous mark is added to the given phase
+        now: float = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + (now - self._last) * 1000
+        self._last = now
+
+    def get_elapsed(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+class CommandStats:
+    def __init__(self):
+        self.latency: Histogram = Histogram()
+        self.phases: dict[str, Histogram] = {}
+        self.errors: int = 0
+        self.deferred: int = 0
+        self.in_flight: int = 0
+
+
+class CommandMetrics:
+    def __init__(self):
+        self._commands: dict[str, CommandStats] = {}
+        self._since: float = time.monotonic()
+        self._log_task: Optional[asyncio.Task] = None
+        self.in_flight: int = 0
+
+    def _get_stats(self, name: str) -> CommandStats:
+        stats: Optional[CommandStats] = self._commands.get(name)
+        if stats is None:
+            stats = CommandStats()
+            self._commands[name] = stats
+        return stats
+
+    def get_command_stats(self, name: str) -> Optional[CommandStats]:
+        return self._commands.get(name)
+
+    def start(self, name: str) -> PhaseTimer:
+        self._get_stats(name).in_flight += 1
+        self.in_flight += 1
+        return PhaseTimer(name)
+
+    def finish(self, timer: PhaseTimer) -> None:
+        stats: CommandStats = self._get_stats(timer.name)
+        stats.in_flight -= 1
+        self.in_flight -= 1
+        stats.latency.add(timer.get_elapsed())
+        for phase, ms in timer.phases.items():
+            histogram: Optional[Histogram] = stats.phases.get(phase)
+            if histogram is None:
+                histogram = Histogram()
+                stats.phases[phase] = histogram
+            histogram.add(ms)
+        if timer.failed:
+            stats.errors += 1
+        if timer.deferred:
+            stats.deferred += 1
+
+    def print(self) -> str:
+        minutes: float = max(time.monotonic() - self._since, 1) / 60
+        lines = [f"Commands ({minutes:.0f} min, {self.in_flight} in flight):"]
+        for name, stats in sorted(self._commands.items(), key=lambda x: x[1].latency.percentile(99), reverse=True):
+            lines.append(f"  {name}: {stats.latency.count / minutes:.1f}/min errors={stats.errors} "
+                         f"deferred={stats.deferred} in_flight={stats.in_flight} ms {stats.latency.print()}")
+            lines.append("    " + ' '.join([f"{phase} p95={histogram.percentile(95):g}"
+                                            for phase, histogram in stats.phases.items()]))
+        return '\n'.join(lines)
+
+    def start_logging(self, interval: float) -> None:
+        if (self._log_task is None) and (interval > 0):
+            self._log_task = asyncio.ensure_future(self._log_loop(interval))
+
+    async def _log_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if self._commands:
+                print(self.print())
@@ -0,0 +1,57 @@
+import asyncio
+import time
+import traceback
+from contextlib import AsyncExitStack
+from typing import Optional
+
+import discord
+
+from adventure_classes.game_adventures import snapshot
+from adventure_classes.generic.adventure import Adventure, get_dormant
+from db.database import PostgreSQL
+from helpers import messages, storage, traffic
+from helpers.keyed_lock import USER_LOCKS
+from user_data.user import User
+
+
+async def on_reaction_add(db: PostgreSQL, reaction: discord.Reaction, discord_user: discord.Member) -> None:
+    dormant: Optional[Adventure] = None
+    if not messages.is_tracked(reaction.message.id):
+        dormant = get_dormant(reaction.message.id)
+        if (dormant is None) or all(user.id != discord_user.id for user in dormant.get_users()):
+            return  # Not a message with hooks, or not a player of the evicted adventure
+    if storage.is_missing_user(discord_user.id):
+        return  # Never played: no need for a connection
+    started: float = time.perf_counter()
+    try:
+        await _on_reaction_add(db, reaction, discord_user, dormant)
+    finally:
+        # Only reactions that get this far, the others cost nothing to replay
+        recorder: Optional[traffic.TrafficRecorder] = traffic.get_recorder()
+        if recorder is not None:
+            recorder.record_reaction(started, discord_user.id, reaction.message.id,
+                                     messages.normalize_emoji(reaction.emoji))
+
+
+async def _on_reaction_add(db: PostgreSQL, reaction: discord.Reaction, discord_user: discord.Member,
+                           dormant: Optional[Adventure]) -> None:
+    async with AsyncExitStack() as stack:
+        try:
+            # Same lock as commands, so reaction hooks never interleave with a command of the same user
+            await stack.enter_async_context(USER_LOCKS.hold(discord_user.id))
+        except asyncio.TimeoutError:
+            return  # User busy for too long, the reaction is dropped
+        if (dormant is not None) and dormant.is_dormant():
+            if not await snapshot.rehydrate(db, dormant):
+                return
+        async with db.checkout():
+            with db.track('reaction'):
+                user: Optional[User] = await db.aio.run(storage.get_user, db, discord_user.id, create=False)
+                if user is not None:
+                    try:
+                        await messages.on_reaction_add(user, discord_user, reaction.message.id, reaction)
+                    except Exception:  # noqa
+                        # Only this reaction's transaction is affected, as with commands
+                        await db.aio.rollback()
+                        traceback.print_exc()
+                await db.aio.commit()
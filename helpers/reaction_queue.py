@@ -0,0 +1,134 @@
+import asyncio
+import traceback
+from collections import deque
+from typing import Optional
+
+import discord
+from autoslot import Slots
+from discord import Message
+
+
+class ReactionStats:
+    def __init__(self):
+        self.queued: int = 0
+        self.sent: int = 0
+        self.collapsed: int = 0  # Skipped because an equivalent operation was pending or done
+        self.cancelled: int = 0  # Dropped by a later clear
+        self.failed: int = 0
+
+    def print(self) -> str:
+        return (f"Reactions: queued={self.queued} sent={self.sent} collapsed={self.collapsed} "
+                f"cancelled={self.cancelled} failed={self.failed}")
+
+
+REACTION_STATS: ReactionStats = ReactionStats()
+
+
+class ReactionOp(Slots):
+    ADD: int = 0
+    REMOVE: int = 1
+    CLEAR_ONE: int = 2
+    CLEAR_ALL: int = 3
+
+    def __init__(self, kind: int, emoji: Optional[str] = None, member: Optional[discord.abc.Snowflake] = None):
+        self.kind: int = kind
+        self.emoji: Optional[str] = emoji
+        self.member: Optional[discord.abc.Snowflake] = member
+
+    def get_key(self) -> tuple:
+        return self.kind, self.emoji, None if self.member is None else self.member.id
+
+
+class ReactionQueue:
+    # Reaction calls of one message run in order in the background, so chapters don't wait for each round trip
+    def __init__(self, message: Message):
+        self.message: Message = message
+        self._ops: deque[ReactionOp] = deque()
+        self._added: set[str] = set()  # Bot reactions sent (or being sent) to the message
+        self._present: set[tuple[str, int]] = set()  # User reactions waiting to be removed
+        self._task: Optional[asyncio.Task] = None
+
+    def _is_queued(self, op: ReactionOp) -> bool:
+        key: tuple = op.get_key()
+        return any(queued.get_key() == key for queued in self._ops)
+
+    def _cancel(self, should_cancel) -> None:
+        kept: deque[ReactionOp] = deque()
+        for op in self._ops:
+            if should_cancel(op):
+                REACTION_STATS.cancelled += 1
+            else:
+                kept.append(op)
+        self._ops = kept
+
+    def _queue(self, op: ReactionOp) -> None:
+        if self._is_queued(op):
+            REACTION_STATS.collapsed += 1
+            return
+        REACTION_STATS.queued += 1
+        self._ops.append(op)
+        if (self._task is None) or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def add(self, emoji: str) -> None:
+        if emoji in self._added:
+            REACTION_STATS.collapsed += 1
+            return
+        self._queue(ReactionOp(ReactionOp.ADD, emoji))
+
+    def on_user_reaction(self, emoji: str, member: discord.abc.Snowflake) -> None:
+        self._present.add((emoji, member.id))
+
+    def remove(self, emoji: str, member: discord.abc.Snowflake) -> None:
+        # A click is only removed once, even if both the hook and the dispatcher ask for it
+        if (emoji, member.id) not in self._present:
+            REACTION_STATS.collapsed += 1
+            return
+        self._present.discard((emoji, member.id))
+        self._queue(ReactionOp(ReactionOp.REMOVE, emoji, member))
+
+    def clear_one(self, emoji: str) -> None:
+        self._cancel(lambda op: op.emoji == emoji)
+        self._present = {x for x in self._present if x[0] != emoji}
+        if emoji in self._added:
+            self._added.discard(emoji)
+            self._queue(ReactionOp(ReactionOp.CLEAR_ONE, emoji))
+
+    def clear_all(self) -> None:
+        self._cancel(lambda op: True)
+        self._present.clear()
+        self._added.clear()
+        self._queue(ReactionOp(ReactionOp.CLEAR_ALL))
+
+    async def _execute(self, op: ReactionOp) -> None:
+        if op.kind == ReactionOp.ADD:
+            await self.message.add_reaction(op.emoji)
+        elif op.kind == ReactionOp.REMOVE:
+            await self.message.remove_reaction(op.emoji, op.member)
+        elif op.kind == ReactionOp.CLEAR_ONE:
+            await self.message.clear_reaction(op.emoji)
+        else:
+            await self.message.clear_reactions()
+
+    async def _run(self) -> None:
+        while self._ops:
+            op: ReactionOp = self._ops.popleft()
+            if op.kind == ReactionOp.ADD:
+                self._added.add(op.emoji)
+            try:
+                await self._execute(op)
+                REACTION_STATS.sent += 1
+            except discord.NotFound:
+                REACTION_STATS.failed += 1
+                self._ops.clear()
+                return  # Message deleted
+            except discord.HTTPException:
+                REACTION_STATS.failed += 1
+                traceback.print_exc()
+
+    def get_pending_count(self) -> int:
+        return len(self._ops)
+
+    async def flush(self) -> None:
+        while (self._task is not None) and (not self._task.done()):
+            await self._task
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Optional
+
+from discord_slash import SlashContext
+
+
+class Responder:
+    # Discord drops interactions not acknowledged within 3 seconds
+    DEFAULT_BUDGET: float = 1.5
+
+    def __init__(self, ctx: SlashContext, budget: float = DEFAULT_BUDGET, hidden: bool = False):
+        self.ctx: SlashContext = ctx
+        self.budget: float = budget
+        self.hidden: bool = hidden  # Whether a deferred response starts hidden
+        self.deferred: bool = False
+        # Guards the initial response, so a deferral and the first message don't both claim it
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._watchdog: Optional[asyncio.TimerHandle] = None
+        self.message_ids: list[int] = []  # Messages sent, hidden ones have none
+
+    async def _send(self, msg: str, hidden: bool):
+        message = await self.ctx.send(msg, hidden=hidden)
+        if getattr(message, 'id', None) is not None:
+            self.message_ids.append(message.id)
+        return message
+
+    def is_answered(self) -> bool:
+        return self.ctx.responded or self.ctx.deferred
+
+    def start_watchdog(self) -> None:
+        # Defers the response if nothing was sent before the budget runs out
+        if self.budget > 0:
+            self._watchdog = asyncio.get_event_loop().call_later(self.budget,
+                                                                  lambda: asyncio.ensure_future(self.defer()))
+
+    def stop_watchdog(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+
+    async def defer(self) -> None:
+        async with self._lock:
+            if not self.is_answered():
+                await self.ctx.defer(hidden=self.hidden)
+                self.deferred = True
+
+    async def send(self, msg: str, hidden: bool = False):
+        if self.ctx.responded:
+            return await self._send(msg, hidden)
+        async with self._lock:
+            if self.ctx.deferred and hidden and (not self.hidden):
+                # A visible "thinking..." response can't become hidden, replace it with a hidden follow-up
+                await self.ctx._http.delete(self.ctx._SlashContext__token)  # noqa
+                self.ctx.deferred = False
+                self.ctx.responded = True
+            return await self._send(msg, hidden)
+
+    def needs_answer(self) -> bool:
+        # Deferred but never followed up, the user would see "thinking..." for 15 minutes
+        return self.ctx.deferred and (not self.ctx.responded)
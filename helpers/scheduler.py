@@ -0,0 +1,165 @@
+import asyncio
+import math
+import traceback
+from typing import Optional, Callable, Any
+
+from autoslot import Slots
+
+from helpers.metrics import Histogram
+
+
+class Timer(Slots):
+    def __init__(self, wheel: 'TimingWheel', expires: int, callback: Callable, args: tuple):
+        self.wheel: 'TimingWheel' = wheel
+        self.expires: int = expires  # In ticks
+        self.callback: Callable = callback
+        self.args: tuple = args
+        self.slot: Optional[set['Timer']] = None  # Wheel slot holding it, None once fired or cancelled
+
+    def is_pending(self) -> bool:
+        return self.slot is not None
+
+    def cancel(self) -> None:
+        self.wheel.cancel(self)
+
+    def reschedule(self, delay: float) -> None:
+        self.wheel.reschedule(self, delay)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class TimingWheel:
+    # Hierarchical timing wheel: every timer of the bot hangs from one loop callback per tick instead of being a
+    # sleeping task. Levels hold slots, slots^2 and slots^3 ticks, and timers move down as they get close
+    LEVELS: int = 3
+
+    def __init__(self, tick: float = 0.05, slots: int = 64):
+        self.tick: float = tick
+        self.slots: int = slots
+        self._levels: list[list[set[Timer]]] = [[set() for _ in range(slots)] for _ in range(TimingWheel.LEVELS)]
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._origin: float = 0  # Loop time of tick 0
+        self._current: int = 0  # Last tick processed
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._pending: int = 0
+        self.fired: int = 0
+        self.cancelled: int = 0
+        self.lag: Histogram = Histogram()  # Milliseconds between a tick being due and running
+
+    def _check_loop(self) -> asyncio.AbstractEventLoop:
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        if loop is not self._loop:  # Timers of a previous loop can never run
+            for level in self._levels:
+                for slot in level:
+                    for timer in slot:
+                        timer.slot = None
+                    slot.clear()
+            self._loop = loop
+            self._origin = loop.time()
+            self._current = 0
+            self._handle = None
+            self._pending = 0
+        return loop
+
+    def _insert(self, timer: Timer) -> None:
+        delta: int = max(timer.expires - self._current, 0)
+        slots: int = self.slots
+        for level in range(TimingWheel.LEVELS):
+            span: int = slots ** level
+            if (delta < span * slots) or (level == TimingWheel.LEVELS - 1):
+                position: int = self._current + min(delta, slots ** TimingWheel.LEVELS - 1)
+                timer.slot = self._levels[level][(position // span) % slots]
+                timer.slot.add(timer)
+                return
+
+    def _add(self, timer: Timer, delay: float) -> None:
+        loop: asyncio.AbstractEventLoop = self._check_loop()
+        if self._pending == 0:  # Idle, skip the ticks that passed
+            self._current = max(self._current, int((loop.time() - self._origin) / self.tick))
+        # Never early, at most one tick late, and never in the slot being processed
+        timer.expires = max(math.ceil((loop.time() + delay - self._origin) / self.tick), self._current + 1)
+        self._insert(timer)
+        self._pending += 1
+        if self._handle is None:
+            self._schedule_tick()
+
+    def call_later(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        timer: Timer = Timer(self, 0, callback, args)
+        self._add(timer, delay)
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        if timer.slot is not None:
+            timer.slot.discard(timer)
+            timer.slot = None
+            self._pending -= 1
+            self.cancelled += 1
+
+    def reschedule(self, timer: Timer, delay: float) -> None:
+        # Also revives a fired or cancelled timer
+        if timer.slot is not None:
+            timer.slot.discard(timer)
+            timer.slot = None
+            self._pending -= 1
+        self._add(timer, delay)
+
+    async def sleep(self, delay: float) -> None:
+        future: asyncio.Future = self._check_loop().create_future()
+        timer: Timer = self.call_later(delay, _resolve, future)
+        try:
+            await future
+        finally:
+            timer.cancel()
+
+    def _schedule_tick(self) -> None:
+        self._handle = self._loop.call_at(self._origin + (self._current + 1) * self.tick, self._on_tick,
+                                          self._current + 1)
+
+    def _cascade(self, level: int, index: int) -> None:
+        timers: set[Timer] = self._levels[level][index]
+        self._levels[level][index] = set()
+        for timer in timers:
+            self._insert(timer)
+
+    def _advance(self) -> None:
+        self._current += 1
+        slots: int = self.slots
+        for level in range(TimingWheel.LEVELS - 1, 0, -1):
+            span: int = slots ** level
+            if self._current % span == 0:
+                self._cascade(level, (self._current // span) % slots)
+        due: set[Timer] = self._levels[0][self._current % slots]
+        self._levels[0][self._current % slots] = set()
+        while due:  # Callbacks may cancel timers still in this slot
+            timer: Timer = due.pop()
+            timer.slot = None
+            self._pending -= 1
+            self.fired += 1
+            try:
+                timer.callback(*timer.args)
+            except Exception:  # noqa
+                traceback.print_exc()
+
+    def _on_tick(self, due_tick: int) -> None:
+        now: float = self._loop.time()
+        self.lag.add(max(now - (self._origin + due_tick * self.tick), 0) * 1000)
+        target: int = int((now - self._origin) / self.tick + 1e-6)
+        while (self._current < target) and (self._pending > 0):
+            self._advance()
+        if self._pending > 0:
+            self._schedule_tick()
+        else:
+            self._handle = None
+
+    def get_pending_count(self) -> int:
+        return self._pending
+
+    def print(self) -> str:
+        return (f"Scheduler: pending={self._pending} fired={self.fired} cancelled={self.cancelled} "
+                f"lag avg={self.lag.get_mean():.1f}ms p99={self.lag.percentile(99):g}ms max={self.lag.max:.1f}ms")
+
+
+SCHEDULER: TimingWheel = TimingWheel()
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import random
+import secrets
+from typing import Optional
+
+
+def new_seed() -> int:
+    return secrets.randbits(63)
+
+
+def derive_seed(seed: int, *keys: object) -> int:
+    # Same result in every process, unlike hash()
+    text: str = ':'.join(str(x) for x in (seed,) + keys)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big') >> 1
+
+
+class SeededRandom(random.Random):
+    # A random stream that keeps its seed, so whatever was drawn from it can be drawn again
+    def __init__(self, seed: Optional[int] = None):
+        self.initial_seed: int = new_seed() if seed is None else seed
+        super().__init__(self.initial_seed)
+
+    def derive(self, *keys: object) -> 'SeededRandom':
+        # Stream named by the keys, whatever was drawn from this one
+        return SeededRandom(derive_seed(self.initial_seed, *keys))
+
+    def spawn(self) -> 'SeededRandom':
+        # Next child stream of this one
+        return SeededRandom(self.getrandbits(63))
+
+
+# Every stream of the process comes from this one, RNG_SEED reproduces a whole run
+ROOT: SeededRandom = SeededRandom(int(os.environ['RNG_SEED']) if 'RNG_SEED' in os.environ else None)
+
+_SHARED: random.Random = random._inst  # noqa, the generator behind the random module functions
+
+
+def get_random(rng: Optional[random.Random]) -> random.Random:
+    # Callers without a stream of their own keep using the random module
+    return _SHARED if rng is None else rng
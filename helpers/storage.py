@@ -1,3 +1,6 @@
+import asyncio
+import os
+import threading
 from typing import Optional
 
 from discord import Client
@@ -7,38 +10,155 @@ import utils
 from db.database import PostgreSQL
 from guild_data.guild import Guild
 from helpers.cache import Cache
+from db.row import Row
 from user_data.user import User
 
-USER_CACHE = Cache()
-GUILD_CACHE = Cache()
+
+def _save_evicted(key: int, row: Row) -> None:
+    # Unsaved changes are queued for a background flush in its own transaction, never in the transaction of the
+    # command that caused the eviction, nor with a connection taken under _LOAD_LOCK. Reloads adopt them meanwhile
+    row.save_evicted()
+
+
+# Longest wait for the save of an evicted copy before reloading it, in seconds
+_EVICT_WAIT: float = 10
+
+
+def _cache_ttl(name: str) -> Optional[float]:
+    ttl: str = os.environ.get(name, '')
+    return float(ttl) if ttl else None
+
+
+# Users in an adventure and guilds with a running bet are still referenced elsewhere, so they are kept
+USER_CACHE = Cache(limit=int(os.environ.get('USER_CACHE_SIZE', 10000)), ttl=_cache_ttl('USER_CACHE_TTL'),
+                   on_evict=_save_evicted, is_pinned=lambda user: user.get_adventure() is not None)
+GUILD_CACHE = Cache(limit=int(os.environ.get('GUILD_CACHE_SIZE', 2000)), ttl=_cache_ttl('GUILD_CACHE_TTL'),
+                    on_evict=_save_evicted, is_pinned=lambda guild: guild.bet.is_active())
+# Ids known not to be players, so reactions from them do not reach the database
+MISSING_USER_CACHE = Cache(limit=int(os.environ.get('MISSING_USER_CACHE_SIZE', 50000)),
+                           ttl=float(os.environ.get('MISSING_USER_CACHE_TTL', 300)))
+
+# Users and guilds may be loaded from database threads, only one may be built at a time
+_LOAD_LOCK = threading.RLock()
 
 
 def clear_cache():
     USER_CACHE.clear_all()
     GUILD_CACHE.clear_all()
+    MISSING_USER_CACHE.clear_all()
+
+
+def is_missing_user(user_id: int) -> bool:
+    return user_id in MISSING_USER_CACHE
 
 
 def get_user(db: PostgreSQL, user_id: int, create: bool = True) -> Optional[User]:
     user = USER_CACHE.get(user_id)
+    if user:
+        return user
+    if (not create) and is_missing_user(user_id):
+        return None
+    with _LOAD_LOCK:
+        return _load_user(db, user_id, create)
+
+
+def _load_user(db: PostgreSQL, user_id: int, create: bool) -> Optional[User]:
+    user = USER_CACHE.peek(user_id)
     if not user:
-        if create or db.get_row_data("users", {
-            'id': user_id
-        }):
-            user = User(db, user_id)
+        USER_CACHE.wait_evicted(user_id, _EVICT_WAIT)
+        bundle = db.get_user_bundles([user_id]).get(user_id)
+        if bundle or create:
+            user = User(db, user_id, bundle or (None, None, []))
             USER_CACHE[user_id] = user
+            MISSING_USER_CACHE.pop(user_id, None)
         else:
+            MISSING_USER_CACHE[user_id] = True
             return None
     return user
 
 
+def get_users(db: PostgreSQL, user_ids: list[int], create: bool = True) -> dict[int, User]:
+    users: dict[int, User] = {}
+    missing: list[int] = []
+    for user_id in user_ids:
+        user = USER_CACHE.get(user_id)
+        if user:
+            users[user_id] = user
+        elif create or (not is_missing_user(user_id)):
+            missing.append(user_id)
+    if missing:
+        with _LOAD_LOCK:
+            for user_id in missing:
+                USER_CACHE.wait_evicted(user_id, _EVICT_WAIT)
+            # All missing users are fetched in a single query
+            bundles = db.get_user_bundles(missing)
+            for user_id in missing:
+                user = USER_CACHE.peek(user_id)
+                if not user:
+                    if user_id in bundles:
+                        user = User(db, user_id, bundles[user_id])
+                    elif create:
+                        user = User(db, user_id, (None, None, []))
+                    else:
+                        MISSING_USER_CACHE[user_id] = True
+                        continue
+                    USER_CACHE[user_id] = user
+                    MISSING_USER_CACHE.pop(user_id, None)
+                users[user_id] = user
+    return users
+
+
 def get_guild(db: PostgreSQL, guild_id: int, create=True) -> Optional[Guild]:
     guild = GUILD_CACHE.get(guild_id)
+    if guild:
+        return guild
+    with _LOAD_LOCK:
+        return _load_guild(db, guild_id, create)
+
+
+def _load_guild(db: PostgreSQL, guild_id: int, create: bool) -> Optional[Guild]:
+    guild = GUILD_CACHE.peek(guild_id)
     if not guild:
-        if create or db.get_row_data("users", {
+        GUILD_CACHE.wait_evicted(guild_id, _EVICT_WAIT)
+        guild_data = db.get_row_data("guilds", {
             'id': guild_id
-        }):
-            guild = Guild(db, guild_id)
+        })
+        if create or guild_data:
+            guild = Guild(db, guild_id, row_data=guild_data)
             GUILD_CACHE[guild_id] = guild
         else:
             return None
     return guild
+
+
+def _preload_guild_chunk(db: PostgreSQL, guild_ids: list[int]) -> int:
+    # One query for the guild rows and another for all their shop items
+    guilds_data = db.get_rows_in('guilds', 'id', guild_ids)
+    items_data = db.get_owned_items('guild_items', 'guild_id', [x['id'] for x in guilds_data])
+    guild_items: dict[int, list] = {}
+    for isd in items_data:
+        guild_items.setdefault(isd['owner_id'], []).append(isd)
+    loaded: int = 0
+    for guild_data in guilds_data:
+        with _LOAD_LOCK:
+            if GUILD_CACHE.peek(guild_data['id']) is None:
+                GUILD_CACHE[guild_data['id']] = Guild(db, guild_data['id'], row_data=guild_data,
+                                                      shop_items=guild_items.get(guild_data['id']))
+                loaded += 1
+    db.commit()  # Guilds with an interrupted bet refund their users
+    return loaded
+
+
+async def preload_guilds(db: PostgreSQL, guild_ids: list[int], chunk_size: int = 200, concurrency: int = 4) -> int:
+    # Only guilds that already have a row are loaded, up to the cache limit
+    to_load: list[int] = [x for x in guild_ids if GUILD_CACHE.peek(x) is None][:GUILD_CACHE.limit]
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def load_chunk(chunk: list[int]) -> int:
+        async with semaphore:
+            async with db.checkout():
+                return await db.aio.run(_preload_guild_chunk, db, chunk)
+
+    loaded: list[int] = await asyncio.gather(*[load_chunk(to_load[i:i + chunk_size])
+                                              for i in range(0, len(to_load), chunk_size)])
+    return sum(loaded)
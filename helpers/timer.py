@@ -1,13 +1,13 @@
-import asyncio
 from asyncio import Event
 
 from helpers.observable import Observable
+from helpers.scheduler import SCHEDULER, Timer
 
 
 class WaitUntil:
     def __init__(self, timeout):
         self._timeout = timeout
-        self._task = asyncio.ensure_future(self._job())
+        self._timer: Timer = SCHEDULER.call_later(timeout, self._finish)
         self._running = True
         self._was_completed = False
         self._wait_event: Event = Event()
@@ -16,8 +16,7 @@ class WaitUntil:
     def is_running(self):
         return self._running
 
-    async def _job(self):
-        await asyncio.sleep(self._timeout)
+    def _finish(self):
         if self._running:
             self._running = False
             self._was_completed = True
@@ -26,7 +25,7 @@ class WaitUntil:
     def cancel(self):
         if self._running:
             self._running = False
-            self._task.cancel()
+            self._timer.cancel()
             self._wait_event.set()
 
     async def wait(self) -> bool:
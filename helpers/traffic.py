@@ -0,0 +1,99 @@
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from typing import Optional, Any, TextIO
+
+from helpers.seeded_random import derive_seed
+
+
+class TrafficRecorder:
+    # JSON lines trace of commands and reactions for benchmark.replay. Ids are salted hashes, names are not kept
+    def __init__(self, path: str, salt: Optional[str] = None):
+        self._file: TextIO = open(path, 'a', encoding='utf-8')
+        # Lines are written by their own thread, the event loop only queues them
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread = threading.Thread(target=self._drain, name='traffic_recorder', daemon=True)
+        self._thread.start()
+        self._salt: str = salt or secrets.token_hex(8)  # A new one every process unless TRAFFIC_SALT is set
+        self.started: float = time.perf_counter()
+        self.events: int = 0
+
+    def anonymize(self, snowflake: Optional[int]) -> Optional[int]:
+        return None if snowflake is None else derive_seed(0, self._salt, snowflake)
+
+    def _encode(self, value: Any) -> Any:
+        if (value is None) or isinstance(value, (bool, int, float, str)):
+            return value
+        if hasattr(value, 'id'):
+            return {'id': self.anonymize(value.id)}  # Members and other Discord objects
+        return str(value)
+
+    def _drain(self) -> None:
+        while True:
+            line: Optional[str] = self._queue.get()
+            if line is None:
+                break
+            self._file.write(line)
+            if self._queue.empty():
+                self._file.flush()
+        self._file.close()
+
+    def _write(self, started: float, event: dict[str, Any]) -> None:
+        event['t'] = round(started - self.started, 4)  # Seconds since recording started
+        event['ms'] = round((time.perf_counter() - started) * 1000, 2)
+        self._queue.put(json.dumps(event, separators=(',', ':')) + '\n')
+        self.events += 1
+
+    def record_command(self, started: float, name: str, user_id: int, guild_id: Optional[int], args: tuple,
+                       options: dict[str, Any], flags: dict[str, bool], message_ids: list[int]) -> None:
+        self._write(started, {
+            'type': 'command',
+            'name': name,
+            'user': self.anonymize(user_id),
+            'guild': self.anonymize(guild_id),
+            'args': [self._encode(x) for x in args],
+            'options': {k: self._encode(v) for k, v in options.items()},
+            'flags': flags,
+            'messages': [self.anonymize(x) for x in message_ids]  # Sent by the command, reactions refer to them
+        })
+
+    def record_reaction(self, started: float, user_id: int, message_id: int, emoji: Optional[str]) -> None:
+        self._write(started, {
+            'type': 'reaction',
+            'user': self.anonymize(user_id),
+            'message': self.anonymize(message_id),
+            'emoji': emoji
+        })
+
+    def close(self) -> None:
+        # Waits for the queued lines
+        self._queue.put(None)
+        self._thread.join()
+
+
+def load_trace(path: str) -> list[dict[str, Any]]:
+    with open(path, encoding='utf-8') as file:
+        events: list[dict[str, Any]] = [json.loads(line) for line in file if line.strip()]
+    events.sort(key=lambda event: event['t'])  # Written when they finish
+    return events
+
+
+_RECORDER: Optional[TrafficRecorder] = None
+
+
+def set_recorder(recorder: Optional[TrafficRecorder]) -> None:
+    global _RECORDER
+    _RECORDER = recorder
+
+
+def get_recorder() -> Optional[TrafficRecorder]:
+    return _RECORDER
+
+
+def load_recorder() -> Optional[TrafficRecorder]:
+    if 'TRAFFIC_TRACE_PATH' not in os.environ:
+        return None
+    return TrafficRecorder(os.environ['TRAFFIC_TRACE_PATH'], os.environ.get('TRAFFIC_SALT'))
@@ -6,6 +6,7 @@ from enums.emoji import Emoji
 from enums.item_type import EquipmentType
 from enums.location import Location
 from enums.item_rarity import ItemRarity
+from helpers.seeded_random import get_random
 from item_data import item_loader
 from item_data.item_descriptions import EquipmentDescription, ItemDescription, PotionDescription
 from item_data.stat import Stat, StatType
@@ -146,26 +147,29 @@ class RandomEquipmentBuilder:
             self.item_rarity_weights = [1] * len(item_rarities)
         return self
 
-    def build(self) -> Equipment:
+    def build(self, rng: Optional[random.Random] = None) -> Equipment:
+        rng = get_random(rng)
         if not self.item_type:
             self.item_type = list(item_loader.get_equipment_dict()[self.tier][self.location].keys())
             self.item_type_weights = [1 for _ in self.item_type]
-        item_type: EquipmentType = random.choices(self.item_type, weights=self.item_type_weights, k=1)[0]
-        item_rarity: ItemRarity = random.choices(self.item_rarity, weights=self.item_rarity_weights, k=1)[0]
+        item_type: EquipmentType = rng.choices(self.item_type, weights=self.item_type_weights, k=1)[0]
+        item_rarity: ItemRarity = rng.choices(self.item_rarity, weights=self.item_rarity_weights, k=1)[0]
         if item_rarity == ItemRarity.LEGENDARY:
-            r: float = random.random()
+            r: float = rng.random()
             if 0.1 < r < 0.2:
                 item_rarity = ItemRarity.RED_LEGENDARY
             elif r < 0.1:
                 item_rarity = ItemRarity.BLUE_LEGENDARY
-        desc: EquipmentDescription = random.choice(item_loader.get_equipment_dict()
-                                                   [self.tier][self.location][item_type])
+        desc: EquipmentDescription = rng.choice(item_loader.get_equipment_dict()
+                                                [self.tier][self.location][item_type])
         equipment: Equipment = Equipment()
-        equipment.build(desc.id, item_rarity, self.get_stat_bonus(desc, item_rarity))
+        equipment.build(desc.id, item_rarity, self.get_stat_bonus(desc, item_rarity, rng))
         return equipment
 
     @staticmethod
-    def get_stat_bonus(desc: EquipmentDescription, rarity: ItemRarity) -> dict[Stat, int]:
+    def get_stat_bonus(desc: EquipmentDescription, rarity: ItemRarity, rng: Optional[random.Random] = None) \
+            -> dict[Stat, int]:
+        rng = get_random(rng)
         base_main: list[Stat] = [x for x in desc.base_stats.keys() if x.get_type() == StatType.MAIN]
         chance_main: list[Stat] = [x for x in desc.base_stats.keys() if x.get_type() == StatType.CHANCE]
 
@@ -175,65 +179,65 @@ class RandomEquipmentBuilder:
 
         elif rarity == ItemRarity.UNCOMMON:  # +0/1
             if chance_main:
-                sb[random.choice(chance_main)] = 1
+                sb[rng.choice(chance_main)] = 1
             else:
-                sb[random.choice(Stat.get_type_list(StatType.CHANCE))] = 1
+                sb[rng.choice(Stat.get_type_list(StatType.CHANCE))] = 1
 
         elif rarity == ItemRarity.RARE:  # +1/1
             if chance_main:
-                sb[random.choice(chance_main)] = 1
+                sb[rng.choice(chance_main)] = 1
             else:
-                sb[random.choice(Stat.get_type_list(StatType.CHANCE))] = 1
+                sb[rng.choice(Stat.get_type_list(StatType.CHANCE))] = 1
             if base_main:
-                sb[random.choice(base_main)] = 1
+                sb[rng.choice(base_main)] = 1
             else:
                 if chance_main:
-                    rc = random.choice(chance_main)
+                    rc = rng.choice(chance_main)
                     sb[rc] = sb.get(rc, 0) + 1
                 else:
-                    rc = random.choice(Stat.get_type_list(StatType.CHANCE))
+                    rc = rng.choice(Stat.get_type_list(StatType.CHANCE))
                     sb[rc] = sb.get(rc, 0) + 1
 
         elif rarity == ItemRarity.EPIC:  # +1/2
-            first_one = random.randint(1, 2)
+            first_one = rng.randint(1, 2)
             if base_main:
-                sb[random.choice(base_main)] = first_one
+                sb[rng.choice(base_main)] = first_one
             else:
-                sb[random.choice(Stat.get_type_list(StatType.MAIN))] = first_one
+                sb[rng.choice(Stat.get_type_list(StatType.MAIN))] = first_one
             if chance_main:
-                sb[random.choice(chance_main)] = 3 - first_one
+                sb[rng.choice(chance_main)] = 3 - first_one
             else:
-                sb[random.choice(Stat.get_type_list(StatType.CHANCE))] = 3 - first_one
+                sb[rng.choice(Stat.get_type_list(StatType.CHANCE))] = 3 - first_one
 
         elif rarity == ItemRarity.LEGENDARY:  # +2/2
             if base_main:
-                sb[random.choice(base_main)] = 2
+                sb[rng.choice(base_main)] = 2
             else:
-                sb[random.choice(Stat.get_type_list(StatType.MAIN))] = 2
+                sb[rng.choice(Stat.get_type_list(StatType.MAIN))] = 2
             if chance_main:
-                sb[random.choice(chance_main)] = 2
+                sb[rng.choice(chance_main)] = 2
             else:
-                sb[random.choice(Stat.get_type_list(StatType.CHANCE))] = 2
+                sb[rng.choice(Stat.get_type_list(StatType.CHANCE))] = 2
 
         elif rarity == ItemRarity.RED_LEGENDARY:  # +3/1
             if base_main:
-                sb[random.choice(base_main)] = 3
+                sb[rng.choice(base_main)] = 3
             else:
-                sb[random.choice(Stat.get_type_list(StatType.MAIN))] = 3
+                sb[rng.choice(Stat.get_type_list(StatType.MAIN))] = 3
             if chance_main:
-                sb[random.choice(chance_main)] = 1
+                sb[rng.choice(chance_main)] = 1
             else:
-                sb[random.choice(Stat.get_type_list(StatType.CHANCE))] = 1
+                sb[rng.choice(Stat.get_type_list(StatType.CHANCE))] = 1
 
         elif rarity == ItemRarity.BLUE_LEGENDARY:  # +1/3
             if base_main:
-                sb[random.choice(base_main)] = 1
+                sb[rng.choice(base_main)] = 1
             else:
-                sb[random.choice(Stat.get_type_list(StatType.MAIN))] = 1
+                sb[rng.choice(Stat.get_type_list(StatType.MAIN))] = 1
             if chance_main:
-                sb[random.choice(chance_main)] = 3
+                sb[rng.choice(chance_main)] = 3
             else:
-                sb[random.choice(Stat.get_type_list(StatType.CHANCE))] = 3
+                sb[rng.choice(Stat.get_type_list(StatType.CHANCE))] = 3
 
         return sb
 
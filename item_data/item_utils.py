@@ -20,6 +20,16 @@ def create_guild_item(db: PostgreSQL, guild_id: int, item: 'Item', slot: str) ->
     })
 
 
+def create_guild_items(db: PostgreSQL, guild_id: int, items: list[tuple['Item', str]]) -> None:
+    # Same as create_guild_item, with a single statement for all the items
+    item_ids: dict[tuple[int, str], int] = db.insert_owned_items('guild_items', 'guild_id', [(guild_id, {
+        'data': item.to_dict(),
+        'desc_id': item.get_desc().id
+    }, slot) for item, slot in items])
+    for item, slot in items:
+        item._id = item_ids[(guild_id, slot)]
+
+
 def create_user_item(db: PostgreSQL, user_id: int, item: 'Item', slot: str) -> None:
     fetch_data = db.insert_data('items', {
         'data': item.to_dict(),
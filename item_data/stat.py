@@ -184,6 +184,10 @@ class Stat(Enum):
     def get_type_list(st: StatType) -> list['Stat']:
         return Stat._INFO['of_type'][st]
 
+    def get_index(self) -> int:
+        # Position in compact stat arrays, a plain attribute to avoid enum hashing and .value lookups
+        return self._index
+
     def get_limit(self) -> int:
         return self.value.limit
 
@@ -197,3 +201,5 @@ stat_dict = {
 }
 
 Stat._INFO = stat_dict
+for stat_index, stat_member in enumerate(Stat):
+    stat_member._index = stat_index
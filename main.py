@@ -1,5 +1,6 @@
 # Imports
 import os
+import traceback
 from typing import Optional
 
 import discord
@@ -8,14 +9,15 @@ from discord_slash import SlashCommand
 from discord_slash.utils.manage_commands import create_option, create_choice
 
 import utils
-from adventure_classes.game_adventures import adventure_provider
+from adventure_classes.game_adventures import adventure_provider, snapshot
+from adventure_classes.generic import adventure_store
 from commands import simple, crate, bet, upgrade, shop, test, adventure, setup, equipment
 from enums.item_rarity import ItemRarity
 from enums.item_type import EquipmentType
 from enums.location import Location
 from game_data import data_loader
-from helpers import storage, messages, translate
-from db import database
+from helpers import storage, translate, seeded_random, traffic, reaction_handler
+from db import database, write_behind
 from helpers.command import CommandHandler
 from helpers.translate import tr
 from user_data.user import User
@@ -33,6 +35,8 @@ if utils.is_test():
 else:
     # Production
     db = database.load_database()
+db.write_behind = write_behind.load_write_behind(db)
+traffic.set_recorder(traffic.load_recorder())  # TRAFFIC_TRACE_PATH records commands and reactions for replays
 
 # Register bot
 bot = commands.Bot(command_prefix='/')
@@ -40,25 +44,44 @@ utils.BOT_CLIENT = bot
 slash = SlashCommand(bot, sync_commands=True)
 
 # Command handler
-cmd_handler = CommandHandler(db, slash)
+cmd_handler = CommandHandler(db, slash, float(os.environ.get('COMMAND_DEFER_BUDGET', 1.5)))
 
 
 # Ready event
 @bot.event
 async def on_ready():
     print("Ready!")
+    print(f"RNG seed {seeded_random.ROOT.initial_seed}")  # RNG_SEED runs the same paths and battles again
+    if db.write_behind is not None:
+        db.write_behind.start()
+    db.eviction_writer.start()
+    cmd_handler.metrics.start_logging(float(os.environ.get('METRICS_LOG_INTERVAL', 900)))
+    try:
+        loaded: int = await storage.preload_guilds(db, [guild.id for guild in bot.guilds],
+                                                   concurrency=int(os.environ.get('PRELOAD_CONCURRENCY', 4)))
+        print(f"Preloaded {loaded} guilds")
+    except Exception:  # noqa
+        traceback.print_exc()  # Guilds will be loaded on demand
+    if adventure_store.get_store() is None:  # Not on reconnects, their adventures are still running
+        try:
+            if 'ADVENTURE_STORE_PATH' in os.environ:
+                adventure_store.set_store(adventure_store.FileAdventureStore(os.environ['ADVENTURE_STORE_PATH']))
+            else:
+                store = adventure_store.DatabaseAdventureStore(db)
+                await store.create_table()
+                adventure_store.set_store(store)
+            print(f"Resumed {await snapshot.resume_all(db)} adventures")
+        except Exception:  # noqa
+            traceback.print_exc()  # Adventures won't survive restarts
     if utils.is_test():
         from commands import console
-        await console.execute(db)
+        await console.execute(db, cmd_handler.metrics)
 
 
 # Reaction catching
 @bot.event
 async def on_reaction_add(reaction: discord.Reaction, discord_user: discord.Member):
-    user: Optional[User] = storage.get_user(db, discord_user.id, create=False)
-    if user is not None:
-        await messages.on_reaction_add(user, discord_user, reaction.message.id, reaction)
-    db.commit()
+    await reaction_handler.on_reaction_add(db, reaction, discord_user)
 
 
 # Register commands
@@ -92,6 +115,7 @@ cmd_handler.register_command(simple.transfer,
 cmd_handler.register_command(simple.leaderboard,
                              name="leaderboard", description="Check out the top players",
                              guild_only=True,
+                             slow=True,
                              guild_ids=registered_guild_ids)
 
 # Betting
@@ -109,11 +133,13 @@ cmd_handler.register_command(bet.add,
                                      required=True
                                  )
                              ], guild_only=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 cmd_handler.register_command(bet.check,
                              base="bet", name="check", description="Check the current bet",
                              guild_only=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 # Upgrades
@@ -145,6 +171,7 @@ cmd_handler.register_command(upgrade.upgrade, 'inventory',
 cmd_handler.register_command(crate.check,
                              base="crate", name="check", description="Check money in the crate",
                              guild_only=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 cmd_handler.register_command(crate.place,
@@ -157,16 +184,20 @@ cmd_handler.register_command(crate.place,
                                      required=True
                                  )
                              ], guild_only=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 cmd_handler.register_command(crate.take,
                              base="crate", name="take", description="Take money from the crate",
                              guild_only=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 # Shop
 cmd_handler.register_command(shop.check, base="shop", name="check", description="Check the guild shop",
                              guild_only=True,
+                             guild_lock=True,
+                             slow=True,
                              guild_ids=registered_guild_ids)
 
 cmd_handler.register_command(shop.buy,
@@ -179,6 +210,7 @@ cmd_handler.register_command(shop.buy,
                                      required=True
                                  )
                              ], guild_only=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 cmd_handler.register_command(equipment.sell, name="sell", description="Sell an item from your inventory",
@@ -263,6 +295,7 @@ cmd_handler.register_command(adventure.start_adventure,
                                  )
                              ],
                              guild_only=True,
+                             slow=True,
                              guild_ids=registered_guild_ids)
 
 
@@ -298,6 +331,7 @@ cmd_handler.register_command(setup.set_language,
                                      ]
                                  )
                              ], ignore_all=True,
+                             guild_lock=True,
                              guild_ids=registered_guild_ids)
 
 # Register test command
@@ -322,6 +356,7 @@ if utils.is_test():
 
     cmd_handler.register_command(test.relshop,
                                  name="relshop", description="Reload the shop",
+                                 guild_lock=True,
                                  guild_ids=registered_guild_ids)
 
     cmd_handler.register_command(test.gimme,
@@ -405,3 +440,11 @@ if utils.is_test():
         bot.run(f.readline())
 else:
     bot.run(os.environ['CLIENT_KEY'])
+
+# Finish pending database work
+if db.write_behind is not None:
+    db.write_behind.flush_sync()
+db.eviction_writer.flush_sync()
+db.aio.shutdown()
+if traffic.get_recorder() is not None:
+    traffic.get_recorder().close()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# Balance report of user loadouts against every enemy pool, run from the repository root:
+#   python -m simulation.balance --fights 100000 --workers 8
+#   python -m simulation.balance --fights 1000000 --batch-size 100000 --kernel numpy
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Optional, Callable
+
+from enums.item_rarity import ItemRarity
+from enums.location import Location
+from enums.user_class import UserClass
+from game_data import data_loader
+from simulation.simulator import Scenario, ScenarioStats, get_scenario_pools, run_batch
+
+RARITIES: list[ItemRarity] = [ItemRarity.COMMON, ItemRarity.UNCOMMON, ItemRarity.RARE, ItemRarity.EPIC,
+                              ItemRarity.LEGENDARY]
+
+
+def create_scenarios(classes: Optional[list[str]], rarities: Optional[list[str]],
+                     locations: Optional[list[str]]) -> list[Scenario]:
+    scenarios: list[Scenario] = []
+    for location, pool in get_scenario_pools():
+        if locations and (location.name not in locations):
+            continue
+        for user_class in UserClass:
+            if classes and (user_class.name not in classes):
+                continue
+            for rarity in RARITIES:
+                if rarities and (rarity.name not in rarities):
+                    continue
+                scenarios.append(Scenario(user_class, rarity, location, pool))
+    return scenarios
+
+
+def get_batch_runner(kernel: str) -> Callable[[Scenario, int, Optional[int]], ScenarioStats]:
+    if kernel == 'numpy':
+        from simulation import kernel as numpy_kernel  # NumPy is only needed here
+        return numpy_kernel.run_batch
+    return run_batch
+
+
+def _init_worker() -> None:
+    if not data_loader.is_loaded():  # Forked workers already have it
+        data_loader.load()
+
+
+def run(scenarios: list[Scenario], fights: int, batch_size: int, workers: int,
+        seed: Optional[int] = None, kernel: str = 'python') -> list[ScenarioStats]:
+    # Fights are split in batches so every process gets many of them per round trip
+    runner: Callable[[Scenario, int, Optional[int]], ScenarioStats] = get_batch_runner(kernel)
+    results: list[ScenarioStats] = [ScenarioStats() for _ in scenarios]
+    batches: list[tuple[int, int, Optional[int]]] = []
+    for index in range(len(scenarios)):
+        for start in range(0, fights, batch_size):
+            batch_seed: Optional[int] = None if seed is None else seed + len(batches)
+            batches.append((index, min(batch_size, fights - start), batch_seed))
+    if workers <= 1:
+        for index, amount, batch_seed in batches:
+            results[index].merge(runner(scenarios[index], amount, batch_seed))
+        return results
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+        futures: list[tuple[int, Future]] = [
+            (index, executor.submit(runner, scenarios[index], amount, batch_seed))
+            for index, amount, batch_seed in batches
+        ]
+        for index, future in futures:
+            results[index].merge(future.result())
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate battles to balance enemies and items")
+    parser.add_argument('--fights', type=int, default=1000, help="Fights per scenario")
+    parser.add_argument('--batch-size', type=int, default=500, help="Fights per worker task")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--kernel', choices=['python', 'numpy'], default='python',
+                        help="numpy resolves whole batches at once, without abilities nor potions")
+    parser.add_argument('--classes', nargs='*', help=f"Any of {[x.name for x in UserClass]}")
+    parser.add_argument('--rarities', nargs='*', help=f"Any of {[x.name for x in RARITIES]}")
+    parser.add_argument('--locations', nargs='*', help=f"Any of {[x.name for x in Location]}")
+    args = parser.parse_args()
+
+    data_loader.load()
+    scenarios: list[Scenario] = create_scenarios(args.classes, args.rarities, args.locations)
+    started: float = time.perf_counter()
+    results: list[ScenarioStats] = run(scenarios, args.fights, args.batch_size, args.workers, args.seed,
+                                             args.kernel)
+    elapsed: float = time.perf_counter() - started
+
+    for scenario, stats in zip(scenarios, results):
+        print(f"{scenario.get_name()}: {stats.print()}")
+    total: int = sum(stats.fights for stats in results)
+    print(f"{total} fights in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} fights/s)")
+
+
+if __name__ == '__main__':
+    main()
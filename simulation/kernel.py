@@ -0,0 +1,195 @@
+# Vectorized version of the 1 vs 1 combat rules of BattleEngine (attacks, evasion, crits, vampirism, counters and
+# speed turns), one array row per fight. Abilities, potions and stat modifiers are not modelled.
+# Needs NumPy, which the bot itself does not depend on.
+from typing import Optional
+
+import numpy as np
+
+from adventure_classes.generic.battle.battle_engine import BattleEngine
+from adventure_classes.generic.battle.battle_group import BattleGroup
+from enemy_data import enemy_utils
+from enemy_data.bot_entity_builder import BotEntityBuilder
+from entities.entity import Entity
+from helpers.metrics import Histogram
+from helpers.seeded_random import SeededRandom
+from item_data.stat import Stat
+from simulation.simulator import Scenario, ScenarioStats, create_user_entity
+
+STATS: list[Stat] = list(Stat)
+STAT_COLUMNS: dict[Stat, int] = {stat: i for i, stat in enumerate(STATS)}
+
+
+def stat_matrix(entities: list[Entity]) -> np.ndarray:
+    # Raw stat points, Stat enum order as columns
+    return np.array([[entity.get_stat(stat) for stat in STATS] for entity in entities], dtype=np.float64)
+
+
+def effective_stats(matrix: np.ndarray) -> np.ndarray:
+    # Same formulas as Stat.get_value, which work on whole columns
+    effective: np.ndarray = np.empty_like(matrix)
+    for stat, column in STAT_COLUMNS.items():
+        effective[:, column] = stat.get_value(matrix[:, column])
+    return effective
+
+
+def _column(effective: np.ndarray, stat: Stat) -> np.ndarray:
+    return effective[:, STAT_COLUMNS[stat]]
+
+
+def calculate_damage(atk: np.ndarray, defense: np.ndarray) -> np.ndarray:
+    # battle_utils.calculate_damage
+    return (atk * 4.0 + 8.0) / (defense * 1.5 + 6.0)
+
+
+def _hit_damage(base: np.ndarray, crit: np.ndarray, multiplier: np.ndarray) -> np.ndarray:
+    # np.round rounds half to even, like round()
+    return np.maximum(np.round(np.where(crit, base * 2, base)), 1) * multiplier
+
+
+def expected_damage(attacker: np.ndarray, defender: np.ndarray, multiplier: int = 1) -> np.ndarray:
+    # Expected damage of one attack (no counter) for effective stat rows, for tooltips and sweeps
+    base: np.ndarray = calculate_damage(_column(attacker, Stat.STR), _column(defender, Stat.DEF))
+    crit: np.ndarray = _column(attacker, Stat.CRIT)
+    normal: np.ndarray = np.maximum(np.round(base), 1) * multiplier
+    critical: np.ndarray = np.maximum(np.round(base * 2), 1) * multiplier
+    return (1 - _column(defender, Stat.EVA)) * ((1 - crit) * normal + crit * critical)
+
+
+def _heal(hp: np.ndarray, max_hp: np.ndarray, side: np.ndarray, ids: np.ndarray, amount: np.ndarray) -> None:
+    hp[side, ids] = np.minimum(hp[side, ids] + np.minimum(max_hp[side, ids], amount), max_hp[side, ids])
+
+
+def _damage(hp: np.ndarray, side: np.ndarray, ids: np.ndarray, amount: np.ndarray) -> None:
+    hp[side, ids] = np.maximum(hp[side, ids] - amount, 0)
+
+
+class FightBatch:
+    def __init__(self, size: int):
+        self.finished: np.ndarray = np.zeros(size, dtype=bool)
+        self.a_won: np.ndarray = np.zeros(size, dtype=bool)
+        self.rounds: np.ndarray = np.zeros(size, dtype=np.int64)
+        self.a_hp_start: np.ndarray = np.zeros(size)
+        self.b_hp_start: np.ndarray = np.zeros(size)
+        self.a_hp: np.ndarray = np.zeros(size)
+        self.b_hp: np.ndarray = np.zeros(size)
+
+
+def resolve_fights(a_stats: np.ndarray, b_stats: np.ndarray, rng: Optional[np.random.Generator] = None,
+                   max_turns: int = 500) -> FightBatch:
+    # Raw stat rows of side a (plays first on speed ties) and side b, fights start at full health
+    if rng is None:
+        rng = np.random.default_rng()
+    a: np.ndarray = effective_stats(a_stats)
+    b: np.ndarray = effective_stats(b_stats)
+    size: int = len(a)
+    batch: FightBatch = FightBatch(size)
+    max_hp: np.ndarray = np.stack([_column(a, Stat.HP), _column(b, Stat.HP)])
+    hp: np.ndarray = max_hp.copy()
+    batch.a_hp_start, batch.b_hp_start = hp[0].copy(), hp[1].copy()
+    eva: np.ndarray = np.stack([_column(a, Stat.EVA), _column(b, Stat.EVA)])
+    crit: np.ndarray = np.stack([_column(a, Stat.CRIT), _column(b, Stat.CRIT)])
+    vamp: np.ndarray = np.stack([_column(a, Stat.VAMP), _column(b, Stat.VAMP)])
+    cont: np.ndarray = np.stack([_column(a, Stat.CONT), _column(b, Stat.CONT)])
+    # Damage before crits and multiplier, [a hitting b, b hitting a]
+    base: np.ndarray = np.stack([calculate_damage(_column(a, Stat.STR), _column(b, Stat.DEF)),
+                                 calculate_damage(_column(b, Stat.STR), _column(a, Stat.DEF))])
+    speed_diff: np.ndarray = _column(a, Stat.SPD) - _column(b, Stat.SPD)
+
+    turn_a: np.ndarray = _column(a, Stat.SPD) >= _column(b, Stat.SPD)
+    rounds: np.ndarray = np.ones(size, dtype=np.int64)
+    offbeat: np.ndarray = np.zeros(size, dtype=bool)
+    balance: np.ndarray = np.zeros(size)
+    dont_add: np.ndarray = np.zeros(size, dtype=bool)
+    ids: np.ndarray = np.arange(size)
+
+    for _ in range(max_turns):
+        if len(ids) == 0:
+            break
+        count: int = len(ids)
+        attacker: np.ndarray = np.where(turn_a[ids], 0, 1)
+        defender: np.ndarray = 1 - attacker
+        multiplier: np.ndarray = rounds[ids] // BattleEngine.INCREASE_EVERY + 1
+        rolls: np.ndarray = rng.random((7, count))
+
+        # Attack
+        hit: np.ndarray = rolls[0] >= eva[defender, ids]
+        dealt: np.ndarray = _hit_damage(base[attacker, ids], rolls[1] < crit[attacker, ids], multiplier)
+        _heal(hp, max_hp, attacker, ids, np.where(hit & (rolls[2] < vamp[attacker, ids]), dealt, 0))
+        _damage(hp, defender, ids, np.where(hit, dealt, 0))
+
+        # Counter, which can't be countered
+        countered: np.ndarray = hit & (hp[defender, ids] > 0) & (rolls[3] < cont[defender, ids])
+        counter_hit: np.ndarray = countered & (rolls[4] >= eva[attacker, ids])
+        counter_dealt: np.ndarray = _hit_damage(base[defender, ids], rolls[5] < crit[defender, ids], multiplier)
+        _heal(hp, max_hp, defender, ids, np.where(counter_hit & (rolls[6] < vamp[defender, ids]), counter_dealt, 0))
+        _damage(hp, attacker, ids, np.where(counter_hit, counter_dealt, 0))
+
+        # Finished fights keep their round count
+        finished: np.ndarray = (hp[0, ids] == 0) | (hp[1, ids] == 0)
+        done: np.ndarray = ids[finished]
+        batch.finished[done] = True
+        batch.a_won[done] = hp[1, done] == 0
+        batch.rounds[done] = rounds[done]
+        ids = ids[~finished]
+
+        # Speed balance, see BattleEngine.end_turn
+        ta: np.ndarray = turn_a[ids]
+        balance[ids] = np.where(dont_add[ids], balance[ids], balance[ids] + speed_diff[ids] * 0.5)
+        again_a: np.ndarray = ta & (balance[ids] >= 1)
+        again_b: np.ndarray = (~ta) & (balance[ids] <= -1)
+        balance[ids] = balance[ids] - again_a + again_b
+        again: np.ndarray = again_a | again_b
+        dont_add[ids] = again
+        passes: np.ndarray = ~again
+        rounds[ids] += passes & offbeat[ids]
+        offbeat[ids] = np.where(passes, ~offbeat[ids], offbeat[ids])
+        turn_a[ids] = np.where(passes, ~ta, ta)
+
+    batch.rounds[ids] = rounds[ids]
+    batch.a_hp, batch.b_hp = hp[0], hp[1]
+    return batch
+
+
+def fill_histogram(histogram: Histogram, values: np.ndarray) -> None:
+    # Histogram.add for many values at once
+    if len(values) == 0:
+        return
+    buckets: np.ndarray = np.bincount(np.searchsorted(histogram.get_bounds(), values, side='left'),
+                                      minlength=len(histogram.get_bounds()) + 1)
+    histogram.add_buckets(buckets.tolist(), float(values.sum()), float(values.min()), float(values.max()))
+
+
+LOADOUT_SAMPLES: int = 256
+
+
+def _get_money_value(beb: BotEntityBuilder) -> float:
+    return BattleGroup([beb.instance()]).get_battle_entities()[0].get_money_value()
+
+
+def run_batch(scenario: Scenario, fights: int, seed: Optional[int] = None) -> ScenarioStats:
+    # Same report as simulator.run_batch, user loadouts are drawn from a few pre-built ones
+    rng: np.random.Generator = np.random.default_rng(seed)
+    loadout_rng: SeededRandom = SeededRandom(seed)
+    stats: ScenarioStats = ScenarioStats()
+    if fights <= 0:
+        return stats
+    users: np.ndarray = stat_matrix([create_user_entity(scenario, loadout_rng)
+                                     for _ in range(min(fights, LOADOUT_SAMPLES))])
+    enemies: list[BotEntityBuilder] = enemy_utils.get_pools()[scenario.location][scenario.pool]
+    enemy_stats: np.ndarray = stat_matrix([beb.instance() for beb in enemies])
+    money: np.ndarray = np.array([_get_money_value(beb) for beb in enemies])
+
+    user_rows: np.ndarray = rng.integers(len(users), size=fights)
+    enemy_rows: np.ndarray = rng.integers(len(enemies), size=fights)
+    batch: FightBatch = resolve_fights(users[user_rows], enemy_stats[enemy_rows], rng)
+
+    finished: np.ndarray = batch.finished
+    won: np.ndarray = finished & batch.a_won
+    stats.fights = fights
+    stats.wins = int(won.sum())
+    stats.unfinished = int(fights - finished.sum())
+    stats.money = float(money[enemy_rows[won]].sum())
+    fill_histogram(stats.rounds, batch.rounds[finished].astype(np.float64))
+    fill_histogram(stats.dealt, (batch.b_hp_start - batch.b_hp)[finished])
+    fill_histogram(stats.taken, (batch.a_hp_start - batch.a_hp)[finished])
+    return stats
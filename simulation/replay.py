@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# Records simulated battles and plays them again, run from the repository root:
+#   python -m simulation.replay replays.jsonl --record 1000 --seed 1
+#   python -m simulation.replay replays.jsonl --repeat 10
+# Replays saved by the bot (BATTLE_REPLAY_PATH) are played the same way
+import argparse
+import json
+import time
+from typing import Any, Optional
+
+from adventure_classes.generic.battle import battle_replay
+from adventure_classes.generic.battle.battle_engine import BattleEngine
+from game_data import data_loader
+from helpers.seeded_random import SeededRandom
+from simulation.balance import create_scenarios
+from simulation.simulator import Scenario, create_engine
+
+
+def record_fights(scenarios: list[Scenario], fights: int, seed: Optional[int] = None) -> list[dict[str, Any]]:
+    rng: SeededRandom = SeededRandom(seed)
+    replays: list[dict[str, Any]] = []
+    for scenario in scenarios:
+        for _ in range(fights):
+            engine: BattleEngine = create_engine(scenario, rng, record=True)
+            engine.run()
+            replay: Optional[dict[str, Any]] = engine.get_replay()
+            if replay is not None:
+                replays.append(replay)
+    return replays
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play recorded battles again and check they end the same way")
+    parser.add_argument('path', help="JSON lines file with one replay per line")
+    parser.add_argument('--record', type=int, default=0, help="Simulate this many fights per scenario into path")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=1, help="Times every replay is played")
+    parser.add_argument('--classes', nargs='*')
+    parser.add_argument('--rarities', nargs='*')
+    parser.add_argument('--locations', nargs='*')
+    args = parser.parse_args()
+
+    data_loader.load()
+    if args.record > 0:
+        scenarios: list[Scenario] = create_scenarios(args.classes, args.rarities, args.locations)
+        with open(args.path, 'w', encoding='utf-8') as file:
+            for replay in record_fights(scenarios, args.record, args.seed):
+                file.write(json.dumps(replay, separators=(',', ':')) + '\n')
+
+    replays: list[dict[str, Any]] = battle_replay.load_file(args.path)
+    mismatches: int = 0
+    started: float = time.perf_counter()
+    for _ in range(args.repeat):
+        for replay in replays:
+            if not battle_replay.verify(replay):
+                mismatches += 1
+    elapsed: float = time.perf_counter() - started
+    total: int = len(replays) * args.repeat
+    print(f"{total} replays in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} fights/s), {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+from typing import Optional
+
+from autoslot import Slots
+
+from adventure_classes.generic.battle.battle_engine import BattleEngine
+from adventure_classes.generic.battle.battle_group import BattleGroup
+from enemy_data import enemy_utils
+from enemy_data.bot_entity_builder import BotEntityBuilder
+from enums.item_rarity import ItemRarity
+from enums.item_type import EquipmentType
+from enums.location import Location
+from enums.user_class import UserClass
+from entities.user_entity import UserEntity
+from helpers.dictref import DictRef
+from helpers.metrics import Histogram
+from helpers.seeded_random import SeededRandom
+from item_data import item_loader
+from item_data.item_classes import Equipment, RandomEquipmentBuilder
+
+ROUND_BOUNDS: tuple[float, ...] = (1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 30, 50, 100)
+DAMAGE_BOUNDS: tuple[float, ...] = (1, 2, 5, 10, 15, 20, 30, 40, 50, 75, 100, 150, 200, 500)
+
+
+class Scenario(Slots):
+    # A user loadout against the enemies of one location pool
+    def __init__(self, user_class: UserClass, rarity: ItemRarity, location: Location, pool: str, tier: int = 0):
+        self.user_class: UserClass = user_class
+        self.rarity: ItemRarity = rarity
+        self.location: Location = location
+        self.pool: str = pool
+        self.tier: int = tier
+
+    def __reduce__(self):
+        # Enums holding objects can't be pickled by value, the scenario travels to worker processes by names
+        return _create_scenario, (self.user_class.name, self.rarity.name, self.location.name, self.pool, self.tier)
+
+    def get_name(self) -> str:
+        pool: str = f"/{self.pool}" if self.pool else ''
+        return f"{self.user_class.name} {self.rarity.get_name()} vs {self.location.name}{pool}"
+
+
+def _create_scenario(user_class: str, rarity: str, location: str, pool: str, tier: int) -> Scenario:
+    return Scenario(UserClass[user_class], ItemRarity[rarity], Location[location], pool, tier)
+
+
+class FightResult(Slots):
+    def __init__(self, won: bool, rounds: int, dealt: int, taken: int, money: float):
+        self.won: bool = won
+        self.rounds: int = rounds
+        self.dealt: int = dealt
+        self.taken: int = taken
+        self.money: float = money
+
+
+class ScenarioStats:
+    def __init__(self):
+        self.fights: int = 0
+        self.wins: int = 0
+        self.unfinished: int = 0
+        self.money: float = 0
+        self.rounds: Histogram = Histogram(ROUND_BOUNDS)
+        self.dealt: Histogram = Histogram(DAMAGE_BOUNDS)
+        self.taken: Histogram = Histogram(DAMAGE_BOUNDS)
+
+    def add(self, result: Optional[FightResult]) -> None:
+        self.fights += 1
+        if result is None:
+            self.unfinished += 1
+            return
+        if result.won:
+            self.wins += 1
+            self.money += result.money
+        self.rounds.add(result.rounds)
+        self.dealt.add(result.dealt)
+        self.taken.add(result.taken)
+
+    def merge(self, other: 'ScenarioStats') -> None:
+        self.fights += other.fights
+        self.wins += other.wins
+        self.unfinished += other.unfinished
+        self.money += other.money
+        self.rounds.merge(other.rounds)
+        self.dealt.merge(other.dealt)
+        self.taken.merge(other.taken)
+
+    def get_win_rate(self) -> float:
+        return self.wins / self.fights if self.fights else 0
+
+    def print(self) -> str:
+        return (f"fights={self.fights} win={self.get_win_rate():.1%} rounds avg={self.rounds.get_mean():.1f} "
+                f"p95={self.rounds.percentile(95):g} | dealt avg={self.dealt.get_mean():.1f} "
+                f"p95={self.dealt.percentile(95):g} | taken avg={self.taken.get_mean():.1f} "
+                f"p95={self.taken.percentile(95):g} | money/fight={self.money / max(self.fights, 1):.1f}")
+
+
+def get_scenario_pools() -> list[tuple[Location, str]]:
+    pools: list[tuple[Location, str]] = []
+    for location, location_pools in enemy_utils.get_pools().items():
+        for pool, enemies in location_pools.items():
+            if enemies:
+                pools.append((location, pool))
+    return pools
+
+
+def build_loadout(scenario: Scenario, rng: Optional[SeededRandom] = None) -> dict[EquipmentType, Equipment]:
+    # One random item of the scenario rarity per slot, from the location and generic items of the tier
+    equipment: dict[EquipmentType, Equipment] = {}
+    by_location = item_loader.get_equipment_dict()[scenario.tier]
+    for location in [scenario.location, Location.ANYWHERE]:
+        for equipment_type, descriptions in by_location[location].items():
+            if descriptions and (equipment_type not in equipment):
+                equipment[equipment_type] = RandomEquipmentBuilder(scenario.tier).set_location(location) \
+                    .set_type(equipment_type).set_rarity(scenario.rarity).build(rng)
+    return equipment
+
+
+def create_user_entity(scenario: Scenario, rng: Optional[SeededRandom] = None) -> UserEntity:
+    user_entity: UserEntity = UserEntity(DictRef({'name': 'Simulated'}, 'name'))
+    user_entity.set_class(scenario.user_class)
+    user_entity.update_equipment(build_loadout(scenario, rng))
+    return user_entity
+
+
+def _get_hp_sum(group: BattleGroup) -> int:
+    return sum(battle_entity.get_hp() for battle_entity in group.get_battle_entities())
+
+
+def create_engine(scenario: Scenario, rng: SeededRandom, record: bool = False) -> BattleEngine:
+    # A loaded fight of the scenario, record keeps its replay log
+    beb: BotEntityBuilder = enemy_utils.get_random_enemy(scenario.location, scenario.pool, rng=rng)
+    engine: BattleEngine = BattleEngine(BattleGroup([create_user_entity(scenario, rng)]), BattleGroup([beb.instance()]),
+                                        rng=rng.spawn(), record=record)
+    engine.load()
+    return engine
+
+
+def simulate_fight(scenario: Scenario, max_turns: int = 500, rng: Optional[SeededRandom] = None) \
+        -> Optional[FightResult]:
+    engine: BattleEngine = create_engine(scenario, SeededRandom() if rng is None else rng)
+    user_group: BattleGroup = engine.group_a
+    enemy_group: BattleGroup = engine.group_b
+    user_hp: int = _get_hp_sum(user_group)
+    enemy_hp: int = _get_hp_sum(enemy_group)
+    winner: Optional[BattleGroup] = engine.run(max_turns=max_turns)
+    if winner is None:
+        return None
+    won: bool = winner == user_group
+    return FightResult(won, engine.round, enemy_hp - _get_hp_sum(enemy_group), user_hp - _get_hp_sum(user_group),
+                       engine.get_money_won() if won else 0)
+
+
+def run_batch(scenario: Scenario, fights: int, seed: Optional[int] = None) -> ScenarioStats:
+    rng: SeededRandom = SeededRandom(seed)
+    stats: ScenarioStats = ScenarioStats()
+    for _ in range(fights):
+        stats.add(simulate_fight(scenario, rng=rng))
+    return stats
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import tempfile
+from functools import partial
+from unittest import TestCase
+
+import utils
+from adventure_classes.game_adventures import forest, snapshot
+from adventure_classes.game_adventures.adventure_provider import AdventureInstance, nothing
+from adventure_classes.game_adventures.snapshot import chapters_from_dict
+from adventure_classes.generic import adventure_store
+from adventure_classes.generic.adventure import Adventure, get_dormant
+from adventure_classes.generic.adventure_store import FileAdventureStore
+from adventure_classes.generic.battle.battle import BattleChapter
+from adventure_classes.generic.battle.battle_group import BattleGroup, BattleGroupUserDelayed
+from adventure_classes.generic.bonus import BonusChapter
+from adventure_classes.generic.choice import ChoiceChapter
+from adventure_classes.generic.reward import ItemRewardChapter, MoneyRewardChapter
+from enemy_data import enemy_utils
+from entities.ai.ability_ai import AbilityAI, AbilityDecision
+from enums.emoji import Emoji
+from enums.location import Location
+from db.memory_database import MemoryDatabase
+from game_data import data_loader
+from helpers import messages, storage
+from helpers.func_ref import to_reference, from_reference
+from helpers.keyed_lock import USER_LOCKS
+from item_data.abilities import AbilityContainer, AbilityEnum
+from item_data.item_classes import RandomEquipmentBuilder
+from item_data.stat import Stat
+from item_data.stat_modifier import StatModifier, StatModifierOperation
+
+
+class FakeChannel:
+    def __init__(self):
+        self.id: int = 5
+        self.messages: dict = {}
+
+    async def fetch_message(self, message_id: int):
+        return self.messages[message_id]
+
+
+class FakeClient:
+    def __init__(self, channel: FakeChannel):
+        self.channel: FakeChannel = channel
+
+    def get_channel(self, _: int):
+        return self.channel
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, channel: FakeChannel):
+        self.id: int = message_id
+        self.channel: FakeChannel = channel
+        self.content: str = ''
+        channel.messages[message_id] = self
+
+    async def edit(self, content: str):
+        self.content = content
+
+    async def add_reaction(self, _: str):
+        pass
+
+    async def clear_reactions(self):
+        pass
+
+
+def _round_trip(chapter):
+    data = chapter.to_dict()
+    data['type'] = type(chapter).__name__
+    return chapters_from_dict(json.loads(json.dumps({'chapters': [data]})))[0]
+
+
+class TestAdventureStore(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def test_file_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileAdventureStore(directory)
+
+            async def run():
+                await store.save(1, {'a': [1, 2]})
+                await store.save(2, {'b': None})
+                await store.save(1, {'a': [3]})
+                self.assertEqual({'a': [3]}, await store.load(1))
+                self.assertEqual({1: {'a': [3]}, 2: {'b': None}}, await store.load_all())
+                await store.delete(1)
+                await store.delete(1)
+                self.assertIsNone(await store.load(1))
+
+            asyncio.run(run())
+
+    def test_func_ref(self):
+        self.assertIs(forest.a_deep, from_reference(to_reference(forest.a_deep)))
+        restored = from_reference(json.loads(json.dumps(to_reference(partial(forest.eat_mushroom, 2)))))
+        self.assertIs(forest.eat_mushroom, restored.func)
+        self.assertEqual((2,), restored.args)
+        self.assertIsNone(to_reference(lambda adventure: None))
+        self.assertIsNone(to_reference(partial(forest.eat_mushroom, object())))
+
+    def test_choice(self):
+        chapter = ChoiceChapter(Emoji.MUSHROOM, 'text', skip=False)
+        chapter.add_choice(Emoji.UP, 'up', forest.a_deep)
+        chapter.add_choice(Emoji.RED, 'red', partial(forest.eat_mushroom, 0))
+        restored = _round_trip(chapter)
+        self.assertEqual('text', restored.msg)
+        self.assertFalse(restored.skip)
+        self.assertEqual([Emoji.UP, Emoji.RED], [icon for icon, _, _ in restored.choices])
+        self.assertIs(forest.a_deep, restored.choices[0][2])
+        chapter.add_choice(Emoji.BLUE, 'blue', lambda adventure: None)
+        self.assertIsNone(chapter.to_dict())
+
+    def test_bonus_and_rewards(self):
+        bonus = BonusChapter('bonus')
+        bonus.add_modifier(StatModifier(Stat.DEF, -2, StatModifierOperation.ADD, 1))
+        bonus.add_persistent(Stat.HP, 4)
+        self.assertEqual(bonus.to_dict(), _round_trip(bonus).to_dict())
+
+        money = MoneyRewardChapter(120)
+        self.assertEqual(120, _round_trip(money).money)
+
+        item = ItemRewardChapter(RandomEquipmentBuilder(0).set_location(Location.FOREST).build())
+        restored = _round_trip(item)
+        self.assertEqual(item.item.print(), restored.item.print())
+
+    def test_battle(self):
+        ai = AbilityAI([AbilityDecision(0, 0.5, AbilityContainer(AbilityEnum.SUMMON, 100), max_uses=1)])
+        boss = enemy_utils.get_random_enemy(Location.FOREST, 'BOSS', None).instance(ai)
+        chapter = BattleChapter(BattleGroupUserDelayed(), BattleGroup([boss]), icon=Emoji.FOREST,
+                                pre_text=['a', 'b'], is_boss=True)
+        restored = _round_trip(chapter)
+        self.assertEqual(chapter.to_dict(), restored.to_dict())
+        entity = restored.to_dict()['enemies'][0]
+        self.assertEqual(boss.get_name(), entity['name'])
+        self.assertEqual('ability', entity['ai']['type'])
+
+        duel = BattleChapter(BattleGroup(), BattleGroup())
+        self.assertIsNone(duel.to_dict())
+
+    def test_evict(self):
+        channel = FakeChannel()
+        message = FakeMessage(20, channel)
+        old_client = utils.BOT_CLIENT
+        utils.BOT_CLIENT = FakeClient(channel)
+        old_idle = Adventure.IDLE_EVICT_SECONDS
+        Adventure.IDLE_EVICT_SECONDS = 0.05
+
+        async def run():
+            adventure = Adventure('en', AdventureInstance(nothing, 'FOREST.NAME', Emoji.FOREST))
+            choice = ChoiceChapter(Emoji.GARDEN, 'text').add_choice(Emoji.UP, 'up', forest.a_deep)
+            await adventure.resume(message, [choice, MoneyRewardChapter(50)], utils.now() + 600)
+            self.assertTrue(messages.is_tracked(20))
+            await asyncio.sleep(0.3)
+            self.assertIs(adventure, get_dormant(20))
+            self.assertFalse(messages.is_tracked(20))
+            self.assertFalse(adventure.has_finished())
+            self.assertEqual(['ChoiceChapter', 'MoneyRewardChapter'],
+                             [chapter['type'] for chapter in (await store.load(20))['chapters']])
+
+            self.assertTrue(await snapshot.rehydrate(MemoryDatabase(), adventure))
+            self.assertIsNone(get_dormant(20))
+            self.assertTrue(messages.is_tracked(20))
+            self.assertIn('up', message.content)
+            await adventure.evict()  # The idle timer was started again
+            await asyncio.sleep(0.3)
+            await adventure.forget()
+            self.assertIsNone(await store.load(20))
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileAdventureStore(directory)
+            adventure_store.set_store(store)
+            try:
+                asyncio.run(run())
+            finally:
+                adventure_store.set_store(None)
+                utils.BOT_CLIENT = old_client
+                Adventure.IDLE_EVICT_SECONDS = old_idle
+
+    def test_rehydrate_refund(self):
+        channel = FakeChannel()
+        message = FakeMessage(21, channel)
+        old_client = utils.BOT_CLIENT
+        utils.BOT_CLIENT = FakeClient(channel)
+        db = MemoryDatabase()
+
+        async def run():
+            user = storage.get_user(db, 1)
+            user.remove_tokens(1)
+            tokens: int = user.get_tokens()
+            adventure = Adventure('en', AdventureInstance(nothing, 'FOREST.NAME', Emoji.FOREST))
+            adventure.restore_users([(user, 0)])
+            choice = ChoiceChapter(Emoji.GARDEN, 'text').add_choice(Emoji.UP, 'up', forest.a_deep)
+            await adventure.resume(message, [choice], utils.now() + 600)
+            await adventure.evict()
+            self.assertTrue(adventure.is_dormant())
+            await store.delete(21)  # Lost snapshot
+            self.assertFalse(await snapshot.rehydrate(db, adventure))
+            self.assertEqual(tokens + 1, user.get_tokens())
+            self.assertEqual(tokens + 1, db.get_row_data('users', {'id': 1})['tokens'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileAdventureStore(directory)
+            adventure_store.set_store(store)
+            try:
+                asyncio.run(run())
+            finally:
+                adventure_store.set_store(None)
+                utils.BOT_CLIENT = old_client
+                storage.clear_cache()
+
+    def test_finish_locks_users(self):
+        channel = FakeChannel()
+        message = FakeMessage(22, channel)
+        db = MemoryDatabase()
+
+        async def run():
+            user = storage.get_user(db, 1)
+            adventure = Adventure('en', AdventureInstance(nothing, 'FOREST.NAME', Emoji.FOREST))
+            adventure.restore_users([(user, 0)])
+            choice = ChoiceChapter(Emoji.GARDEN, 'text').add_choice(Emoji.UP, 'up', forest.a_deep)
+            await adventure.resume(message, [choice], utils.now() + 600)
+            user.add_money(5)  # Progress made outside of commands
+            async with USER_LOCKS.hold(1):  # A command of the user is running
+                task = asyncio.ensure_future(adventure.finish(lost=False))
+                await asyncio.sleep(0.01)
+                self.assertIs(adventure, user._adventure)  # noqa
+            await task
+            self.assertIsNone(user._adventure)  # noqa
+            self.assertEqual(user.get_money(), db.get_row_data('users', {'id': 1})['money'])
+
+        try:
+            asyncio.run(run())
+        finally:
+            storage.clear_cache()
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from adventure_classes.generic.battle.battle_engine import BattleEngine
+from adventure_classes.generic.battle.battle_group import BattleGroup
+from entities.ai.base_ai import BaseBotAI
+from entities.bot_entity import BotEntity
+from entities.user_entity import UserEntity
+from enums.user_class import UserClass
+from helpers.dictref import DictRef
+from item_data.stat import Stat
+
+
+def create_bot(name: str, hp: int, strength: int) -> BotEntity:
+    return BotEntity(name, {Stat.HP: hp, Stat.STR: strength, Stat.DEF: 1, Stat.SPD: 1}, BaseBotAI())
+
+
+class TestBattleEngine(TestCase):
+    def test_bots(self):
+        strong = create_bot('strong', 20, 10)
+        engine = BattleEngine(BattleGroup([strong]), BattleGroup([create_bot('weak', 2, 1)]))
+        engine.load()
+        self.assertEqual(engine.group_a, engine.run())
+        self.assertTrue(engine.group_b.get_battle_entities()[0].is_dead())
+        self.assertGreater(engine.get_money_won(), 0)
+        self.assertTrue(engine.battle_log)
+
+    def test_user(self):
+        user_entity = UserEntity(DictRef({'name': 'user'}, 'name'))
+        user_entity.set_class(next(iter(UserClass)))
+        engine = BattleEngine(BattleGroup([user_entity]), BattleGroup([create_bot('enemy', 3, 1),
+                                                                      create_bot('enemy 2', 3, 1)]))
+        engine.load()
+        winner = engine.run()
+        self.assertIsNotNone(winner)
+        self.assertEqual(winner, engine.get_winner())
+        self.assertGreater(engine.round, 1)
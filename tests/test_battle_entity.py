@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+from adventure_classes.generic.battle.battle_group import BattleGroup
+from entities.ai.base_ai import BaseBotAI
+from entities.bot_entity import BotEntity
+from entities.user_entity import UserEntity
+from enums.user_class import UserClass
+from helpers.dictref import DictRef
+from item_data.stat import Stat
+from item_data.stat_modifier import StatModifier, StatModifierOperation
+
+
+class TestBattleEntityStats(TestCase):
+    def setUp(self):
+        self.bot = BotEntity('bot', {Stat.HP: 5, Stat.STR: 4, Stat.DEF: 2, Stat.EVA: 30}, BaseBotAI())
+        self.battle_entity = BattleGroup([self.bot]).get_battle_entities()[0]
+
+    def test_array(self):
+        stats = self.battle_entity.get_stat_array()
+        self.assertEqual(len(Stat), len(stats))
+        for stat in Stat:
+            self.assertEqual(self.bot.get_stat(stat), stats[stat.get_index()])
+        self.assertAlmostEqual(0.5, self.battle_entity.get_stat_value(Stat.EVA))
+
+    def test_entity_modifiers(self):
+        self.assertEqual(4, self.battle_entity.get_stat(Stat.STR))
+        self.bot.add_modifier(StatModifier(Stat.STR, 2, StatModifierOperation.MULT, 1))
+        self.assertEqual(8, self.battle_entity.get_stat(Stat.STR))
+        self.bot.step_turn_modifiers()
+        self.assertEqual(4, self.battle_entity.get_stat(Stat.STR))
+
+    def test_temp_modifiers(self):
+        self.battle_entity.add_temp_modifier(StatModifier(Stat.DEF, -3, StatModifierOperation.ADD, 2))
+        self.assertEqual(0, self.battle_entity.get_stat(Stat.DEF))
+        self.battle_entity.step_turn_modifiers()
+        self.assertEqual(0, self.battle_entity.get_stat(Stat.DEF))
+        self.battle_entity.step_turn_modifiers()
+        self.assertEqual(2, self.battle_entity.get_stat(Stat.DEF))
+
+    def test_equipment(self):
+        user_entity = UserEntity(DictRef({'name': 'user'}, 'name'))
+        user_entity.set_class(UserClass.WARRIOR)
+        battle_entity = BattleGroup([user_entity]).get_battle_entities()[0]
+        before = battle_entity.get_stat(Stat.HP)
+        user_entity.set_class(UserClass.ROGUE)
+        self.assertEqual(user_entity.get_stat(Stat.HP), battle_entity.get_stat(Stat.HP))
+        self.assertEqual(UserClass.WARRIOR.get_stats().get(Stat.HP, 0), before)
@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from adventure_classes.generic.battle import battle_replay
+from enums.item_rarity import ItemRarity
+from enums.location import Location
+from enums.user_class import UserClass
+from game_data import data_loader
+from helpers.seeded_random import SeededRandom, derive_seed
+from simulation.simulator import Scenario, create_engine
+
+
+def _record(scenario: Scenario, seed: int) -> dict:
+    engine = create_engine(scenario, SeededRandom(seed), record=True)
+    engine.run()
+    return json.loads(json.dumps(engine.get_replay()))
+
+
+class TestBattleReplay(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def test_seeded_random(self):
+        self.assertEqual(SeededRandom(4).random(), SeededRandom(4).random())
+        self.assertEqual(SeededRandom(4).derive('shop', 2).random(), SeededRandom(4).derive('shop', 2).random())
+        self.assertNotEqual(SeededRandom(4).derive('shop', 2).initial_seed,
+                            SeededRandom(4).derive('shop', 3).initial_seed)
+        rng = SeededRandom(4)
+        rng.random()
+        self.assertEqual(SeededRandom(4).derive('a').initial_seed, rng.derive('a').initial_seed)
+        self.assertEqual(SeededRandom(4).spawn().initial_seed, SeededRandom(4).spawn().initial_seed)
+        self.assertEqual(derive_seed(1, 'a', 2), derive_seed(1, 'a', 2))
+        self.assertLess(derive_seed(1, 'a', 2), 1 << 63)
+
+    def test_verify(self):
+        for index, user_class in enumerate(UserClass):
+            replay = _record(Scenario(user_class, ItemRarity.RARE, Location.FOREST, 'A'), index)
+            self.assertTrue(replay['steps'])
+            self.assertTrue(battle_replay.verify(replay))
+            replay['result'][0] += 1
+            self.assertFalse(battle_replay.verify(replay))
+
+    def test_record_file(self):
+        replay = _record(Scenario(UserClass.WARRIOR, ItemRarity.RARE, Location.FOREST, 'A'), 1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'battles.jsonl')
+            with mock.patch.dict(os.environ, {'BATTLE_REPLAY_PATH': path}):
+                battle_replay.record(replay)
+                battle_replay.record(replay).result()  # Written by another thread, in order
+            self.assertEqual([replay, replay], battle_replay.load_file(path))
+
+    def test_same_seed(self):
+        scenario = Scenario(UserClass.ROGUE, ItemRarity.EPIC, Location.LAKE, 'A')
+        self.assertEqual(_record(scenario, 7), _record(scenario, 7))
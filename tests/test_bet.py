@@ -0,0 +1,46 @@
+import asyncio
+from unittest import TestCase
+
+from adventure_classes.game_adventures import adventure_provider  # noqa, loads helpers.command as main.py does
+from benchmark.population import populate
+from commands import bet
+from db.memory_database import MemoryDatabase
+from game_data import data_loader
+from helpers import storage
+from helpers.command import CommandHandler, MockSlashContext, COMMAND_FLAGS
+from helpers.keyed_lock import USER_LOCKS
+
+
+class TestBet(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def tearDown(self):
+        storage.clear_cache()
+
+    def test_end_waits_for_bettors(self):
+        db = MemoryDatabase()
+        population = populate(db, 1, 1, seed=1)
+        user_id: int = population.user_ids[0]
+        guild_id: int = population.user_guilds[user_id]
+        flags: dict[str, bool] = {x: False for x in COMMAND_FLAGS}
+
+        async def run():
+            handler = CommandHandler(db, None)  # noqa
+            ctx = MockSlashContext(user_id, guild_id, echo=False)
+            await handler.call(ctx, bet.add, 100, **{**flags, 'guild_only': True, 'guild_lock': True})
+            guild = storage.get_guild(db, guild_id)
+            self.assertTrue(guild.bet.is_active())
+            sent: int = len(ctx.sent)
+            async with USER_LOCKS.hold(user_id):  # A command of the bettor is running
+                task = asyncio.ensure_future(guild.bet._end(ctx, guild.bet._bet_ref['finish_time']))  # noqa
+                await asyncio.sleep(0.01)
+                self.assertTrue(guild.bet.is_active())
+            await task
+            self.assertFalse(guild.bet.is_active())
+            self.assertEqual(sent + 1, len(ctx.sent))
+            self.assertEqual({}, db.get_row_data('guilds', {'id': guild_id})['ongoing_bet'])  # Committed
+
+        asyncio.run(run())
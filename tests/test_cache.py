@@ -1,3 +1,5 @@
+import threading
+import time
 from unittest import TestCase
 
 from helpers.cache import Cache
@@ -18,4 +20,51 @@ class TestCache(TestCase):
         self.assertEqual(100, len(cache))
         # Overload cache
         cache['TooMany'] = 2
-        self.assertEqual(cache.limit - int(cache.limit * Cache.REMOVE_PCT) + 1, len(cache))
+        self.assertEqual(cache.limit, len(cache))
+        self.assertNotIn(0, cache)
+        self.assertEqual(1, cache.evictions)
+
+    def test_lru(self):
+        cache = Cache(limit=5)
+        for i in range(5):
+            cache[i] = i
+        cache.get(0)  # Most recently used now
+        cache[5] = 5
+        self.assertIn(0, cache)
+        self.assertNotIn(1, cache)
+        self.assertEqual(1, cache.evictions)
+
+    def test_evict_callback(self):
+        evicted = []
+        cache = Cache(limit=3, on_evict=lambda k, v: evicted.append(k), is_pinned=lambda v: v == 'pinned')
+        cache[0] = 'pinned'
+        cache[1] = 'a'
+        cache[2] = 'b'
+        cache[3] = 'c'
+        self.assertEqual([1], evicted)
+        self.assertIn(0, cache)
+
+    def test_ttl(self):
+        cache = Cache(ttl=-1)
+        cache['Test'] = 24
+        self.assertIsNone(cache.get('Test'))
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, cache.expirations)
+
+    def test_wait_evicted(self):
+        saving = threading.Event()
+        saved = threading.Event()
+
+        def on_evict(key, value):
+            saving.set()
+            time.sleep(0.05)
+            saved.set()
+
+        cache = Cache(limit=1, on_evict=on_evict)
+        cache[0] = 'a'
+        thread = threading.Thread(target=cache.__setitem__, args=(1, 'b'))
+        thread.start()
+        saving.wait()
+        self.assertTrue(cache.wait_evicted(0, 1))
+        self.assertTrue(saved.is_set())  # The reload of 0 would see what was saved
+        thread.join()
@@ -0,0 +1,69 @@
+import unittest
+from unittest import TestCase
+
+from enums.item_rarity import ItemRarity
+from enums.location import Location
+from enums.user_class import UserClass
+from game_data import data_loader
+from helpers.metrics import Histogram
+from item_data.stat import Stat
+from simulation import simulator
+
+try:
+    import numpy as np
+    from simulation import kernel
+except ImportError:
+    np = None
+    kernel = None
+
+
+def _stats(**values):
+    row = np.zeros((1, len(kernel.STATS)))
+    for abv, value in values.items():
+        row[0, kernel.STAT_COLUMNS[Stat.get_by_abv(abv)]] = value
+    return row
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestKernel(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def test_effective_stats(self):
+        effective = kernel.effective_stats(_stats(HP=5, SPD=10, EVA=30))
+        self.assertEqual(Stat.HP.get_value(5), effective[0, kernel.STAT_COLUMNS[Stat.HP]])
+        self.assertAlmostEqual(Stat.SPD.get_value(10), effective[0, kernel.STAT_COLUMNS[Stat.SPD]])
+        self.assertAlmostEqual(Stat.EVA.get_value(30), effective[0, kernel.STAT_COLUMNS[Stat.EVA]])
+
+    def test_expected_damage(self):
+        attacker = kernel.effective_stats(_stats(STR=4))
+        defender = kernel.effective_stats(_stats(DEF=2))
+        self.assertEqual(round((4 * 4 + 8) / (2 * 1.5 + 6)) * 2, kernel.expected_damage(attacker, defender, 2)[0])
+
+    def test_resolve(self):
+        strong = np.repeat(_stats(HP=10, STR=20), 3, axis=0)
+        weak = np.repeat(_stats(HP=1), 3, axis=0)
+        batch = kernel.resolve_fights(weak, strong, np.random.default_rng(1))
+        self.assertTrue(batch.finished.all())
+        self.assertFalse(batch.a_won.any())
+        self.assertTrue((batch.rounds == 1).all())
+        self.assertTrue((batch.b_hp == batch.b_hp_start - 1).all())
+
+    def test_fill_histogram(self):
+        values = [0.5, 1, 3, 3, 7, 1000]
+        expected = Histogram(simulator.DAMAGE_BOUNDS)
+        for value in values:
+            expected.add(value)
+        histogram = Histogram(simulator.DAMAGE_BOUNDS)
+        kernel.fill_histogram(histogram, np.array(values))
+        self.assertEqual(expected.print(), histogram.print())
+
+    def test_matches_engine(self):
+        scenario = simulator.Scenario(UserClass.WARRIOR, ItemRarity.COMMON, Location.COLISEUM, '1')
+        python_stats = simulator.run_batch(scenario, 1000, seed=1)
+        numpy_stats = kernel.run_batch(scenario, 5000, seed=1)
+        self.assertEqual(5000, numpy_stats.fights)
+        self.assertAlmostEqual(python_stats.get_win_rate(), numpy_stats.get_win_rate(), delta=0.05)
+        self.assertAlmostEqual(python_stats.rounds.get_mean(), numpy_stats.rounds.get_mean(), delta=0.3)
@@ -0,0 +1,37 @@
+import asyncio
+from unittest import TestCase
+
+from helpers.keyed_lock import KeyedLock
+
+
+class TestKeyedLock(TestCase):
+    def test_serializes_same_key(self):
+        lock = KeyedLock('test')
+        order = []
+
+        async def job(key, name: str):
+            async with lock.hold(key):
+                order.append(f"{name}+")
+                await asyncio.sleep(0.01)
+                order.append(f"{name}-")
+
+        async def run():
+            await asyncio.gather(job(1, 'a'), job(1, 'b'), job(2, 'c'))
+
+        asyncio.run(run())
+        self.assertLess(order.index('a-'), order.index('b+'))
+        self.assertLess(order.index('c+'), order.index('a-'))  # Other keys are not blocked
+        self.assertEqual(1, lock.contended)
+        self.assertEqual(0, len(lock._entries))  # noqa
+
+    def test_timeout(self):
+        lock = KeyedLock('test', timeout=0.01)
+
+        async def run():
+            async with lock.hold(1):
+                with self.assertRaises(asyncio.TimeoutError):
+                    async with lock.hold(1):
+                        pass
+
+        asyncio.run(run())
+        self.assertEqual(1, lock.timeouts)
@@ -0,0 +1,86 @@
+import asyncio
+import copy
+import random
+from unittest import TestCase
+
+from benchmark import bench
+from benchmark.population import populate, _get_builder  # noqa
+from db.memory_database import MemoryDatabase
+from game_data import data_loader
+from helpers import storage
+from item_data.item_utils import create_guild_items
+
+
+class TestMemoryDatabase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def test_rows(self):
+        db = MemoryDatabase()
+        self.assertEqual({'id': 1}, db.insert_data('items', {'desc_id': 3, 'data': {1: 'a'}}, returns=True,
+                                                   return_columns=['id']))
+        self.assertEqual({'1': 'a'}, db.get_row_data('items', {'id': 1})['data'])  # As JSON
+        db.insert_many('user_items', [{'user_id': 5, 'slot': '1', 'item_id': 1},
+                                      {'user_id': 5, 'slot': '2', 'item_id': 2}])
+        db.update_data('user_items', {'user_id': 5, 'item_id': 1}, {'slot': 'h'})
+        self.assertEqual(['2', 'h'], sorted(x['slot'] for x in db.get_row_data('user_items', {'user_id': 5},
+                                                                                limit=None)))
+        with self.assertRaises(ValueError):
+            db.update_data('user_items', {'user_id': 5, 'slot': 'h'}, {'slot': '2'})
+        user = db.insert_data('users', {'id': 5}, returns=True)
+        self.assertEqual(-1, user['class'])
+        bundle = db.get_user_bundles([5, 6])
+        self.assertEqual([5], list(bundle))
+        self.assertIsNone(bundle[5][1])
+        self.assertEqual([{'slot': 'h', 'item_id': 1, 'desc_id': 3, 'data': {'1': 'a'}}], bundle[5][2])
+        db.delete_rows_in('user_items', 'item_id', [1, 2])
+        self.assertEqual([], db.get_owned_items('user_items', 'user_id', [5]))
+
+    def test_owned_items(self):
+        db = MemoryDatabase()
+        items = [(_get_builder().build(random.Random(i)), str(i)) for i in range(3)]
+        create_guild_items(db, 7, items)
+        for item, slot in items:
+            self.assertEqual(item.get_id(), db.get_row_data('guild_items', {'guild_id': 7, 'slot': slot})['item_id'])
+            self.assertEqual(item.to_dict(), db.get_row_data('items', {'id': item.get_id()})['data'])
+
+    def test_rollback(self):
+        db = MemoryDatabase()
+
+        async def run():
+            db.insert_data('users', {'id': 1, 'money': 10})
+            db.commit()
+            async with db.checkout():
+                db.update_data('users', {'id': 1}, {'money': 20})
+                db.insert_data('users', {'id': 2})
+                db.delete_row('users', {'id': 1})
+                db.rollback()
+            async with db.checkout():
+                db.update_data('users', {'id': 1}, {'money': 30})  # Released without a commit
+            async with db.checkout():
+                db.insert_data('users', {'id': 3})
+                db.commit()
+
+        asyncio.run(run())
+        self.assertEqual(10, db.get_row_data('users', {'id': 1})['money'])
+        self.assertIsNone(db.get_row_data('users', {'id': 2}))
+        self.assertIsNotNone(db.get_row_data('users', {'id': 3}))
+
+    def test_benchmark(self):
+        db = MemoryDatabase()
+        population = populate(db, 50, 3, seed=1)
+        try:
+            report = asyncio.run(bench.run_benchmark(db, population, 300, list(bench.WORKLOADS.values()), seed=1))
+        finally:
+            storage.clear_cache()
+        self.assertEqual(300, sum(stats['ops'] for stats in report['commands'].values()))
+        for name, stats in report['commands'].items():
+            self.assertEqual(0, stats['errors'], name)
+            self.assertLess(stats['statements'], 6, name)
+        self.assertEqual([], bench.compare(report, report, 0))
+        slower = copy.deepcopy(report)
+        slower['commands']['bet'].update(p99_ms=report['commands']['bet']['p99_ms'] * 2 + 1,
+                                         ops_s=report['commands']['bet']['ops_s'] / 2)
+        self.assertEqual(2, len(bench.compare(slower, report, 0.2)))  # The mix as a whole barely changes
@@ -0,0 +1,44 @@
+import asyncio
+from unittest import TestCase
+
+from helpers.message_editor import MessageEditor, EditRateLimiter, EDIT_STATS
+
+
+class FakeMessage:
+    def __init__(self):
+        self.content: str = ''
+        self.edits: list[str] = []
+
+    async def edit(self, content: str):
+        self.content = content
+        self.edits.append(content)
+
+
+class TestMessageEditor(TestCase):
+    def test_coalesces(self):
+        message = FakeMessage()
+        editor = MessageEditor(message, window=0.01)  # noqa
+        dropped: int = EDIT_STATS.dropped
+
+        async def run():
+            for i in range(5):
+                editor.edit(str(i))
+            await editor.flush()
+            editor.edit('last')
+            await editor.flush()
+
+        asyncio.run(run())
+        self.assertEqual(['4', 'last'], message.edits)
+        self.assertEqual(4, EDIT_STATS.dropped - dropped)
+        self.assertEqual(0, EDIT_STATS.pending)
+
+    def test_rate_limit(self):
+        limiter = EditRateLimiter(amount=2, per=0.05)
+
+        async def run():
+            for _ in range(3):
+                await limiter.wait(1)
+            await limiter.wait(2)
+
+        asyncio.run(run())
+        self.assertEqual(1, limiter.waits)
@@ -0,0 +1,50 @@
+import asyncio
+from unittest import TestCase
+
+from enums.emoji import Emoji
+from helpers import messages
+
+
+class FakeMessage:
+    def __init__(self, message_id: int):
+        self.id: int = message_id
+        self.content: str = ''
+
+    async def add_reaction(self, emoji: str):
+        pass
+
+
+class TestMessages(TestCase):
+    def test_normalize(self):
+        self.assertEqual(messages.normalize_emoji(Emoji.SHIELD), messages.normalize_emoji('🛡'))
+        self.assertEqual(messages.normalize_emoji(Emoji.ONE), messages.normalize_emoji('1️⃣'))
+        self.assertEqual(messages.normalize_emoji(Emoji.DOWN), '⬇')
+        self.assertIsNone(messages.normalize_emoji(object()))  # noqa
+
+    def test_hook_arity(self):
+        calls = []
+
+        async def no_args():
+            calls.append(())
+
+        async def user_only(user):
+            calls.append((user,))
+
+        async def both(user, emoji):
+            calls.append((user, emoji))
+
+        async def run():
+            for hook in [no_args, user_only, both]:
+                await messages.ReactionHook(Emoji.OK, hook).call('user')  # noqa
+
+        asyncio.run(run())
+        self.assertEqual([(), ('user',), ('user', Emoji.OK)], calls)
+
+    def test_expiry(self):
+        mp = messages.register_message_reactions(FakeMessage(1), set())  # noqa
+        self.assertTrue(messages.is_tracked(1))
+        mp._first_interaction -= messages.MessagePlus.FINISH_SECONDS + 1  # noqa
+        messages._EXPIRY_HEAP[0] = (mp.get_finish_time(), 1)  # noqa
+        messages.register_message_reactions(FakeMessage(2), set())  # noqa
+        self.assertFalse(messages.is_tracked(1))
+        self.assertTrue(messages.is_tracked(2))
@@ -0,0 +1,19 @@
+from unittest import TestCase
+
+from helpers.metrics import Histogram
+
+
+class TestHistogram(TestCase):
+    def test_percentile(self):
+        histogram = Histogram()
+        for i in range(1, 101):
+            histogram.add(i)
+        self.assertEqual(100, histogram.count)
+        self.assertEqual(50, histogram.percentile(50))
+        self.assertEqual(100, histogram.percentile(99))
+        self.assertAlmostEqual(50.5, histogram.get_mean())
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(0, histogram.percentile(95))
+        self.assertEqual(0, histogram.get_mean())
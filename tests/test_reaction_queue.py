@@ -0,0 +1,70 @@
+import asyncio
+from unittest import TestCase
+
+from helpers.reaction_queue import ReactionQueue
+
+
+class FakeMember:
+    def __init__(self, member_id: int):
+        self.id: int = member_id
+
+
+class FakeMessage:
+    def __init__(self):
+        self.calls: list[tuple] = []
+
+    async def add_reaction(self, emoji: str):
+        await asyncio.sleep(0)
+        self.calls.append(('add', emoji))
+
+    async def remove_reaction(self, emoji: str, member: FakeMember):
+        self.calls.append(('remove', emoji, member.id))
+
+    async def clear_reaction(self, emoji: str):
+        self.calls.append(('clear', emoji))
+
+    async def clear_reactions(self):
+        self.calls.append(('clear_all',))
+
+
+class TestReactionQueue(TestCase):
+    def test_adds_in_order(self):
+        message = FakeMessage()
+        queue = ReactionQueue(message)  # noqa
+
+        async def run():
+            for emoji in ['a', 'b', 'a', 'c']:
+                queue.add(emoji)
+            await queue.flush()
+
+        asyncio.run(run())
+        self.assertEqual([('add', 'a'), ('add', 'b'), ('add', 'c')], message.calls)
+
+    def test_clear_cancels_adds(self):
+        message = FakeMessage()
+        queue = ReactionQueue(message)  # noqa
+
+        async def run():
+            for emoji in ['a', 'b', 'c']:
+                queue.add(emoji)
+            await asyncio.sleep(0)  # 'a' is being sent
+            queue.clear_all()
+            queue.add('ok')
+            await queue.flush()
+
+        asyncio.run(run())
+        self.assertEqual([('add', 'a'), ('clear_all',), ('add', 'ok')], message.calls)
+
+    def test_remove_once(self):
+        message = FakeMessage()
+        queue = ReactionQueue(message)  # noqa
+        member = FakeMember(1)
+
+        async def run():
+            queue.on_user_reaction('a', member)
+            queue.remove('a', member)  # From the hook
+            queue.remove('a', member)  # From the dispatcher
+            await queue.flush()
+
+        asyncio.run(run())
+        self.assertEqual([('remove', 'a', 1)], message.calls)
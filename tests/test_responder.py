@@ -0,0 +1,71 @@
+import asyncio
+from unittest import TestCase
+
+from helpers.responder import Responder
+
+
+class FakeHttp:
+    def __init__(self):
+        self.deleted: int = 0
+
+    async def delete(self, token: str):
+        self.deleted += 1
+
+
+class FakeContext:
+    def __init__(self):
+        self.responded: bool = False
+        self.deferred: bool = False
+        self.sent: list[tuple[str, bool]] = []
+        self._http: FakeHttp = FakeHttp()
+        self._SlashContext__token: str = 'token'
+
+    async def defer(self, hidden: bool = False):
+        assert not (self.deferred or self.responded)
+        self.deferred = True
+
+    async def send(self, msg: str, hidden: bool = False):
+        self.deferred = False
+        self.responded = True
+        self.sent.append((msg, hidden))
+
+
+class TestResponder(TestCase):
+    def test_watchdog_defers(self):
+        ctx = FakeContext()
+        responder = Responder(ctx, budget=0.01)  # noqa
+
+        async def run():
+            responder.start_watchdog()
+            await asyncio.sleep(0.05)
+            self.assertTrue(responder.needs_answer())
+            await responder.send('done')
+
+        asyncio.run(run())
+        self.assertTrue(responder.deferred)
+        self.assertEqual([('done', False)], ctx.sent)
+
+    def test_fast_command_not_deferred(self):
+        ctx = FakeContext()
+        responder = Responder(ctx, budget=0.01)  # noqa
+
+        async def run():
+            responder.start_watchdog()
+            await responder.send('done')
+            await asyncio.sleep(0.05)
+            responder.stop_watchdog()
+
+        asyncio.run(run())
+        self.assertFalse(responder.deferred)
+
+    def test_hidden_after_visible_defer(self):
+        ctx = FakeContext()
+        responder = Responder(ctx)  # noqa
+
+        async def run():
+            await responder.defer()
+            await responder.send('error', hidden=True)
+
+        asyncio.run(run())
+        self.assertEqual(1, ctx._http.deleted)  # noqa
+        self.assertEqual([('error', True)], ctx.sent)
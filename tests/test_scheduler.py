@@ -0,0 +1,54 @@
+import asyncio
+from unittest import TestCase
+
+from helpers.scheduler import TimingWheel
+from helpers.timer import WaitUntil
+
+
+class TestScheduler(TestCase):
+    def test_order(self):
+        wheel = TimingWheel(tick=0.001, slots=4)  # 4, 16 and 64 ticks per level
+        fired = []
+
+        async def run():
+            loop = asyncio.get_event_loop()
+            start = loop.time()
+            for delay in [0.03, 0.002, 0.012, 0.1]:
+                wheel.call_later(delay, lambda d: fired.append((d, loop.time() - start)), delay)
+            self.assertEqual(4, wheel.get_pending_count())
+            await wheel.sleep(0.15)
+
+        asyncio.run(run())
+        self.assertEqual([0.002, 0.012, 0.03, 0.1], [delay for delay, _ in fired])
+        for delay, elapsed in fired:
+            self.assertGreaterEqual(elapsed, delay)
+        self.assertEqual(0, wheel.get_pending_count())
+        self.assertEqual(5, wheel.fired)
+        self.assertGreater(wheel.lag.count, 0)
+
+    def test_cancel_reschedule(self):
+        wheel = TimingWheel(tick=0.001)
+        fired = []
+
+        async def run():
+            cancelled = wheel.call_later(0.005, fired.append, 'cancelled')
+            moved = wheel.call_later(0.005, fired.append, 'moved')
+            wheel.call_later(0.01, fired.append, 'kept')
+            cancelled.cancel()
+            moved.reschedule(0.02)
+            self.assertFalse(cancelled.is_pending())
+            self.assertEqual(2, wheel.get_pending_count())
+            await wheel.sleep(0.03)
+
+        asyncio.run(run())
+        self.assertEqual(['kept', 'moved'], fired)
+        self.assertEqual(1, wheel.cancelled)
+
+    def test_wait_until(self):
+        async def run():
+            finished = WaitUntil(0.01)
+            cancelled = WaitUntil(10)
+            cancelled.cancel()
+            return await finished.wait(), await cancelled.wait()
+
+        self.assertEqual((True, False), asyncio.run(run()))
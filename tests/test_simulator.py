@@ -0,0 +1,32 @@
+import pickle
+from unittest import TestCase
+
+from enums.item_rarity import ItemRarity
+from enums.location import Location
+from enums.user_class import UserClass
+from game_data import data_loader
+from simulation.simulator import Scenario, run_batch
+
+
+class TestSimulator(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def test_batch(self):
+        scenario = Scenario(UserClass.WARRIOR, ItemRarity.RARE, Location.FOREST, 'A')
+        stats = run_batch(scenario, 50, seed=1)
+        self.assertEqual(50, stats.fights)
+        self.assertEqual(stats.fights - stats.unfinished, stats.rounds.count)
+        stats.merge(run_batch(scenario, 50, seed=2))
+        self.assertEqual(100, stats.fights)
+        self.assertEqual(100 - stats.unfinished, stats.dealt.count)
+
+    def test_same_seed(self):
+        scenario = Scenario(UserClass.ROGUE, ItemRarity.COMMON, Location.LAKE, 'A')
+        self.assertEqual(run_batch(scenario, 20, seed=3).print(), run_batch(scenario, 20, seed=3).print())
+
+    def test_pickle(self):
+        scenario = Scenario(UserClass.BARBARIAN, ItemRarity.EPIC, Location.COLISEUM, '1')
+        self.assertEqual(scenario.get_name(), pickle.loads(pickle.dumps(scenario)).get_name())
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+from unittest import TestCase
+
+from benchmark import replay
+from benchmark.population import populate, create_population
+from commands import bet, simple
+from db.memory_database import MemoryDatabase
+from game_data import data_loader
+from helpers import messages, storage, traffic, reaction_handler
+from helpers.command import CommandHandler, MockSlashContext, MockAuthor, MockMessage, COMMAND_FLAGS
+
+
+class TestTraffic(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not data_loader.is_loaded():
+            data_loader.load()
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+
+    def tearDown(self):
+        traffic.set_recorder(None)
+        storage.clear_cache()
+        os.remove(self.path)
+
+    def _record(self) -> tuple[int, int]:
+        db = MemoryDatabase()
+        population = populate(db, 2, 1, seed=1)
+        user_id: int = population.user_ids[0]
+        flags: dict[str, bool] = {x: False for x in COMMAND_FLAGS}
+
+        async def run():
+            handler = CommandHandler(db, None)  # noqa
+            await storage.preload_guilds(db, population.guild_ids)
+            traffic.set_recorder(traffic.TrafficRecorder(self.path, 'salt'))
+            member = MockAuthor(user_id, 'Mock')
+            ctx = MockSlashContext(user_id, population.user_guilds[user_id], echo=False)
+            await handler.call(ctx, simple.inv, **flags)
+            await handler.call(ctx, bet.add, 100, **{**flags, 'guild_only': True, 'guild_lock': True})
+            old = MockMessage('old')  # Sent before the recording started
+            tracked = [messages.register_message_reactions(x, {user_id}) for x in (ctx.messages[0], old)]
+            await reaction_handler.on_reaction_add(db, replay.MockReaction(ctx.messages[0], '👍'), member)  # noqa
+            await reaction_handler.on_reaction_add(db, replay.MockReaction(old, '👍'), member)  # noqa
+            await reaction_handler.on_reaction_add(db, replay.MockReaction(MockMessage('b'), '👍'), member)  # noqa
+            for message_plus in tracked:
+                messages.unregister(message_plus)
+            traffic.get_recorder().close()
+            traffic.set_recorder(None)
+
+        asyncio.run(run())
+        storage.clear_cache()
+        return user_id, population.user_guilds[user_id]
+
+    def test_record(self):
+        user_id, guild_id = self._record()
+        with open(self.path, encoding='utf-8') as file:
+            content: str = file.read()
+        self.assertNotIn(str(user_id), content)
+        self.assertNotIn(str(guild_id), content)
+        self.assertNotIn('Mock', content)
+        events = traffic.load_trace(self.path)
+        # The reaction to an untracked message is left out
+        self.assertEqual(['simple.inv', 'bet.add', None, None], [x.get('name') for x in events])
+        self.assertEqual([], events[0]['messages'])  # Hidden
+        self.assertEqual([100], events[1]['args'])
+        self.assertTrue(events[1]['flags']['guild_lock'])
+        self.assertEqual(events[1]['messages'], [events[2]['message']])
+        self.assertEqual(events[1]['user'], events[2]['user'])
+
+    def test_replay(self):
+        self._record()
+        events = traffic.load_trace(self.path)
+        population = replay.get_population(events)
+        self.assertEqual([events[0]['guild']], population.guild_ids)
+        db = MemoryDatabase()
+        create_population(db, population, seed=1)
+        report = asyncio.run(replay.run_replay(db, events, population, speed=0))
+        self.assertEqual(4, report['events'])
+        self.assertEqual(1, report['skipped'])  # The message sent before the recording
+        self.assertEqual(['bet.add', 'reaction', 'simple.inv'], list(report['commands']))
+        for name, stats in report['commands'].items():
+            self.assertEqual(1, stats['ops'], name)
+            self.assertEqual(0, stats['errors'], name)
+        self.assertEqual(2, report['api_calls']['send'])
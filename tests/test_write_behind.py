@@ -0,0 +1,62 @@
+import asyncio
+from unittest import TestCase
+
+from db.memory_database import MemoryDatabase
+from db.row import Row
+from db.write_behind import WriteBehind
+from helpers import storage
+
+
+class TestWriteBehind(TestCase):
+    def _get_db(self, write_behind: bool) -> MemoryDatabase:
+        db = MemoryDatabase()
+        db.insert_data('guilds', {'id': 1, 'table_money': 10})
+        db.commit()
+        if write_behind:
+            db.write_behind = WriteBehind(db)
+        return db
+
+    def test_adopt_pending(self):
+        db = self._get_db(True)
+        row = Row(db, 'guilds', {'id': 1}, row_data=db.get_row_data('guilds', {'id': 1}))
+        row._data['table_money'] = 20
+        row.save_evicted()  # As an eviction does
+        reloaded = Row(db, 'guilds', {'id': 1}, row_data=db.get_row_data('guilds', {'id': 1}))
+        self.assertEqual(20, reloaded['table_money'])
+        db.write_behind.flush_sync()
+        self.assertEqual(20, db.get_row_data('guilds', {'id': 1})['table_money'])
+
+    def test_adopt_in_flight(self):
+        db = self._get_db(True)
+        row = Row(db, 'guilds', {'id': 1}, row_data=db.get_row_data('guilds', {'id': 1}))
+        row._data['table_money'] = 20
+        db.write_behind.queue(row)
+        updates = db.write_behind._take()  # noqa, a flush is writing them
+        reloaded = Row(db, 'guilds', {'id': 1}, row_data=db.get_row_data('guilds', {'id': 1}))
+        self.assertEqual(20, reloaded['table_money'])
+        db.write_behind._finish(updates, True)  # noqa, the flush failed
+        reloaded._data['table_money'] = 30
+        db.write_behind.flush_sync()
+        self.assertEqual(30, db.get_row_data('guilds', {'id': 1})['table_money'])
+        self.assertEqual(0, db.write_behind.get_pending_count())
+
+    def test_evict_rollback(self):
+        db = self._get_db(False)
+        guild = storage.get_guild(db, 1)
+        guild._data['table_money'] = 20
+
+        async def run():
+            async with db.checkout():
+                storage.GUILD_CACHE.pop(1)
+                storage._save_evicted(1, guild)  # noqa, evicted by this command
+                db.rollback()
+
+        try:
+            asyncio.run(run())
+            self.assertEqual(10, db.get_row_data('guilds', {'id': 1})['table_money'])  # Queued, not written
+            self.assertEqual(20, storage.get_guild(db, 1)['table_money'])
+            db.eviction_writer.flush_sync()
+            self.assertEqual(20, db.get_row_data('guilds', {'id': 1})['table_money'])
+            self.assertEqual(0, db.eviction_writer.get_pending_count())
+        finally:
+            storage.clear_cache()
@@ -1,5 +1,5 @@
 from enum import unique, Enum
-from typing import Optional, Any
+from typing import Optional
 
 import utils
 from db.database import PostgreSQL
@@ -62,9 +62,8 @@ class Inventory:
 
         for isd in items_data:
             slot: str = isd['slot'].strip()
-            item_id: int = isd['item_id']
-            item_dict: dict[str, Any] = self._db.get_row_data('items', dict(id=item_id))  # STARTS @ 1!!!
-            item: Item = item_utils.get_from_dict(item_id, item_dict['desc_id'], item_dict['data'])
+            item_id: int = isd['item_id']  # STARTS @ 1!!!
+            item: Item = item_utils.get_from_dict(item_id, isd['desc_id'], isd['data'])
             self._get_dict_ref(slot).set(item)
 
         self._user_entity.update_equipment(self.get_equipment())
@@ -1,5 +1,5 @@
 import typing
-from typing import Optional
+from typing import Optional, Any
 
 from discord import Member
 
@@ -23,14 +23,19 @@ if typing.TYPE_CHECKING:
 
 
 class User(Row):
-    def __init__(self, db: PostgreSQL, user_id: int):
-        super().__init__(db, 'users', dict(id=user_id))
+    def __init__(self, db: PostgreSQL, user_id: int, bundle: Optional[tuple] = None):
+        if bundle is None:
+            bundle = db.get_user_bundles([user_id]).get(user_id, (None, None, []))
+        user_data: Optional[dict[str, Any]] = bundle[0]
+        upgrades_data: Optional[dict[str, Any]] = bundle[1]
+        items_data: list[dict[str, Any]] = bundle[2]
+        super().__init__(db, 'users', dict(id=user_id), row_data=user_data)
         self.id = user_id
         self.member = None
         self._tutorial_stage: DictRef[int] = DictRef(self._data, 'tutorial')
         if utils.is_test():
             self._tutorial_stage.set(-1)
-        self.upgrades_row = Row(db, 'user_upgrades', dict(user_id=user_id))
+        self.upgrades_row = Row(db, 'user_upgrades', dict(user_id=user_id), row_data=upgrades_data)
         self.upgrades = {
             'bank': upgrades.UpgradeLink(upgrades.BANK_LIMIT,
                                          DictRef(self.upgrades_row._data, 'bank'),
@@ -68,9 +73,6 @@ class User(Row):
             }
 
         # Fill inventory
-        items_data = self._db.start_join('users', dict(id=self.id), columns=['slot', 'item_id'], limit=30) \
-            .join('user_items', field_matches=[('user_id', 'id')]) \
-            .execute()
         self.inventory: Inventory = Inventory(self._db, items_data,
                                               self.upgrades['inventory'].get_value(),
                                               1, self.id, self.user_entity)
@@ -173,6 +175,9 @@ class User(Row):
             return self._tokens.get_base()
         return min(self._tokens.get(), self.get_token_limit())
 
+    def add_tokens(self, tokens: int) -> None:
+        self._tokens.set(self.get_tokens() + tokens)
+
     def remove_tokens(self, tokens: int) -> bool:
         if self.get_tokens() >= tokens:
             self._tokens.set(self.get_tokens() - tokens)
@@ -301,6 +306,10 @@ class User(Row):
     def _update_inventory_limit(self) -> None:
         self.inventory.set_item_limit(self.get_inventory_limit())
 
-    def save(self) -> None:
-        super().save()
-        self.upgrades_row.save()
+    def save_evicted(self) -> None:
+        super().save_evicted()
+        self.upgrades_row.save_evicted()
+
+    async def save(self) -> None:
+        await super().save()
+        await self.upgrades_row.save()